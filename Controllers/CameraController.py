@@ -1,30 +1,41 @@
-import cv2
 import time
-import pygame
-import numpy as np
 import os
 
-# ---- Dashboard Output ----
-outputToDashboard = {
-    "camera_status": "Disconnected",
-    "frame_count": 0,
-    "resolution": "N/A",
-    "fps": 0
-}
+from Controllers.Pacing import Rate
+from Controllers.Services import services
+from Controllers.TelemetryBus import bus as telemetry_bus
+
+# OpenCV (and numpy with it) is only imported once the camera starts
+cv2 = None
+
+# ---- Dashboard Output (CameraRecord on the telemetry bus) ----
+telemetry = telemetry_bus.topic("camera")
 
 # ---- Camera State ----
 camera = None
 frame_count = 0
 start_time = 0
 
+# Newest frame for in-process viewers such as the GUI preview: (frame number, BGR image).
+# Only the reference is swapped, so a slow viewer can't hold up capture.
+latest_frame = (0, None)
+
 # ---- Config ----
 save_frames = True
 save_dir = "camera_frames"
 display_enabled = False  # Set to True if Pi is connected to monitor
+capture_rate = 10  # Hz
 
 
 def setup_camera():
-    global camera, frame_count, start_time
+    global camera, frame_count, start_time, cv2
+
+    try:
+        import cv2
+    except ImportError as e:
+        telemetry.publish(status="OpenCV missing")
+        print("ERROR: OpenCV unavailable:", e)
+        return False
 
     # Initialize counter
     frame_count = 0
@@ -34,7 +45,9 @@ def setup_camera():
     if save_frames and not os.path.exists(save_dir):
         os.makedirs(save_dir)
 
-    # OpenCV capture
+    # OpenCV capture; never hold two handles on the device
+    if camera is not None:
+        camera.release()
     camera = cv2.VideoCapture(0, cv2.CAP_V4L2)
     camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
     camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
@@ -43,11 +56,9 @@ def setup_camera():
         width = int(camera.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(camera.get(cv2.CAP_PROP_FRAME_HEIGHT))
         fps = int(camera.get(cv2.CAP_PROP_FPS))
-        outputToDashboard["camera_status"] = "Connected"
-        outputToDashboard["resolution"] = f"{width}x{height}"
-        outputToDashboard["fps"] = fps
+        telemetry.publish(status="Connected", resolution=f"{width}x{height}", fps=fps)
     else:
-        outputToDashboard["camera_status"] = "Failed to connect"
+        telemetry.publish(status="Failed to connect")
         print("ERROR: Failed to initialize camera")
         return False
 
@@ -55,18 +66,18 @@ def setup_camera():
 
 
 def capture_frame():
-    global frame_count
+    global frame_count, latest_frame
     ret, frame = camera.read()
     if not ret:
         print("WARNING: Failed to capture frame")
-        return
+        return False
 
     frame_count += 1
+    latest_frame = (frame_count, frame)
     elapsed_time = time.time() - start_time
     current_fps = frame_count / elapsed_time if elapsed_time > 0 else 0
 
-    outputToDashboard["frame_count"] = frame_count
-    outputToDashboard["fps"] = round(current_fps, 1)
+    telemetry.publish(frame_count=frame_count, fps=round(current_fps, 1))
 
     # Save frame periodically
     if save_frames and frame_count % 30 == 0:
@@ -75,7 +86,7 @@ def capture_frame():
         print(f"Saved: {filename}")
 
     # Basic image processing example
-    brightness = np.mean(frame)
+    brightness = frame.mean()
     if frame_count % 30 == 0:
         print(f"Brightness: {brightness:.1f}")
 
@@ -86,33 +97,32 @@ def capture_frame():
 
 
 def cleanup():
+    global camera
     if camera:
         camera.release()
+        camera = None
     if display_enabled:
         cv2.destroyAllWindows()
-    pygame.quit()
 
 
-def run():
-    pygame.init()
-    clock = pygame.time.Clock()
+running = False
 
+def run():
+    global running
     if not setup_camera():
         return
 
     print("Camera ready. Press Ctrl+C to stop.")
+    rate = Rate(capture_rate)
+    running = True
     try:
-        while True:
+        while running:
             capture_frame()
 
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    raise KeyboardInterrupt
-
             if display_enabled and cv2.waitKey(1) & 0xFF == 27:
                 break
 
-            clock.tick(10)
+            rate.sleep()
 
     except KeyboardInterrupt:
         print("\nCamera test stopped by user.")
@@ -124,5 +134,20 @@ def run():
             print(f"Average FPS: {frame_count / elapsed:.1f}")
 
 
+def stop():
+    global running
+    running = False
+
+
+def release_camera():
+    cleanup()
+    telemetry.publish(status="Stopped")
+
+
+# ---- Supervised Service (Controllers.Services) ----
+service = services.add("camera", setup=setup_camera, step=capture_frame, rate=capture_rate,
+                       teardown=release_camera)
+
+
 if __name__ == "__main__":
     run()
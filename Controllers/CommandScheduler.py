@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import deque
+
+from Networking.Protocol import DIRECTION_COMMANDS, SPEED_COMMANDS
+
+# ---- Priority Classes (lower runs first) ----
+SAFETY = 0   # stop
+MOTION = 1   # anything that moves the car
+CONFIG = 2   # speed presets
+
+LANE_NAMES = {SAFETY: "safety", MOTION: "motion", CONFIG: "config"}
+
+
+def classify(command):
+    """The command's class, or None if it isn't a motor command at all."""
+    if command == "stop":
+        return SAFETY
+    if command in SPEED_COMMANDS:
+        return CONFIG
+    if command in DIRECTION_COMMANDS:
+        return MOTION
+    return None
+
+
+class CommandScheduler:
+    """
+    Runs commands on one dispatcher thread in priority order instead of arrival order.
+
+    A pending stop is always taken before anything else and cancels any movement
+    command still waiting. Only the newest movement command is kept; older ones are
+    dropped as superseded. Config commands run in order once nothing more urgent is
+    waiting. Anything else (typos, "servo:90", garbage off the wire) is rejected at
+    submit() and counted, so it can't displace a real movement command. Time spent
+    waiting in the queue, and running the handler, is measured per class.
+    """
+    def __init__(self, handler, name="Commands"):
+        self.handler = handler
+        self.name = name
+        self.safety = deque()
+        self.motion = None  # (command, submitted) -- at most one, the newest
+        self.config = deque()
+        self.cond = threading.Condition()
+        self.thread = None
+        self.closed = False  # set by stop(); nothing is accepted after it
+
+        self.stats = {
+            lane: {"submitted": 0, "executed": 0, "dropped": 0, "wait_avg_ms": 0.0, "wait_max_ms": 0.0,
+                   "apply_avg_ms": 0.0, "apply_max_ms": 0.0}
+            for lane in LANE_NAMES.values()
+        }
+        self.stats["rejected"] = {"count": 0, "last": ""}
+
+    def submit(self, command):
+        """Queue a motor command; returns False (and runs nothing) for anything else."""
+        lane = classify(command)
+        if lane is None:
+            rejected = self.stats["rejected"]
+            rejected["count"] += 1
+            rejected["last"] = command[:32]
+            return False
+        entry = (command, time.perf_counter())
+        with self.cond:
+            if self.closed:
+                return False
+            self.stats[LANE_NAMES[lane]]["submitted"] += 1
+            if lane == SAFETY:
+                self.safety.append(entry)
+                if self.motion is not None:
+                    self.motion = None
+                    self.stats["motion"]["dropped"] += 1
+            elif lane == MOTION:
+                if self.motion is not None:
+                    self.stats["motion"]["dropped"] += 1
+                self.motion = entry
+            else:
+                self.config.append(entry)
+            self.cond.notify()
+
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+        return True
+
+    def dispatch_ms(self, command):
+        """Smoothed queue wait + handler time of the class `command` falls in; 0 until one has run, None if rejected."""
+        lane = classify(command)
+        if lane is None:
+            return None
+        stats = self.stats[LANE_NAMES[lane]]
+        return round(stats["wait_avg_ms"] + stats["apply_avg_ms"], 3)
+
+    def stop(self):
+        """Drop anything still waiting, let the running command finish and refuse new ones."""
+        with self.cond:
+            self.closed = True
+            self.safety.clear()
+            self.motion = None
+            self.config.clear()
+            self.cond.notify_all()
+            thread = self.thread
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout=1.0)
+
+    def next_command(self):
+        """The next (lane, entry) to run, or None once stopped."""
+        with self.cond:
+            while not (self.safety or self.motion or self.config or self.closed):
+                self.cond.wait()
+            if self.closed:
+                return None
+            if self.safety:
+                return SAFETY, self.safety.popleft()
+            if self.motion is not None:
+                entry, self.motion = self.motion, None
+                return MOTION, entry
+            return CONFIG, self.config.popleft()
+
+    def run(self):
+        while True:
+            job = self.next_command()
+            if job is None:
+                return
+            lane, (command, submitted) = job
+            wait = (time.perf_counter() - submitted) * 1000
+            stats = self.stats[LANE_NAMES[lane]]
+            stats["executed"] += 1
+            stats["wait_avg_ms"] = round(wait if stats["executed"] == 1 else 0.9 * stats["wait_avg_ms"] + 0.1 * wait, 3)
+            stats["wait_max_ms"] = max(stats["wait_max_ms"], round(wait, 3))
+            started = time.perf_counter()
+            try:
+                self.handler(command)
+            except Exception as e:
+                print(f"[{self.name}] Error processing {command!r}: {e}")
+            apply = (time.perf_counter() - started) * 1000
+            stats["apply_avg_ms"] = round(apply if stats["executed"] == 1 else 0.9 * stats["apply_avg_ms"] + 0.1 * apply, 3)
+            stats["apply_max_ms"] = max(stats["apply_max_ms"], round(apply, 3))
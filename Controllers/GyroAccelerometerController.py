@@ -1,10 +1,15 @@
 import smbus
-import pygame
+import threading
 from time import sleep
 
+from Controllers.Pacing import Rate
+from Controllers.Services import services
+from Controllers.TelemetryBus import bus as telemetry_bus
+
 # ---- I2C Setup ----
-bus = smbus.SMBus(1)
+bus = None  # opened by MPU_Init, not at import
 Device_Address = 0x68
+read_rate = 10  # Hz
 
 # ---- MPU6050 Registers ----
 PWR_MGMT_1   = 0x6B
@@ -19,29 +24,52 @@ GYRO_XOUT_H  = 0x43
 GYRO_YOUT_H  = 0x45
 GYRO_ZOUT_H  = 0x47
 
-# ---- Dashboard Data Store ----
-outputToDashboard = {
-    "accel": {"x": 0.0, "y": 0.0, "z": 0.0},
-    "gyro": {"x": 0.0, "y": 0.0, "z": 0.0}
-}
+# ---- Dashboard Output (GyroRecord on the telemetry bus) ----
+telemetry = telemetry_bus.topic("gyro")
+
+# The gyro loop and the motor heading-hold loop share the bus from different threads
+bus_lock = threading.Lock()
+initialized = False
 
 # ---- Initialization ----
 def MPU_Init():
-    bus.write_byte_data(Device_Address, SMPLRT_DIV, 7)
-    bus.write_byte_data(Device_Address, PWR_MGMT_1, 1)
-    bus.write_byte_data(Device_Address, CONFIG, 0)
-    bus.write_byte_data(Device_Address, GYRO_CONFIG, 24)
-    bus.write_byte_data(Device_Address, INT_ENABLE, 1)
+    global bus, initialized
+    with bus_lock:
+        if bus is None:
+            bus = smbus.SMBus(1)
+        bus.write_byte_data(Device_Address, SMPLRT_DIV, 7)
+        bus.write_byte_data(Device_Address, PWR_MGMT_1, 1)
+        bus.write_byte_data(Device_Address, CONFIG, 0)
+        bus.write_byte_data(Device_Address, GYRO_CONFIG, 24)
+        bus.write_byte_data(Device_Address, INT_ENABLE, 1)
+    initialized = True
+
+def setup_mpu():
+    if not initialized:
+        MPU_Init()
 
 # ---- Raw Read ----
-def read_raw_data(addr):
-    high = bus.read_byte_data(Device_Address, addr)
-    low = bus.read_byte_data(Device_Address, addr+1)
+def to_signed(high, low):
     value = (high << 8) | low
     if value > 32768:
         value -= 65536
     return value
 
+def read_raw_data(addr):
+    with bus_lock:
+        high = bus.read_byte_data(Device_Address, addr)
+        low = bus.read_byte_data(Device_Address, addr+1)
+    return to_signed(high, low)
+
+def read_yaw_rate():
+    """
+    Read only the Z gyro axis (deg/s) in a single I2C block transfer.
+    Used by the motor heading-hold loop, which needs it every control tick.
+    """
+    with bus_lock:
+        high, low = bus.read_i2c_block_data(Device_Address, GYRO_ZOUT_H, 2)
+    return to_signed(high, low) / 131.0
+
 # ---- Read All Axes ----
 def read_sensors():
     acc_x = read_raw_data(ACCEL_XOUT_H)
@@ -52,36 +80,35 @@ def read_sensors():
     gyro_y = read_raw_data(GYRO_YOUT_H)
     gyro_z = read_raw_data(GYRO_ZOUT_H)
 
-    outputToDashboard["accel"]["x"] = acc_x / 16384.0
-    outputToDashboard["accel"]["y"] = acc_y / 16384.0
-    outputToDashboard["accel"]["z"] = acc_z / 16384.0
-
-    outputToDashboard["gyro"]["x"] = gyro_x / 131.0
-    outputToDashboard["gyro"]["y"] = gyro_y / 131.0
-    outputToDashboard["gyro"]["z"] = gyro_z / 131.0
-
-    return outputToDashboard
+    telemetry.publish(
+        accel_x=acc_x / 16384.0, accel_y=acc_y / 16384.0, accel_z=acc_z / 16384.0,
+        gyro_x=gyro_x / 131.0, gyro_y=gyro_y / 131.0, gyro_z=gyro_z / 131.0,
+    )
+    return telemetry.read()
 
 # ---- Loop ----
+running = False
+
 def run():
-    pygame.init()
-    clock = pygame.time.Clock()
-    MPU_Init()
+    global running
+    setup_mpu()
     print("[Gyro] Sensor initialized. Starting loop...")
 
+    rate = Rate(read_rate)
     running = True
     while running:
         data = read_sensors()
-        print(f"Gx={data['gyro']['x']:.2f} Gy={data['gyro']['y']:.2f} Gz={data['gyro']['z']:.2f} | "
-              f"Ax={data['accel']['x']:.2f} Ay={data['accel']['y']:.2f} Az={data['accel']['z']:.2f}")
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
+        print(f"Gx={data.gyro_x:.2f} Gy={data.gyro_y:.2f} Gz={data.gyro_z:.2f} | "
+              f"Ax={data.accel_x:.2f} Ay={data.accel_y:.2f} Az={data.accel_z:.2f}")
+        rate.sleep()
 
-        clock.tick(10)
+def stop():
+    global running
+    running = False
 
-    pygame.quit()
+# ---- Supervised Service (Controllers.Services) ----
+# The I2C bus stays open on stop: the motor heading-hold loop shares it
+service = services.add("gyro", setup=setup_mpu, step=read_sensors, rate=read_rate)
 
 if __name__ == "__main__":
     run()
@@ -1,5 +1,11 @@
 import RPi.GPIO as GPIO
-import pygame
+import threading
+import time
+from collections import deque
+from math import copysign, sqrt
+
+from Controllers.CommandScheduler import CommandScheduler
+from Controllers.TelemetryBus import bus as telemetry_bus
 
 # ---- Pin Configuration (Updated) ----
 in1 = 19  # Right Forward
@@ -10,20 +16,100 @@ in3 = 20  # Left Forward
 in4 = 21
 enB = 16
 
-# ---- Dashboard Output ----
-outputToDashboard = {
-    "L_Front": {"speed": 0, "direction": "Stopped"},
-    "L_Rear":  {"speed": 0, "direction": "Stopped"},
-    "R_Front": {"speed": 0, "direction": "Stopped"},
-    "R_Rear":  {"speed": 0, "direction": "Stopped"},
+# ---- Dashboard Output (MotorRecord on the telemetry bus; both wheels on a side share a driver) ----
+telemetry = telemetry_bus.topic("motor")
+
+# ---- Control Loop Config ----
+control_rate = 100   # Hz, how often actual duty cycles are moved toward their targets
+max_accel = 200.0    # duty-cycle %/s
+max_jerk = 2000.0    # duty-cycle %/s^2
+
+# ---- Heading Hold Config ----
+heading_hold = True        # Trim the left/right split from the gyro when driving straight
+heading_kp = 0.8           # duty % per deg/s of yaw rate
+heading_ki = 0.4
+heading_kd = 0.0
+heading_max_trim = 15.0    # duty %
+heading_sign = 1.0         # Set to -1.0 if the MPU6050 is mounted upside down
+heading_log_seconds = 10   # How much error/output history to keep for tuning
+
+# ---- Safety Stop Config ----
+safety_stop = True              # Stop forward motion when the ultrasonic sees an obstacle
+min_stop_distance = 0.15        # m, stop distance when crawling
+stop_distance_per_duty = 0.006  # m of extra stopping margin per duty % of forward speed
+clear_margin = 0.10             # m beyond the threshold before forward motion is allowed again
+brake_time = 0.3                # s to short-brake the motors before releasing them
+
+# ---- Control Loop Stats ----
+loop_stats = {
+    "rate": control_rate,
+    "ticks": 0,
+    "period_ms": 0.0,
+    "jitter_avg_ms": 0.0,
+    "jitter_max_ms": 0.0,
+    "overruns": 0,
+    "errors": 0,   # ticks that raised; the outputs are released after each
+}
+
+heading_stats = {
+    "active": False,
+    "yaw_rate": 0.0,
+    "bias": 0.0,
+    "error": 0.0,
+    "output": 0.0,
+    "latency_ms": 0.0,
+    "latency_max_ms": 0.0,
+    "read_errors": 0,
+}
+
+safety_stats = {
+    "obstacle": False,
+    "distance": 0.0,
+    "threshold_m": min_stop_distance,
+    "trips": 0,
+    "last_latency_ms": 0.0,
+    "worst_latency_ms": 0.0,
+}
+
+# (time, yaw rate, error, output) for every heading-hold tick
+heading_log = deque(maxlen=heading_log_seconds * control_rate)
+
+# Command -> (left, right) wheel direction, matching the pin patterns the
+# car was wired and tested with (in1/in2 + enA drive the "L_*" wheels).
+DIRECTIONS = {
+    "forward":        (1, 1),
+    "backward":       (-1, -1),
+    "left":           (-1, 1),
+    "right":          (1, -1),
+    "stop":           (0, 0),
+    "forward_left":   (-1, 1),
+    "forward_right":  (1, -1),
+    "backward_left":  (-1, -1),
+    "backward_right": (1, 1),
 }
 
 # PWM controllers
 p = None  # Left side
 q = None  # Right side
 current_speed = 35
+current_direction = "stop"
 initialized = False
 
+# Signed duty cycles (-100..100): what producers asked for vs. what the pins carry
+target_duty = (0.0, 0.0)
+actual_duty = [0.0, 0.0]
+duty_rate = [0.0, 0.0]
+applied_duty = [None, None]
+
+read_yaw_rate = None  # Bound by setup_heading_hold() when the gyro is available
+
+braking_until = 0.0
+
+command_lock = threading.Lock()
+output_lock = threading.Lock()  # Held while the motor pins are written
+control_thread = None
+control_running = False
+
 def setup_gpio():
     global p, q, initialized
     if initialized:
@@ -39,10 +125,171 @@ def setup_gpio():
 
     p = GPIO.PWM(enA, 1000)
     q = GPIO.PWM(enB, 1000)
-    p.start(current_speed)
-    q.start(current_speed)
+    p.start(0)
+    q.start(0)
     initialized = True
 
+class PID:
+    """Plain PID with a clamped output and integral (anti-windup)."""
+    def __init__(self, kp, ki, kd, limit):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.limit = limit
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0
+        self.last_error = None
+
+    def update(self, error, dt):
+        if dt <= 0:
+            return 0.0
+        if self.ki:
+            self.integral += error * dt
+            bound = self.limit / self.ki
+            self.integral = max(-bound, min(bound, self.integral))
+        derivative = 0.0 if self.last_error is None else (error - self.last_error) / dt
+        self.last_error = error
+        output = self.kp * error + self.ki * self.integral + self.kd * derivative
+        return max(-self.limit, min(self.limit, output))
+
+heading_pid = PID(heading_kp, heading_ki, heading_kd, heading_max_trim)
+
+def setup_heading_hold():
+    """Bind the gyro's yaw-rate reader, or leave heading hold off if it isn't there."""
+    global read_yaw_rate
+    if not heading_hold or read_yaw_rate is not None:
+        return
+    try:
+        from Controllers.GyroAccelerometerController import setup_mpu, read_yaw_rate as gyro_yaw_rate
+        setup_mpu()
+    except (ImportError, OSError) as e:
+        print("[Motor] Gyro unavailable, heading hold disabled:", e)
+        return
+    read_yaw_rate = gyro_yaw_rate
+
+def heading_trim(dt):
+    """
+    Read the yaw rate and return the duty trim to add to the left side
+    (and subtract from the right) so a straight command stays straight.
+    """
+    if read_yaw_rate is None:
+        return 0.0
+    try:
+        yaw_rate = read_yaw_rate() * heading_sign
+    except OSError:
+        heading_stats["read_errors"] += 1
+        return 0.0
+
+    left, right = DIRECTIONS[current_direction]
+    straight = left == right != 0
+    heading_stats["yaw_rate"] = round(yaw_rate, 3)
+
+    if not straight:
+        heading_stats["active"] = False
+        heading_pid.reset()
+        if target_duty == (0.0, 0.0) and actual_duty == [0.0, 0.0]:
+            # Parked: track the gyro's zero-rate offset
+            heading_stats["bias"] = 0.98 * heading_stats["bias"] + 0.02 * yaw_rate
+        return 0.0
+
+    # Positive yaw (CCW) means the right side is outrunning the left
+    error = -(yaw_rate - heading_stats["bias"])
+    output = heading_pid.update(error, dt)
+    heading_stats["active"] = True
+    heading_stats["error"] = round(error, 3)
+    heading_stats["output"] = round(output, 3)
+    heading_log.append((time.perf_counter(), yaw_rate, error, output))
+    return -output
+
+def save_heading_log(path="heading_log.csv"):
+    """Write the recorded heading-hold history out for PID tuning."""
+    with open(path, "w") as f:
+        f.write("time,yaw_rate,error,output\n")
+        for row in list(heading_log):
+            f.write(",".join(f"{v:.6f}" for v in row) + "\n")
+    print(f"[Motor] Heading log saved to {path}")
+
+def trimmed(duty, trim):
+    """Apply a heading trim without flipping the wheel's direction."""
+    if duty > 0:
+        return max(0.0, min(100.0, duty + trim))
+    if duty < 0:
+        return min(0.0, max(-100.0, duty + trim))
+    return duty
+
+# ---- Safety Stop ----
+def setup_safety():
+    """Subscribe to ultrasonic readings so obstacles stop the car from the sensor thread."""
+    if safety_stop:
+        telemetry_bus.topic("ultrasonic").subscribe(check_obstacle)
+
+def stop_threshold(forward=None):
+    if forward is None:
+        forward = max(0.0, (actual_duty[0] + actual_duty[1]) / 2)
+    return min_stop_distance + stop_distance_per_duty * forward
+
+def moving_forward(left, right):
+    return left + right > 0
+
+def check_obstacle(reading):
+    """Ultrasonic subscriber: runs on every new reading, straight from the sensor thread."""
+    distance, read_time = reading.distance, reading.read_time
+    threshold = stop_threshold()
+    safety_stats["distance"] = round(distance, 3)
+    safety_stats["threshold_m"] = round(threshold, 3)
+
+    if distance <= threshold:
+        if not safety_stats["obstacle"]:
+            safety_stats["obstacle"] = True
+            if moving_forward(*target_duty) or moving_forward(*actual_duty):
+                emergency_stop(read_time)
+    elif safety_stats["obstacle"] and distance > stop_threshold(current_speed) + clear_margin:
+        # Judge clearance at the selected speed, not the stopped one, so the car doesn't bounce
+        safety_stats["obstacle"] = False
+        print("[Motor] Obstacle cleared")
+
+def emergency_stop(read_time=None):
+    """
+    Drop the target and brake immediately, bypassing the acceleration ramp.
+    Called from sensor threads; doesn't wait for the next control tick.
+    """
+    global target_duty, current_direction, braking_until
+    with command_lock:
+        current_direction = "stop"
+        target_duty = (0.0, 0.0)
+
+    with output_lock:
+        if initialized:
+            for pin in (in1, in2, in3, in4):
+                GPIO.output(pin, GPIO.HIGH)
+            p.ChangeDutyCycle(100)
+            q.ChangeDutyCycle(100)
+        actual_duty[:] = [0.0, 0.0]
+        duty_rate[:] = [0.0, 0.0]
+        applied_duty[:] = [None, None]
+        braking_until = time.perf_counter() + brake_time
+
+    safety_stats["trips"] += 1
+    if read_time is not None:
+        latency = (time.perf_counter() - read_time) * 1000
+        safety_stats["last_latency_ms"] = round(latency, 3)
+        safety_stats["worst_latency_ms"] = max(safety_stats["worst_latency_ms"], round(latency, 3))
+        print(f"[Motor] EMERGENCY STOP: obstacle at {safety_stats['distance']:.2f} m "
+              f"(reading-to-stop {latency:.2f} ms, worst {safety_stats['worst_latency_ms']:.2f} ms)")
+    else:
+        print("[Motor] EMERGENCY STOP")
+
+# ---- Targets (called by command producers, never touch GPIO) ----
+def set_target(direction, speed):
+    global target_duty
+    left, right = DIRECTIONS[direction]
+    if safety_stats["obstacle"] and moving_forward(left, right):
+        # Obstacle ahead: only turning away or reversing is allowed
+        left = right = 0
+    target_duty = (float(left * speed), float(right * speed))
+
 def set_speed(level):
     global current_speed
     level = level.lower()
@@ -54,99 +301,232 @@ def set_speed(level):
         current_speed = 75
     else:
         return
-    p.ChangeDutyCycle(current_speed)
-    q.ChangeDutyCycle(current_speed)
-    update_speeds(current_speed)
+    set_target(current_direction, current_speed)
 
 def set_direction(direction):
-    setup_gpio()
+    global current_direction
     direction = direction.lower()
+    if direction not in DIRECTIONS:
+        return
+    current_direction = direction
+    set_target(direction, current_speed)
 
-    def go(fwd1, fwd2, rev1, rev2):
-        GPIO.output(in1, fwd1)
-        GPIO.output(in2, fwd2)
-        GPIO.output(in3, rev1)
-        GPIO.output(in4, rev2)
-
-    if direction == "forward":
-        go(GPIO.HIGH, GPIO.LOW, GPIO.HIGH, GPIO.LOW)
-        set_motor_states("Forward", current_speed)
-    elif direction == "backward":
-        go(GPIO.LOW, GPIO.HIGH, GPIO.LOW, GPIO.HIGH)
-        set_motor_states("Backward", current_speed)
-    elif direction == "left":
-        go(GPIO.LOW, GPIO.HIGH, GPIO.HIGH, GPIO.LOW)
-        outputToDashboard["L_Front"]["direction"] = "Backward"
-        outputToDashboard["L_Rear"]["direction"] = "Backward"
-        outputToDashboard["R_Front"]["direction"] = "Forward"
-        outputToDashboard["R_Rear"]["direction"] = "Forward"
-        update_speeds(current_speed)
-    elif direction == "right":
-        go(GPIO.HIGH, GPIO.LOW, GPIO.LOW, GPIO.HIGH)
-        outputToDashboard["L_Front"]["direction"] = "Forward"
-        outputToDashboard["L_Rear"]["direction"] = "Forward"
-        outputToDashboard["R_Front"]["direction"] = "Backward"
-        outputToDashboard["R_Rear"]["direction"] = "Backward"
-        update_speeds(current_speed)
-    elif direction == "stop":
-        go(GPIO.LOW, GPIO.LOW, GPIO.LOW, GPIO.LOW)
-        set_motor_states("Stopped", 0)
-    elif direction == "forward_left":
-        go(GPIO.LOW, GPIO.HIGH, GPIO.HIGH, GPIO.LOW)
-        outputToDashboard["L_Front"]["direction"] = "Backward"
-        outputToDashboard["L_Rear"]["direction"] = "Backward"
-        outputToDashboard["R_Front"]["direction"] = "Forward"
-        outputToDashboard["R_Rear"]["direction"] = "Forward"
-        update_speeds(current_speed)
-    elif direction == "forward_right":
-        go(GPIO.HIGH, GPIO.LOW, GPIO.LOW, GPIO.HIGH)
-        outputToDashboard["L_Front"]["direction"] = "Forward"
-        outputToDashboard["L_Rear"]["direction"] = "Forward"
-        outputToDashboard["R_Front"]["direction"] = "Backward"
-        outputToDashboard["R_Rear"]["direction"] = "Backward"
-        update_speeds(current_speed)
-    elif direction == "backward_left":
-        go(GPIO.LOW, GPIO.HIGH, GPIO.LOW, GPIO.HIGH)
-        outputToDashboard["L_Front"]["direction"] = "Backward"
-        outputToDashboard["L_Rear"]["direction"] = "Backward"
-        outputToDashboard["R_Front"]["direction"] = "Backward"
-        outputToDashboard["R_Rear"]["direction"] = "Backward"
-        update_speeds(current_speed)
-    elif direction == "backward_right":
-        go(GPIO.HIGH, GPIO.LOW, GPIO.HIGH, GPIO.LOW)
-        outputToDashboard["L_Front"]["direction"] = "Forward"
-        outputToDashboard["L_Rear"]["direction"] = "Forward"
-        outputToDashboard["R_Front"]["direction"] = "Forward"
-        outputToDashboard["R_Rear"]["direction"] = "Forward"
-        update_speeds(current_speed)
-
-def set_motor_states(direction, speed):
-    outputToDashboard["L_Front"]["direction"] = direction
-    outputToDashboard["L_Rear"]["direction"] = direction
-    outputToDashboard["R_Front"]["direction"] = direction
-    outputToDashboard["R_Rear"]["direction"] = direction
-    update_speeds(speed)
-
-def update_speeds(speed):
-    outputToDashboard["L_Front"]["speed"] = speed
-    outputToDashboard["L_Rear"]["speed"] = speed
-    outputToDashboard["R_Front"]["speed"] = speed
-    outputToDashboard["R_Rear"]["speed"] = speed
+# ---- Output Stage (control thread only) ----
+def ramp(actual, rate, target, dt):
+    """
+    Move one side's duty cycle toward its target with bounded acceleration and jerk.
+    Returns the new (duty, rate).
+    """
+    error = target - actual
+    if error == 0 and rate == 0:
+        return actual, rate
 
-def process_command(cmd):
-    setup_gpio()
-    if cmd in ["low", "medium", "high"]:
-        set_speed(cmd)
+    # Fastest rate we can still bring back to zero before reaching the target
+    desired = copysign(min(max_accel, sqrt(2.0 * max_jerk * abs(error))), error)
+    step = max_jerk * dt
+    rate += max(-step, min(step, desired - rate))
+    duty = actual + rate * dt
+
+    if (target - duty) * error <= 0:
+        return target, 0.0
+    return duty, rate
+
+def apply_output(side, duty):
+    """Write one side's signed duty cycle to its direction pins and PWM channel."""
+    previous = applied_duty[side]
+    if previous is not None and abs(previous - duty) < 0.1 and (previous > 0) == (duty > 0):
+        return
+    fwd, rev, pwm = (in1, in2, p) if side == 0 else (in3, in4, q)
+
+    if duty > 0:
+        GPIO.output(fwd, GPIO.HIGH)
+        GPIO.output(rev, GPIO.LOW)
+    elif duty < 0:
+        GPIO.output(fwd, GPIO.LOW)
+        GPIO.output(rev, GPIO.HIGH)
     else:
-        set_direction(cmd)
+        GPIO.output(fwd, GPIO.LOW)
+        GPIO.output(rev, GPIO.LOW)
+    pwm.ChangeDutyCycle(min(abs(duty), 100.0))
+    applied_duty[side] = duty
+
+def release_outputs():
+    """
+    Stop and write 0% duty with the direction pins low, after a control tick failed.
+    Best effort: the pins themselves may be what is failing (e.g. after GPIO.cleanup()).
+    """
+    global target_duty, current_direction
+    with command_lock:
+        current_direction = "stop"
+        target_duty = (0.0, 0.0)
+    with output_lock:
+        actual_duty[:] = [0.0, 0.0]
+        duty_rate[:] = [0.0, 0.0]
+        applied_duty[:] = [None, None]
+        if not initialized:
+            return
+        for pwm in (p, q):
+            try:
+                pwm.ChangeDutyCycle(0)
+            except Exception:
+                pass
+        for pin in (in1, in2, in3, in4):
+            try:
+                GPIO.output(pin, GPIO.LOW)
+            except Exception:
+                pass
+
+def side_state(duty):
+    if duty > 0:
+        return "Forward"
+    if duty < 0:
+        return "Backward"
+    return "Stopped"
+
+def update_dashboard():
+    left, right = round(actual_duty[0], 1), round(actual_duty[1], 1)
+    # Called every control tick; only publish when something visible changed
+    if telemetry.seq and (left, right) == (telemetry.get("left_duty"), telemetry.get("right_duty")):
+        return
+    telemetry.publish(left_duty=left, right_duty=right,
+                      left_direction=side_state(left), right_direction=side_state(right))
+
+def control_step(dt):
+    with output_lock:
+        if time.perf_counter() < braking_until:
+            return
+        target = target_duty
+        for side in (0, 1):
+            actual_duty[side], duty_rate[side] = ramp(actual_duty[side], duty_rate[side], target[side], dt)
+
+        # Sensor read -> PWM write happens back to back within one tick
+        sampled = time.perf_counter()
+        trim = heading_trim(dt)
+        apply_output(0, trimmed(actual_duty[0], trim))
+        apply_output(1, trimmed(actual_duty[1], -trim))
+        if read_yaw_rate is not None:
+            latency = time.perf_counter() - sampled
+            heading_stats["latency_ms"] = round(latency * 1000, 3)
+            heading_stats["latency_max_ms"] = max(heading_stats["latency_max_ms"], heading_stats["latency_ms"])
+
+    update_dashboard()
+
+def control_loop():
+    global control_running
+    try:
+        run_control_loop()
+    finally:
+        # Lets start_control_loop() start it again, whatever ended it (unless it already has)
+        with command_lock:
+            if control_thread is threading.current_thread():
+                control_running = False
+
+def run_control_loop():
+    period = 1.0 / control_rate
+    loop_stats["rate"] = control_rate
+    window_ticks = 0
+    jitter_sum = jitter_max = period_sum = 0.0
+    failing = False
+
+    last = time.perf_counter()
+    next_tick = last + period
+    while control_running:
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+        now = time.perf_counter()
+        dt = now - last
+        last = now
+        try:
+            control_step(dt)
+            failing = False
+        except Exception as e:
+            # This thread is the only one writing the pins: never let a bad tick end it
+            loop_stats["errors"] += 1
+            if not failing:
+                print(f"[Motor] Control step failed, outputs released: {e!r}")
+            failing = True
+            release_outputs()
+
+        jitter = abs(dt - period)
+        jitter_sum += jitter
+        jitter_max = max(jitter_max, jitter)
+        period_sum += dt
+        window_ticks += 1
+        loop_stats["ticks"] += 1
+
+        # Publish jitter once per second of ticks
+        if window_ticks >= control_rate:
+            loop_stats["period_ms"] = round(period_sum / window_ticks * 1000, 3)
+            loop_stats["jitter_avg_ms"] = round(jitter_sum / window_ticks * 1000, 3)
+            loop_stats["jitter_max_ms"] = round(jitter_max * 1000, 3)
+            window_ticks = 0
+            jitter_sum = jitter_max = period_sum = 0.0
+
+        next_tick += period
+        if next_tick < time.perf_counter():
+            # Missed a deadline: count it and restart the schedule instead of bursting
+            loop_stats["overruns"] += 1
+            next_tick = time.perf_counter() + period
+
+def start_control_loop():
+    global control_thread, control_running
+    with command_lock:
+        if control_running:
+            return
+        setup_gpio()
+        setup_heading_hold()
+        setup_safety()
+        control_running = True
+        control_thread = threading.Thread(target=control_loop, daemon=True)
+        control_thread.start()
+    print(f"[Motor] Control loop running at {control_rate} Hz")
+
+def serve_control_loop():
+    """Start the control loop and block until it ends, so a supervisor can restart it."""
+    start_control_loop()
+    thread = control_thread
+    if thread:
+        thread.join()
+
+def stop_control_loop():
+    global control_running
+    control_running = False
+    if control_thread and control_thread is not threading.current_thread():
+        control_thread.join(timeout=1.0)
+
+def apply_command(cmd):
+    start_control_loop()
+    with command_lock:
+        if cmd in ["low", "medium", "high"]:
+            set_speed(cmd)
+        else:
+            set_direction(cmd)
+
+# Stop preempts queued motion, newer motion supersedes older, speed presets go last
+scheduler = CommandScheduler(apply_command, name="Motor")
+command_stats = scheduler.stats
+
+def process_command(cmd):
+    """Queue a command from any producer (GUI, keyboard, network); returns immediately, False if it was rejected."""
+    return scheduler.submit(cmd.strip().lower())
 
 def cleanup():
-    GPIO.cleanup()
+    """Shut the motors down for good: refuse further commands, stop the loop, release the pins."""
+    global p, q, initialized
+    scheduler.stop()
+    stop_control_loop()
+    with output_lock:
+        if initialized:
+            p.stop()
+            q.stop()
+        GPIO.cleanup()
+        p = q = None
+        initialized = False
 
 if __name__ == "__main__":
-    pygame.init()
-    clock = pygame.time.Clock()
-    setup_gpio()
+    start_control_loop()
     print("Motor Controller Ready. Type commands or 'e' to exit.")
     try:
         while True:
@@ -154,8 +534,11 @@ if __name__ == "__main__":
             if cmd == 'e':
                 break
             process_command(cmd)
-            print(outputToDashboard)
-            clock.tick(10)
+            print(telemetry.read())
+            print(loop_stats)
+            print(heading_stats)
+            print(safety_stats)
     finally:
+        if heading_log:
+            save_heading_log()
         cleanup()
-        pygame.quit()
@@ -0,0 +1,39 @@
+import time
+
+
+class Rate:
+    """
+    Fixed-rate loop pacing; replaces pygame.time.Clock().tick(hz), which needed
+    pygame.init() in every sensor thread just to sleep.
+
+        rate = Rate(20)
+        while running:
+            read_sensor()
+            rate.sleep()
+
+    Deadlines advance by exactly one period, so a slow iteration doesn't shift
+    every later one. When a deadline is already missed the schedule restarts
+    from now instead of bursting to catch up (same policy as the motor control
+    loop); those misses are counted in `overruns`.
+    """
+    def __init__(self, hz):
+        self.hz = hz
+        self.period = 1.0 / hz
+        self.next_tick = time.perf_counter() + self.period
+        self.ticks = 0
+        self.overruns = 0
+
+    def sleep(self):
+        now = time.perf_counter()
+        delay = self.next_tick - now
+        self.ticks += 1
+        if delay > 0:
+            time.sleep(delay)
+            self.next_tick += self.period
+        else:
+            self.overruns += 1
+            self.next_tick = now + self.period
+
+    def reset(self):
+        """Start a fresh schedule, e.g. after the loop was paused."""
+        self.next_tick = time.perf_counter() + self.period
@@ -0,0 +1,182 @@
+"""
+Shared scheduler for the periodic controller loops (gyro, ultrasonic, camera).
+
+Each task registers a function, a rate and optionally a priority and deadline;
+a small pool of worker threads runs them. When several tasks are due at once
+the most urgent goes first: lowest `priority` value, then the shortest period
+(rate-monotonic). A task never runs twice at the same time -- releases that come
+due while its previous run is still going are skipped and counted as overruns
+rather than queued up.
+
+    from Controllers.Scheduler import scheduler
+    scheduler.add("ultrasonic", read_distance, rate=20)
+    scheduler.start()
+    scheduler.set_rate("ultrasonic", 40)   # any time, from any thread
+    scheduler.stats["ultrasonic"]          # runs, overruns, jitter, CPU time, ...
+
+The 100 Hz motor control loop keeps its own thread: it is the safety path and
+must not wait behind a slow camera read for a free worker.
+"""
+
+import threading
+import time
+
+
+class PeriodicTask:
+    def __init__(self, name, func, rate, priority=0, deadline=None):
+        self.name = name
+        self.func = func
+        self.priority = priority
+        self.deadline = deadline  # seconds after release; None = one period
+        self.busy = False
+        self.failing = False
+        self.set_rate(rate)
+        self.next_release = time.perf_counter()
+        self.added = self.next_release
+        self.stats = {
+            "rate": rate,
+            "priority": priority,
+            "runs": 0,
+            "overruns": 0,         # releases skipped because the previous run hadn't finished
+            "deadline_misses": 0,  # runs that finished later than release + deadline
+            "errors": 0,
+            "jitter_ms": 0.0,      # start - release, smoothed
+            "jitter_max_ms": 0.0,
+            "exec_ms": 0.0,        # wall time per run, smoothed
+            "exec_max_ms": 0.0,
+            "cpu_ms": 0.0,         # CPU time per run (this thread only), smoothed
+            "cpu_pct": 0.0,        # total CPU time / time since added
+        }
+        self.cpu_total = 0.0
+
+    def set_rate(self, rate):
+        self.rate = rate
+        self.period = 1.0 / rate
+
+    def urgency(self):
+        return self.priority, self.period
+
+    def release(self, now):
+        """Claim the due release for a worker; skip (and count) any that were already missed."""
+        release = self.next_release
+        missed = int((now - release) / self.period)
+        if missed:
+            self.stats["overruns"] += missed
+            release += missed * self.period
+        self.next_release = release + self.period
+        self.busy = True
+        return release
+
+    def record(self, release, started, finished, cpu):
+        stats = self.stats
+        stats["runs"] += 1
+        weight = 1.0 if stats["runs"] == 1 else 0.1
+        jitter = (started - release) * 1000
+        exec_ms = (finished - started) * 1000
+        stats["jitter_ms"] = round((1 - weight) * stats["jitter_ms"] + weight * jitter, 3)
+        stats["jitter_max_ms"] = max(stats["jitter_max_ms"], round(jitter, 3))
+        stats["exec_ms"] = round((1 - weight) * stats["exec_ms"] + weight * exec_ms, 3)
+        stats["exec_max_ms"] = max(stats["exec_max_ms"], round(exec_ms, 3))
+        stats["cpu_ms"] = round((1 - weight) * stats["cpu_ms"] + weight * cpu * 1000, 3)
+        self.cpu_total += cpu
+        stats["cpu_pct"] = round(100 * self.cpu_total / max(finished - self.added, 1e-9), 2)
+        deadline = self.deadline if self.deadline is not None else self.period
+        if finished > release + deadline:
+            stats["deadline_misses"] += 1
+
+
+class Scheduler:
+    def __init__(self, workers=2, name="Scheduler"):
+        self.workers = workers
+        self.name = name
+        self.tasks = {}
+        self.stats = {}  # task name -> that task's stats dict
+        self.condition = threading.Condition()
+        self.running = False
+        self.threads = []
+
+    def add(self, name, func, rate, priority=0, deadline=None):
+        """Run func() every 1/rate s; replaces a task of the same name."""
+        task = PeriodicTask(name, func, rate, priority, deadline)
+        with self.condition:
+            self.tasks[name] = task
+            self.stats[name] = task.stats
+            self.condition.notify_all()
+        return task
+
+    def remove(self, name):
+        """Stop releasing a task; a run already in progress finishes."""
+        with self.condition:
+            self.tasks.pop(name, None)
+            self.stats.pop(name, None)
+            self.condition.notify_all()
+
+    def set_rate(self, name, rate):
+        with self.condition:
+            task = self.tasks[name]
+            task.set_rate(rate)
+            task.stats["rate"] = rate
+            # A slower rate takes effect after the pending release, a faster one right away
+            task.next_release = min(task.next_release, time.perf_counter() + task.period)
+            self.condition.notify_all()
+
+    def start(self):
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+        self.threads = [threading.Thread(target=self.worker, name=f"{self.name}-{i}", daemon=True)
+                        for i in range(self.workers)]
+        for thread in self.threads:
+            thread.start()
+        print(f"[{self.name}] Running {len(self.tasks)} tasks on {self.workers} workers")
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        for thread in self.threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=1.0)
+        self.threads = []
+
+    def next_job(self):
+        """Block until a task is due and claim the most urgent; None once stopped."""
+        with self.condition:
+            while self.running:
+                now = time.perf_counter()
+                idle = [task for task in self.tasks.values() if not task.busy]
+                due = [task for task in idle if task.next_release <= now]
+                if due:
+                    task = min(due, key=PeriodicTask.urgency)
+                    return task, task.release(now)
+                wait = min(task.next_release for task in idle) - now if idle else None
+                self.condition.wait(wait)
+        return None
+
+    def worker(self):
+        while True:
+            job = self.next_job()
+            if job is None:
+                return
+            task, release = job
+            started = time.perf_counter()
+            cpu_started = time.thread_time()
+            try:
+                task.func()
+                task.failing = False
+            except Exception as e:
+                task.stats["errors"] += 1
+                if not task.failing:
+                    print(f"[{self.name}] {task.name} failed: {e!r}")
+                task.failing = True
+            finished = time.perf_counter()
+            with self.condition:
+                task.record(release, started, finished, time.thread_time() - cpu_started)
+                task.busy = False
+                self.condition.notify_all()
+
+
+# Shared by every controller in this process
+scheduler = Scheduler()
+task_stats = scheduler.stats
@@ -0,0 +1,316 @@
+"""
+Lifecycle of the sensor services (gyro, ultrasonic, camera).
+
+Each controller registers its service here at import: how to open the device
+(setup), one read (step, run periodically on Controllers.Scheduler) and how to
+release it (teardown). The supervisor owns every transition:
+
+    stopped -> starting -> running <-> degraded -> failed -> (backoff) -> starting
+                                  \\-> stopping -> stopped
+
+- start() is idempotent: a service that is already starting, running or
+  waiting to restart is left alone, so a second "Start Camera" can't open a
+  second VideoCapture.
+- stop() is cooperative: the task is taken off the scheduler, a read already in
+  progress is allowed to finish, and only then is the device released.
+- A service whose reads fail `max_failures` times in a row is torn down and
+  restarted after a backoff that doubles up to MAX_BACKOFF (reset once it has
+  run cleanly for BACKOFF_RESET seconds). Reads that stop arriving mark it
+  degraded.
+
+Per service, `stats` tracks the state, restarts and errors. It also tracks the
+CPU used by its reads, from the scheduler; the threads its setup started (e.g.
+gpiozero's sensor thread); and the resident memory added while setting it up.
+Threads and RSS are only visible process-wide, so setups run one at a time:
+two services started together can't be charged for each other's threads.
+
+    from Controllers.Services import services
+    services.start("camera")
+    services.stats["camera"]["state"]
+"""
+
+import os
+import threading
+import time
+
+from Controllers.Pacing import Rate
+from Controllers.Scheduler import scheduler as shared_scheduler
+
+STOPPED = "stopped"
+STARTING = "starting"
+RUNNING = "running"
+DEGRADED = "degraded"
+FAILED = "failed"
+STOPPING = "stopping"
+
+INITIAL_BACKOFF = 1.0   # seconds before the first restart
+MAX_BACKOFF = 30.0
+BACKOFF_RESET = 30.0    # seconds of clean running before the backoff starts over
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return None
+
+
+class SensorService:
+    def __init__(self, name, setup, step, rate, teardown=None, priority=0):
+        """`setup` may return False for failure; so may `step` (e.g. no frame was read)."""
+        self.name = name
+        self.setup = setup
+        self.step = step
+        self.rate = rate
+        self.teardown = teardown
+        self.priority = priority
+
+        self.wanted = False
+        self.cancelled = threading.Event()
+        self.task = None
+        self.consecutive_failures = 0
+        self.last_ok = 0.0
+        self.running_since = 0.0
+        self.backoff = INITIAL_BACKOFF
+        self.retry_at = None
+        self.own_threads = []
+        self.stats = {
+            "state": STOPPED,
+            "restarts": 0,
+            "errors": 0,
+            "samples": 0,
+            "last_error": "",
+            "cpu_pct": 0.0,   # of one core, for its scheduled reads
+            "cpu_ms": 0.0,    # per read, smoothed
+            "rss_mb": 0.0,    # resident memory added by setup (device buffers, lazy imports)
+            "threads": 0,     # threads its setup started that are still alive
+        }
+
+    def step_once(self):
+        """Scheduled entry point: one read, unless a stop is under way."""
+        if self.cancelled.is_set():
+            return
+        try:
+            result = self.step()
+        except Exception as e:
+            self.record_error(e)
+            raise  # the scheduler counts it too
+        if result is False:
+            self.record_error("no data")
+            return
+        self.consecutive_failures = 0
+        self.last_ok = time.perf_counter()
+        self.stats["samples"] += 1
+
+    def record_error(self, error):
+        self.consecutive_failures += 1
+        self.stats["errors"] += 1
+        self.stats["last_error"] = str(error)[:80]
+
+    def release(self):
+        if self.teardown:
+            try:
+                self.teardown()
+            except Exception as e:
+                print(f"[Services] {self.name} teardown failed: {e!r}")
+
+
+class ServiceSupervisor:
+    def __init__(self, scheduler=shared_scheduler, check_hz=2, max_failures=5, stale_periods=5):
+        self.scheduler = scheduler
+        self.check_hz = check_hz
+        self.max_failures = max_failures
+        self.stale_periods = stale_periods
+        self.services = {}
+        self.stats = {}  # service name -> that service's stats dict
+        self.lock = threading.RLock()
+        self.setup_lock = threading.Lock()  # one setup (and its accounting window) at a time
+        self.own_threads = set()  # launcher and monitor threads, never charged to a service
+        self.monitoring = False
+
+    def add(self, name, setup, step, rate, teardown=None, priority=0):
+        service = SensorService(name, setup, step, rate, teardown, priority)
+        with self.lock:
+            self.services[name] = service
+            self.stats[name] = service.stats
+        return service
+
+    def state(self, name):
+        return self.services[name].stats["state"]
+
+    def set_state(self, service, state):
+        if service.stats["state"] != state:
+            print(f"[Services] {service.name}: {service.stats['state']} -> {state}")
+            service.stats["state"] = state
+
+    # ---- Lifecycle ----
+    def start(self, name):
+        """Start a service in the background; False if it is already up (or on its way)."""
+        service = self.services[name]
+        with self.lock:
+            service.wanted = True
+            if service.stats["state"] != STOPPED:
+                return False
+            self.set_state(service, STARTING)
+        self.start_monitor()
+        self.spawn(self.launch, f"{name}-start", service)
+        return True
+
+    def spawn(self, target, name, *args):
+        thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+        with self.lock:
+            self.own_threads.add(thread)
+        thread.start()
+
+    def launch(self, service):
+        try:
+            with self.setup_lock:
+                self.set_up(service)
+        finally:
+            with self.lock:
+                self.own_threads.discard(threading.current_thread())
+
+    def set_up(self, service):
+        """Open the device (may block, e.g. camera) and put its read on the scheduler."""
+        with self.lock:
+            if not service.wanted:
+                # stop() came in while it waited for another service's setup
+                self.set_state(service, STOPPED)
+                return
+        before = set(threading.enumerate())
+        rss_before = rss_mb()
+        try:
+            if service.setup() is False:
+                raise RuntimeError("setup failed")
+        except Exception as e:
+            with self.lock:
+                service.record_error(e)
+                print(f"[Services] {service.name} failed to start: {e!r}")
+                if service.wanted:
+                    self.back_off(service)
+                else:
+                    self.set_state(service, STOPPED)
+            return
+
+        with self.lock:
+            if not service.wanted:
+                # stop() came in while the device was opening
+                service.release()
+                self.set_state(service, STOPPED)
+                return
+            service.own_threads = [t for t in threading.enumerate() if t not in before and t not in self.own_threads]
+            rss_after = rss_mb()
+            if rss_before is not None and rss_after is not None:
+                service.stats["rss_mb"] = round(max(0.0, rss_after - rss_before), 1)
+            now = time.perf_counter()
+            service.consecutive_failures = 0
+            service.last_ok = service.running_since = now
+            service.cancelled.clear()
+            service.task = self.scheduler.add(service.name, service.step_once, service.rate, service.priority)
+            self.set_state(service, RUNNING)
+        self.scheduler.start()
+
+    def halt(self, service):
+        """Take the service off the scheduler and wait for a read in progress to finish."""
+        service.cancelled.set()
+        task, service.task = service.task, None
+        if task is None:
+            return
+        self.scheduler.remove(service.name)
+        deadline = time.perf_counter() + 2.0
+        while task.busy and time.perf_counter() < deadline:
+            time.sleep(0.005)
+
+    def stop(self, name):
+        """Stop a service and release its device; returns once it is released."""
+        service = self.services[name]
+        with self.lock:
+            service.wanted = False
+            state = service.stats["state"]
+            if state in (STOPPED, STOPPING, STARTING):
+                # STARTING: launch() sees `wanted` is off and releases the device itself
+                return
+            service.retry_at = None
+            self.set_state(service, STOPPING)
+            running = state != FAILED  # a failed service was already released
+        if running:
+            self.halt(service)
+            service.release()
+        with self.lock:
+            self.set_state(service, STOPPED)
+
+    def shutdown(self):
+        """Stop every service, then the scheduler and the health monitor."""
+        for name in list(self.services):
+            self.stop(name)
+        self.monitoring = False
+        self.scheduler.stop()
+
+    def back_off(self, service):
+        service.retry_at = time.perf_counter() + service.backoff
+        print(f"[Services] {service.name} restarting in {service.backoff:.1f} s")
+        service.backoff = min(service.backoff * 2, MAX_BACKOFF)
+        self.set_state(service, FAILED)
+
+    # ---- Health ----
+    def start_monitor(self):
+        with self.lock:
+            if self.monitoring:
+                return
+            self.monitoring = True
+        self.spawn(self.monitor, "Services")
+
+    def monitor(self):
+        rate = Rate(self.check_hz)
+        while self.monitoring:
+            for service in list(self.services.values()):
+                self.check(service)
+            rate.sleep()
+
+    def check(self, service):
+        now = time.perf_counter()
+        with self.lock:
+            state = service.stats["state"]
+            if state in (RUNNING, DEGRADED):
+                if service.consecutive_failures >= self.max_failures:
+                    print(f"[Services] {service.name} failed {service.consecutive_failures} reads in a row")
+                    self.set_state(service, STOPPING)
+                    failing = True
+                else:
+                    failing = False
+                    stale = now - service.last_ok > self.stale_periods / service.rate + 1.0
+                    self.set_state(service, DEGRADED if stale or service.consecutive_failures else RUNNING)
+                    if now - service.running_since > BACKOFF_RESET and state == RUNNING:
+                        service.backoff = INITIAL_BACKOFF
+            elif state == FAILED and service.wanted and now >= service.retry_at:
+                service.stats["restarts"] += 1
+                self.set_state(service, STARTING)
+                self.spawn(self.launch, f"{service.name}-start", service)
+                failing = False
+            else:
+                failing = False
+        if failing:
+            self.halt(service)
+            service.release()
+            with self.lock:
+                if service.wanted:
+                    self.back_off(service)
+                else:
+                    self.set_state(service, STOPPED)
+        self.account(service)
+
+    def account(self, service):
+        stats = service.stats
+        task = service.task
+        if task is not None:
+            stats["cpu_pct"] = task.stats["cpu_pct"]
+            stats["cpu_ms"] = task.stats["cpu_ms"]
+        elif stats["state"] in (STOPPED, FAILED):
+            stats["cpu_pct"] = stats["cpu_ms"] = 0.0
+        stats["threads"] = sum(1 for t in service.own_threads if t.is_alive())
+
+
+# Shared by every controller in this process
+services = ServiceSupervisor()
+service_stats = services.stats
@@ -1,14 +1,14 @@
 import RPi.GPIO as GPIO
 import time
 
+from Controllers.TelemetryBus import bus as telemetry_bus
+
 # ---- Configuration ----
 servo_pin = 18  # GPIO18 supports hardware PWM
 frequency = 50  # 50Hz is standard for servo motors
 
-# ---- Dashboard Output ----
-outputToDashboard = {
-    "servo_angle": 0
-}
+# ---- Dashboard Output (ServoRecord on the telemetry bus) ----
+telemetry = telemetry_bus.topic("servo")
 
 # ---- Initialization ----
 initialized = False
@@ -34,7 +34,7 @@ def set_angle(angle):
     if angle > 180: angle = 180
     duty = 2.5 + (angle / 180.0) * 10  # Convert angle to duty cycle
     pwm.ChangeDutyCycle(duty)
-    outputToDashboard["servo_angle"] = angle
+    telemetry.publish(angle=angle)
     time.sleep(0.3)
     pwm.ChangeDutyCycle(0)  # Prevent jitter
 
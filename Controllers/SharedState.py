@@ -0,0 +1,198 @@
+"""
+Telemetry shared between processes (the process-isolated mode in Processes.py).
+
+One shared-memory region with a fixed layout: a header, then one slot per
+telemetry topic (in RECORD_TYPES order, packed with each record's FORMAT) and
+one slot for the downscaled camera preview frame. Every slot is a seqlock:
+
+    [begin seq: u64][payload][end seq: u64]
+
+Each slot has exactly one writing process. The writer makes `begin` odd, writes
+the payload, then sets `end` and `begin` to the next even value. A reader copies
+the payload between two reads of `begin` and keeps it only if both reads and
+`end` are equal and even; otherwise it copies again, up to READ_RETRIES times,
+and then reports nothing new. A writer killed mid-write leaves `begin` odd until
+its process restarts, and that must not hang the readers (the Tk thread among
+them). Readers take no lock and never slow the writer down. The trailing
+counter guards against the payload and the counters landing out of order.
+
+In each process the region is glued onto the ordinary telemetry bus:
+export() copies local publishes into the region, and mirror() polls the
+region and republishes changes locally. So the dashboards, the telemetry
+stream and the motor safety stop keep using Controllers.TelemetryBus
+unchanged.
+"""
+
+import re
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+
+from Controllers.Pacing import Rate
+from Controllers.TelemetryBus import RECORD_TYPES, bus as telemetry_bus
+
+MAGIC = 0x43415231  # "CAR1"
+HEADER = struct.Struct("<II")   # magic, total size
+SEQ = struct.Struct("<Q")
+PREVIEW_SIZE = (160, 120)       # camera preview slot, BGR
+READ_RETRIES = 100              # torn or in-progress copies before a read gives up (stale)
+
+
+def converters(fmt):
+    """One function per field of a struct format, coercing a record value to what struct expects."""
+    result = []
+    for count, code in re.findall(r"(\d*)([a-zA-Z?])", fmt):
+        if code == "s":
+            result.append(lambda value: str(value).encode())  # struct pads/truncates to the width
+        else:
+            convert = float if code in "efd" else int
+            result.extend([convert] * int(count or 1))
+    return result
+
+
+def attach(name):
+    """
+    Open an existing region. Before Python 3.13 attaching also registers it with
+    the resource tracker; the processes started by Processes.py share their
+    parent's tracker, so that is harmless and only the creator unlinks it.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class Slot:
+    def __init__(self, buf, offset, size):
+        self.buf = buf
+        self.begin = offset
+        self.payload = offset + SEQ.size
+        self.end = self.payload + size
+        self.size = size
+        # Writer side: carry on from what is in the region, so a restarted writer's
+        # sequence keeps increasing (and an odd one left by a killed writer is closed off)
+        seq, = SEQ.unpack_from(buf, self.begin)
+        self.seq = seq + (seq & 1)
+
+    def write(self, pack):
+        """pack(buf, offset) fills the payload."""
+        seq = self.seq
+        SEQ.pack_into(self.buf, self.begin, seq + 1)
+        pack(self.buf, self.payload)
+        SEQ.pack_into(self.buf, self.end, seq + 2)
+        SEQ.pack_into(self.buf, self.begin, seq + 2)
+        self.seq = seq + 2
+
+    def read(self, unpack, last_seq=None):
+        """(seq, value) once consistent; None if nothing new since last_seq, or no consistent copy in time."""
+        for _ in range(READ_RETRIES):
+            start, = SEQ.unpack_from(self.buf, self.begin)
+            if start == last_seq or start == 0:
+                return None
+            if start & 1:
+                time.sleep(0)
+                continue
+            value = unpack(self.buf, self.payload)
+            end, = SEQ.unpack_from(self.buf, self.end)
+            again, = SEQ.unpack_from(self.buf, self.begin)
+            if start == end == again:
+                return start, value
+        return None
+
+
+class SharedState:
+    def __init__(self, name=None, create=False, record_types=RECORD_TYPES, preview_size=PREVIEW_SIZE):
+        self.record_types = record_types
+        self.formats = {topic: struct.Struct("<" + record.FORMAT) for topic, record in record_types.items()}
+        self.converters = {topic: converters(record.FORMAT) for topic, record in record_types.items()}
+        width, height = preview_size
+        self.preview_size = preview_size
+        self.frame_bytes = width * height * 3
+
+        # Fixed layout: header, topic slots, preview slot; 8-byte aligned
+        offset = HEADER.size
+        layout = {}
+        for topic, fmt in self.formats.items():
+            layout[topic] = (offset, fmt.size)
+            offset += (2 * SEQ.size + fmt.size + 7) // 8 * 8
+        layout["frame"] = (offset, self.frame_bytes)
+        size = offset + 2 * SEQ.size + self.frame_bytes
+
+        if create:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self.shm.buf[:size] = bytes(size)
+            HEADER.pack_into(self.shm.buf, 0, MAGIC, size)
+        else:
+            self.shm = attach(name)
+            magic, stored = HEADER.unpack_from(self.shm.buf, 0)
+            if magic != MAGIC or stored != size:
+                raise ValueError(f"shared state {name!r} has a different layout")
+        self.name = self.shm.name
+        self.owner = create
+        buf = self.shm.buf
+        self.slots = {topic: Slot(buf, start, length) for topic, (start, length) in layout.items()}
+        self.running = False
+
+    # ---- Records ----
+    def write(self, topic, record):
+        """Copy a record into its slot. Only the one process that owns `topic` may call this."""
+        fmt = self.formats[topic]
+        values = [convert(value) for convert, value in zip(self.converters[topic], self.fields(record))]
+        self.slots[topic].write(lambda buf, offset: fmt.pack_into(buf, offset, *values))
+
+    @staticmethod
+    def fields(record):
+        return [getattr(record, name) for name in record.__slots__]
+
+    def read(self, topic, last_seq=None):
+        """(seq, record) for the latest consistent copy; None if unchanged since last_seq."""
+        fmt = self.formats[topic]
+        result = self.slots[topic].read(fmt.unpack_from, last_seq)
+        if result is None:
+            return None
+        seq, raw = result
+        values = [v.rstrip(b"\0").decode(errors="replace") if isinstance(v, bytes) else v for v in raw]
+        return seq, self.record_types[topic](*values)
+
+    # ---- Preview frame ----
+    def write_frame(self, pixels):
+        """pixels: preview-sized BGR bytes (or anything exposing the buffer protocol)."""
+        data = memoryview(pixels).cast("B")
+
+        def pack(buf, offset):
+            buf[offset:offset + self.frame_bytes] = data
+
+        self.slots["frame"].write(pack)
+
+    def read_frame(self, last_seq=None):
+        """(seq, bytes) of the latest preview frame, or None if unchanged."""
+        return self.slots["frame"].read(lambda buf, offset: bytes(buf[offset:offset + self.frame_bytes]), last_seq)
+
+    # ---- Bridging to the local telemetry bus ----
+    def export(self, topics):
+        """Copy every local publish on these topics into the region (this process owns them)."""
+        for topic in topics:
+            telemetry_bus.topic(topic).subscribe(lambda record, topic=topic: self.write(topic, record))
+
+    def mirror(self, topics, rate=50):
+        """Poll these topics (owned by other processes) and republish changes on the local bus."""
+        self.running = True
+        threading.Thread(target=self.mirror_loop, args=(list(topics), rate), name="SharedState", daemon=True).start()
+
+    def mirror_loop(self, topics, rate):
+        seen = dict.fromkeys(topics)
+        pacing = Rate(rate)
+        while self.running:
+            for topic in topics:
+                result = self.read(topic, seen[topic])
+                if result is not None:
+                    seen[topic], record = result
+                    telemetry_bus.topic(topic).publish(**dict(zip(record.__slots__, self.fields(record))))
+            pacing.sleep()
+
+    def close(self):
+        self.running = False
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
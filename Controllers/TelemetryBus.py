@@ -0,0 +1,172 @@
+"""
+Thread-safe telemetry bus shared by the controllers, the GUIs and Networking.Telemetry.
+
+Each sensor owns a Topic holding one typed record (fixed fields via __slots__).
+The sensor thread publishes into it; any other thread reads a consistent copy.
+Writes are guarded by a seqlock: the topic's counter is odd while a write is in
+progress, and a reader that saw it change (or odd) simply reads again, so
+readers never block the sensor and never see half an update.
+
+    from Controllers.TelemetryBus import bus
+    gyro = bus.topic("gyro")
+    gyro.publish(gyro_z=-0.4)          # sensor thread
+    record = gyro.read()               # any thread: GyroRecord copy
+    gyro.subscribe(callback)           # callback(record) after every publish
+"""
+
+import threading
+import time
+from operator import attrgetter
+
+
+class Record:
+    """
+    Base for telemetry records. Subclasses list their fields in __slots__, defaults
+    in DEFAULTS, and fields only meant for subscribers (not dashboards) in PRIVATE.
+    FORMAT is the struct layout of the fields, in __slots__ order, used when the
+    record is shared between processes (Controllers.SharedState); strings are
+    fixed-width and truncated.
+    """
+    __slots__ = ()
+    DEFAULTS = ()
+    PRIVATE = ()
+    FORMAT = ""
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values or self.DEFAULTS):
+            setattr(self, name, value)
+
+    def as_dict(self):
+        """Dashboard fields by name."""
+        return {name: getattr(self, name) for name in self.__slots__ if name not in self.PRIVATE}
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class GyroRecord(Record):
+    __slots__ = ("gyro_x", "gyro_y", "gyro_z", "accel_x", "accel_y", "accel_z")  # deg/s, g
+    DEFAULTS = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+    FORMAT = "6d"
+
+
+class UltrasonicRecord(Record):
+    __slots__ = ("distance", "proximity", "read_time")  # m, label, perf_counter() of the reading
+    DEFAULTS = (0.0, "Unknown", 0.0)
+    FORMAT = "d16sd"
+    PRIVATE = ("read_time",)
+
+
+class MotorRecord(Record):
+    __slots__ = ("left_duty", "right_duty", "left_direction", "right_direction")  # signed %
+    DEFAULTS = (0.0, 0.0, "Stopped", "Stopped")
+    FORMAT = "dd16s16s"
+
+
+class ServoRecord(Record):
+    __slots__ = ("angle",)
+    DEFAULTS = (0,)
+    FORMAT = "i"
+
+
+class CameraRecord(Record):
+    __slots__ = ("status", "frame_count", "resolution", "fps")
+    DEFAULTS = ("Disconnected", 0, "N/A", 0)
+    FORMAT = "24sq16sd"
+
+
+# Topic name -> record type for the car's sensors
+RECORD_TYPES = {
+    "gyro": GyroRecord,
+    "ultrasonic": UltrasonicRecord,
+    "motor": MotorRecord,
+    "servo": ServoRecord,
+    "camera": CameraRecord,
+}
+
+
+class Topic:
+    def __init__(self, name, record_type):
+        self.name = name
+        self.record_type = record_type
+        self.record = record_type()
+        self.fields = attrgetter(*record_type.__slots__)
+        self.counter = 0  # seqlock: odd while a write is in progress
+        self.write_lock = threading.Lock()  # only serializes writers; readers never take it
+        self.subscribers = []
+
+    @property
+    def seq(self):
+        """Number of publishes so far (0: nothing published yet)."""
+        return self.counter >> 1
+
+    def publish(self, **values):
+        """Update some or all fields as one atomic change, then notify subscribers."""
+        record = self.record
+        with self.write_lock:
+            self.counter += 1
+            for name, value in values.items():
+                setattr(record, name, value)
+            self.counter += 1
+        if self.subscribers:
+            snapshot = self.read()
+            for callback in self.subscribers:
+                try:
+                    callback(snapshot)
+                except Exception as e:
+                    print(f"[TelemetryBus] {self.name} subscriber error:", e)
+
+    def values(self):
+        """Consistent tuple of every field, in __slots__ order."""
+        while True:
+            start = self.counter
+            if start & 1:
+                time.sleep(0)  # writer is mid-update; let it finish
+                continue
+            values = self.fields(self.record)
+            if self.counter == start:
+                return values if isinstance(values, tuple) else (values,)
+
+    def read(self):
+        """Consistent copy of the record."""
+        return self.record_type(*self.values())
+
+    def get(self, name):
+        """One field (a single attribute read is already atomic), or None before the first publish."""
+        return getattr(self.record, name) if self.counter else None
+
+    def poll(self, last_seq):
+        """(seq, record) if something was published after last_seq, else None."""
+        seq = self.seq
+        if seq == last_seq:
+            return None
+        while True:
+            start = self.counter
+            record = self.read()
+            if self.counter == start:
+                return start >> 1, record
+
+    def subscribe(self, callback):
+        """callback(record) runs on the publishing thread after every publish; keep it short."""
+        if callback not in self.subscribers:
+            self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+
+class TelemetryBus:
+    def __init__(self, record_types=RECORD_TYPES):
+        self.topics = {name: Topic(name, record_type) for name, record_type in record_types.items()}
+
+    def topic(self, name):
+        return self.topics[name]
+
+    def snapshot(self):
+        """{topic: record} for every topic that has published at least once."""
+        return {name: topic.read() for name, topic in self.topics.items() if topic.seq}
+
+
+bus = TelemetryBus()
@@ -1,16 +1,20 @@
-import pygame
+import time
 from gpiozero import DistanceSensor
 
+from Controllers.Pacing import Rate
+from Controllers.Services import services
+from Controllers.TelemetryBus import bus as telemetry_bus
+
 # ---- Configuration ----
 echo_pin = 24
 trigger_pin = 23
 threshold = 0.5  # meters
+read_rate = 20   # Hz
+queue_len = 5    # gpiozero median-filters this many echoes into each reading
 
-# ---- Dashboard Output ----
-outputToDashboard = {
-    "distance": 0.0,
-    "proximity": "Unknown"
-}
+# ---- Dashboard Output (UltrasonicRecord on the telemetry bus) ----
+# Subscribers (e.g. the motor safety stop) get every reading straight from the sensor thread
+telemetry = telemetry_bus.topic("ultrasonic")
 
 # ---- Sensor Init (singleton-style reuse) ----
 ultrasonic = None
@@ -18,35 +22,43 @@ ultrasonic = None
 def setup_sensor():
     global ultrasonic
     if ultrasonic is None:
-        ultrasonic = DistanceSensor(echo=echo_pin, trigger=trigger_pin, threshold_distance=threshold)
+        ultrasonic = DistanceSensor(echo=echo_pin, trigger=trigger_pin, threshold_distance=threshold,
+                                    queue_len=queue_len)
+
+def close_sensor():
+    global ultrasonic
+    if ultrasonic is not None:
+        ultrasonic.close()  # also ends gpiozero's echo thread
+        ultrasonic = None
 
 def read_distance():
     setup_sensor()
     distance = ultrasonic.distance
+    read_time = time.perf_counter()
     proximity = "In range" if distance <= ultrasonic.threshold_distance else "Out of range"
-
-    outputToDashboard["distance"] = distance
-    outputToDashboard["proximity"] = proximity
-
+    telemetry.publish(distance=distance, proximity=proximity, read_time=read_time)
     return distance, proximity
 
+running = False
+
 def run():
-    pygame.init()
-    clock = pygame.time.Clock()
+    global running
     setup_sensor()
 
+    rate = Rate(read_rate)
     running = True
     while running:
-        read_distance()
-        print(f"Distance: {outputToDashboard['distance']:.2f} m  |  Proximity: {outputToDashboard['proximity']}")
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
+        distance, proximity = read_distance()
+        print(f"Distance: {distance:.2f} m  |  Proximity: {proximity}")
+        rate.sleep()
 
-        clock.tick(10)
+def stop():
+    global running
+    running = False
 
-    pygame.quit()
+# ---- Supervised Service (Controllers.Services) ----
+service = services.add("ultrasonic", setup=setup_sensor, step=read_distance, rate=read_rate,
+                       teardown=close_sensor)
 
 if __name__ == "__main__":
     run()
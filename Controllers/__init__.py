@@ -3,6 +3,12 @@ Controllers Package for Self-Driving RC Car
 
 Contains hardware control logic for:
 - MotorController: GPIO motor output
+- CommandScheduler: priority lanes (stop > motion > config) for motor commands
+- TelemetryBus: typed, seqlock-protected sensor records with publish/subscribe
+- Pacing: fixed-rate loop timing for the sensor loops (no pygame needed)
+- Scheduler: worker pool running the periodic sensor reads by rate and priority
+- Services: start/stop, restart-with-backoff and health of the sensor services
+- SharedState: shared-memory telemetry (fixed layout, lock-free reads) for the multi-process mode
 - GyroAccelerometerController: MPU6050 data
 - UltrasonicController: distance sensing
 """
@@ -0,0 +1,119 @@
+import ctypes
+import time
+import tkinter as tk
+
+import _tkinter
+
+# Hand the preview pixels to Tk in place (see photo_writer); False always sends PPM data instead
+DIRECT_PHOTO_WRITES = True
+
+TK_PHOTO_COMPOSITE_SET = 1
+
+
+class PhotoBlock(ctypes.Structure):
+    """Tk_PhotoImageBlock (tk.h): where Tk_PhotoPutBlock reads the pixels from."""
+    _fields_ = [("pixels", ctypes.c_void_p), ("width", ctypes.c_int), ("height", ctypes.c_int),
+                ("pitch", ctypes.c_int), ("pixel_size", ctypes.c_int), ("offset", ctypes.c_int * 4)]
+
+
+def photo_writer(photo, pixels):
+    """
+    A function that copies `pixels` (a C-contiguous height x width x 3 RGB uint8 array,
+    kept alive by the caller) into `photo` with Tk_PhotoPutBlock, as Pillow's ImageTk
+    does. None where the Tk library can't be reached through _tkinter (e.g. Windows).
+    """
+    try:
+        tk_lib = ctypes.CDLL(_tkinter.__file__)
+        find_photo = tk_lib.Tk_FindPhoto
+        put_block = tk_lib.Tk_PhotoPutBlock
+    except (OSError, AttributeError):
+        return None
+    find_photo.restype = ctypes.c_void_p
+    find_photo.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+    put_block.restype = ctypes.c_int
+    put_block.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.POINTER(PhotoBlock)] + [ctypes.c_int] * 5
+
+    interp = photo.tk.interpaddr()
+    handle = find_photo(interp, str(photo).encode())
+    if not handle:
+        return None
+    height, width, _ = pixels.shape
+    block = PhotoBlock(pixels.ctypes.data, width, height, width * 3, 3, (0, 1, 2, 0))
+
+    def write():
+        put_block(interp, handle, ctypes.byref(block), 0, 0, width, height, TK_PHOTO_COMPOSITE_SET)
+    return write
+
+
+class CameraPreview:
+    """
+    Downscaled live view of the camera in a Tk label.
+
+    The capture loop only publishes a reference to its newest frame
+    (CameraController.latest_frame); this widget polls it at its own rate on the
+    Tk main thread, so frames that arrive faster than that are simply never
+    drawn -- nothing queues and the capture thread never waits on the GUI.
+    The downscaled pixels, the RGB buffer and the PhotoImage are allocated once
+    and reused for every frame; Tk reads the RGB buffer in place (photo_writer),
+    or as PPM data where that isn't available.
+    """
+    def __init__(self, parent, root, source, width=160, height=120, refresh_hz=10, bg="#000000", fg="#888888"):
+        """`source` returns (frame number, BGR numpy frame or None)."""
+        self.root = root
+        self.source = source
+        self.width = width
+        self.height = height
+        self.refresh_ms = int(1000 / refresh_hz)
+        self.last_seq = 0
+
+        self.photo = tk.PhotoImage(width=width, height=height)
+        self.label = tk.Label(parent, image=self.photo, bg=bg, fg=fg, text="No video", compound="center",
+                              width=width, height=height)
+
+        # Allocated on the first frame (needs numpy/cv2, which only exist where the camera does)
+        self.small = None
+        self.pixels = None
+        self.write_photo = None
+        self.ppm = None
+
+        self.stats = {"shown": 0, "skipped": 0, "draw_ms": 0.0}
+
+    def pack(self, **options):
+        self.label.pack(**options)
+
+    def allocate(self):
+        import numpy as np
+        self.small = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        self.pixels = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        self.write_photo = photo_writer(self.photo, self.pixels) if DIRECT_PHOTO_WRITES else None
+        if self.write_photo is None:
+            header = f"P6 {self.width} {self.height} 255\n".encode()
+            self.ppm = bytearray(header) + bytearray(self.width * self.height * 3)
+            # RGB pixels are written straight into the PPM buffer after its header
+            self.pixels = np.frombuffer(self.ppm, dtype=np.uint8, offset=len(header)).reshape(self.height, self.width, 3)
+
+    def refresh(self):
+        seq, frame = self.source()
+        if frame is not None and seq != self.last_seq:
+            started = time.perf_counter()
+            self.draw(frame)
+            if self.last_seq:
+                self.stats["skipped"] += max(0, seq - self.last_seq - 1)
+            self.last_seq = seq
+            self.stats["shown"] += 1
+            ms = (time.perf_counter() - started) * 1000
+            self.stats["draw_ms"] = round(0.9 * self.stats["draw_ms"] + 0.1 * ms, 3) if self.stats["draw_ms"] else round(ms, 3)
+        self.root.after(self.refresh_ms, self.refresh)
+
+    def draw(self, frame):
+        import cv2
+        if self.pixels is None:
+            self.allocate()
+            self.label.config(text="")
+        cv2.resize(frame, (self.width, self.height), dst=self.small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self.small, cv2.COLOR_BGR2RGB, dst=self.pixels)
+        # Tk copies the pixels into the existing image; no new PhotoImage per frame
+        if self.write_photo:
+            self.write_photo()
+        else:
+            self.photo.configure(data=bytes(self.ppm), format="PPM")
@@ -0,0 +1,105 @@
+import time
+import tkinter as tk
+
+from Networking.Telemetry import collect
+
+
+class SensorState:
+    """
+    Flat sensor values with a version per field.
+
+    update() takes a snapshot (see Networking.Telemetry.collect), bumps the global
+    version once and stamps every field that changed with it, so a reader only
+    needs to remember the last version it drew.
+    """
+    def __init__(self):
+        self.values = {}
+        self.versions = {}
+        self.version = 0
+
+    def update(self, snapshot):
+        changed = [k for k, v in snapshot.items() if k not in self.values or self.values[k] != v]
+        if changed:
+            self.version += 1
+            for key in changed:
+                self.values[key] = snapshot[key]
+                self.versions[key] = self.version
+        return changed
+
+    def changed_since(self, version):
+        return [k for k, v in self.versions.items() if v > version]
+
+
+class DashboardView:
+    """
+    One fixed label per field, laid out in titled sections.
+
+    `sections` is a list of columns, each a list of (title, [(key, name, format), ...]).
+    refresh() samples the controllers and reconfigures only the labels whose text
+    changed; it reschedules itself at `refresh_hz` and times its own work on the
+    Tk main thread (shown in the footer, kept in `stats`).
+    """
+    def __init__(self, parent, root, sections, refresh_hz=5, font=("Helvetica", 9), fg="#ffffff", bg="#1e1e1e",
+                 sample=collect):
+        self.root = root
+        self.refresh_ms = int(1000 / refresh_hz)
+        self.sample = sample
+        self.state = SensorState()
+        self.drawn_version = 0
+        self.labels = {}   # key -> (value label, format)
+        self.texts = {}    # key -> text currently shown
+
+        self.stats = {"refresh_ms": 0.0, "refresh_max_ms": 0.0, "redrawn": 0, "refreshes": 0}
+        self.stats_shown = 0.0
+
+        header_font = (font[0], font[1], "bold")
+        for column, sections_in_column in enumerate(sections):
+            row = 0
+            for title, fields in sections_in_column:
+                tk.Label(parent, text=f"--- {title} ---", font=header_font, fg=fg, bg=bg, anchor="w").grid(
+                    row=row, column=column * 2, columnspan=2, sticky="w", padx=(0 if column == 0 else 12, 0))
+                row += 1
+                for key, name, fmt in fields:
+                    tk.Label(parent, text=f"{name}:", font=font, fg=fg, bg=bg, anchor="w").grid(
+                        row=row, column=column * 2, sticky="w", padx=(0 if column == 0 else 12, 4))
+                    value = tk.Label(parent, text="N/A", font=font, fg=fg, bg=bg, anchor="w", width=9)
+                    value.grid(row=row, column=column * 2 + 1, sticky="w")
+                    self.labels[key] = (value, fmt)
+                    self.texts[key] = "N/A"
+                    row += 1
+
+        self.footer = tk.Label(parent, text="", font=font, fg="#888888", bg=bg, anchor="w")
+        self.footer.grid(row=100, column=0, columnspan=2 * len(sections), sticky="w", pady=(6, 0))
+
+    def refresh(self):
+        started = time.perf_counter()
+        self.state.update(self.sample())
+        redrawn = 0
+        for key in self.state.changed_since(self.drawn_version):
+            if key not in self.labels:
+                continue
+            label, fmt = self.labels[key]
+            try:
+                text = fmt.format(self.state.values[key])
+            except (ValueError, TypeError):
+                text = str(self.state.values[key])
+            if text != self.texts[key]:
+                label.config(text=text)
+                self.texts[key] = text
+                redrawn += 1
+        self.drawn_version = self.state.version
+        self.record(started, redrawn)
+        self.root.after(self.refresh_ms, self.refresh)
+
+    def record(self, started, redrawn):
+        ms = (time.perf_counter() - started) * 1000
+        stats = self.stats
+        stats["refreshes"] += 1
+        stats["redrawn"] = redrawn
+        stats["refresh_ms"] = round(ms if stats["refreshes"] == 1 else 0.9 * stats["refresh_ms"] + 0.1 * ms, 3)
+        stats["refresh_max_ms"] = max(stats["refresh_max_ms"], round(ms, 3))
+        # The footer itself changes at most once a second
+        if started - self.stats_shown >= 1.0:
+            self.stats_shown = started
+            self.footer.config(text=f"Refresh: {stats['refresh_ms']:.2f} ms avg, "
+                                    f"{stats['refresh_max_ms']:.2f} ms max, {redrawn} redrawn")
@@ -0,0 +1,161 @@
+import threading
+import time
+
+# Joystick deflection (of 1.0) needed before an axis counts as pressed
+THRESHOLD = 0.3
+
+# Arrow key -> (dx, dy), screen coordinates like the joystick (up is negative)
+KEY_AXES = {"Up": (0, -1), "Down": (0, 1), "Left": (-1, 0), "Right": (1, 0)}
+
+
+def direction_for(dx, dy, threshold=THRESHOLD):
+    """Map a stick position (dx, dy in [-1, 1], y down) to a motor command."""
+    up, down = dy < -threshold, dy > threshold
+    left, right = dx < -threshold, dx > threshold
+    if up and left: return "forward_left"
+    if up and right: return "forward_right"
+    if down and left: return "backward_left"
+    if down and right: return "backward_right"
+    if up: return "forward"
+    if down: return "backward"
+    if left: return "left"
+    if right: return "right"
+    return "stop"
+
+
+class InputPipeline:
+    """
+    Decouples UI input events from motor commands.
+
+    Tk handlers (joystick drags, key presses) only overwrite the target state and
+    return. A command thread samples that state at `rate` Hz and sends a command
+    only when the resulting direction changes, so a fast drag or key auto-repeat
+    costs at most `rate` commands per second instead of one per event.
+
+    X11 auto-repeat arrives as release+press pairs; a release only counts once no
+    new press for the same key has followed within `release_delay`, so a held key
+    is one steady state.
+    """
+    def __init__(self, send, rate=20, release_delay=0.06, name="Input"):
+        self.send = send
+        self.rate = rate
+        self.release_delay = release_delay
+        self.name = name
+
+        self.stick = (0.0, 0.0)
+        self.pressed = {}    # key -> True while down, or perf_counter() of its (possibly auto-repeat) release
+        self.oneshot = None  # command to send once regardless of state, e.g. "stop"
+        self.last_sent = None
+        self.running = False
+
+        self.stats = {
+            "events": 0,          # UI events handled
+            "sent": 0,            # commands actually sent
+            "events_per_s": 0.0,
+            "sent_per_s": 0.0,
+            "handler_us": 0.0,    # time spent in the Tk handlers, smoothed
+            "ui_lag_ms": 0.0,     # how late Tk's event loop runs a timer, smoothed
+            "ui_lag_max_ms": 0.0,
+        }
+        self.window_started = time.perf_counter()
+        self.window_events = self.window_sent = 0
+
+    # ---- Tk main thread: record and return ----
+    def count_event(self, started):
+        self.window_events += 1
+        self.stats["events"] += 1
+        us = (time.perf_counter() - started) * 1e6
+        self.stats["handler_us"] = round(0.95 * self.stats["handler_us"] + 0.05 * us, 2)
+
+    def joystick(self, dx, dy):
+        started = time.perf_counter()
+        self.stick = (dx, dy)
+        self.count_event(started)
+
+    def key_press(self, key):
+        started = time.perf_counter()
+        self.pressed[key] = True
+        self.count_event(started)
+
+    def key_release(self, key):
+        started = time.perf_counter()
+        if key in self.pressed:
+            self.pressed[key] = started
+        self.count_event(started)
+
+    def command(self, command):
+        """Send one command on the next tick and reset the held state (e.g. space = stop)."""
+        started = time.perf_counter()
+        self.pressed.clear()
+        self.stick = (0.0, 0.0)
+        self.oneshot = command
+        self.count_event(started)
+
+    def bind_keys(self, root):
+        for key in KEY_AXES:
+            root.bind(f"<KeyPress-{key}>", lambda e, k=key: self.key_press(k))
+            root.bind(f"<KeyRelease-{key}>", lambda e, k=key: self.key_release(k))
+        root.bind("<space>", lambda e: self.command("stop"))
+
+    def watch(self, root, interval_ms=50):
+        """Measure Tk responsiveness: how late a repeating `after` timer actually fires."""
+        expected = time.perf_counter() + interval_ms / 1000
+
+        def tick():
+            nonlocal expected
+            now = time.perf_counter()
+            lag = max(0.0, (now - expected) * 1000)
+            self.stats["ui_lag_ms"] = round(0.9 * self.stats["ui_lag_ms"] + 0.1 * lag, 2)
+            self.stats["ui_lag_max_ms"] = max(self.stats["ui_lag_max_ms"], round(lag, 2))
+            expected = now + interval_ms / 1000
+            if self.running:
+                root.after(interval_ms, tick)
+
+        root.after(interval_ms, tick)
+
+    # ---- Command thread ----
+    def target(self, now):
+        dx, dy = self.stick
+        held = [key for key, state in list(self.pressed.items())
+                if state is True or now - state < self.release_delay]
+        for key in [k for k in list(self.pressed) if k not in held]:
+            self.pressed.pop(key, None)
+        if held:
+            # Keys override the stick while any is held
+            dx = sum(KEY_AXES[key][0] for key in held)
+            dy = sum(KEY_AXES[key][1] for key in held)
+        return direction_for(dx, dy)
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            threading.Thread(target=self.run, daemon=True).start()
+
+    def stop(self):
+        self.running = False
+
+    def run(self):
+        period = 1.0 / self.rate
+        next_tick = time.perf_counter()
+        while self.running:
+            now = time.perf_counter()
+            oneshot, self.oneshot = self.oneshot, None
+            direction = oneshot or self.target(now)
+            if oneshot or direction != self.last_sent:
+                try:
+                    self.send(direction)
+                except Exception as e:
+                    print(f"[{self.name}] Error sending {direction!r}: {e}")
+                self.last_sent = direction
+                self.stats["sent"] += 1
+                self.window_sent += 1
+
+            if now - self.window_started >= 1.0:
+                elapsed = now - self.window_started
+                self.stats["events_per_s"] = round(self.window_events / elapsed, 1)
+                self.stats["sent_per_s"] = round(self.window_sent / elapsed, 1)
+                self.window_events = self.window_sent = 0
+                self.window_started = now
+
+            next_tick += period
+            time.sleep(max(0.0, next_tick - time.perf_counter()))
@@ -1,36 +1,88 @@
 import tkinter as tk
-import threading
 
+from GUI.CameraPreview import CameraPreview
+from GUI.Dashboard import DashboardView
+from GUI.InputPipeline import InputPipeline, direction_for
 from GUI.Joystick import OnScreenJoystick
-from Controllers.MotorController import process_command as motor_run_command
-from Controllers.ServoController import set_angle as set_servo_angle, outputToDashboard as servo_dashboard
+from GUI.StripChart import ChartPanel
+from Controllers.Services import services
+from Controllers.TelemetryBus import bus as telemetry_bus
+from Controllers.MotorController import process_command as motor_run_command, cleanup as motor_cleanup
+from Controllers.ServoController import set_angle as set_servo_angle
 
-# Import dashboards and sensor threads
+# Sensor modules; importing one registers its service with Controllers.Services
 try:
-    from Controllers.GyroAccelerometerController import outputToDashboard as gyro_dashboard, run as gyro_run_loop
-    from Controllers.UltrasonicController import outputToDashboard as ultra_dashboard, run as ultra_run_loop
-    from Controllers.CameraController import outputToDashboard as camera_dashboard, run as camera_run
+    import Controllers.GyroAccelerometerController as gyro_module
+    import Controllers.UltrasonicController as ultra_module
+    import Controllers.CameraController as camera_module
     car_status = "Connected"
 except ImportError as e:
     print("[MainWindow] Hardware modules not found. This may not be running on a Raspberry Pi.")
     print("[MainWindow] Details:", e)
-    gyro_run_loop = ultra_run_loop = camera_run = None
-    gyro_dashboard = ultra_dashboard = motor_dashboard = camera_dashboard = {}
+    gyro_module = ultra_module = camera_module = None
     car_status = "Not Connected"
 
-# --- Runtime Flags ---
-camera_running = False
-gyro_running = False
-ultra_running = False
-
-def start_thread(target_func):
-    if target_func:
-        t = threading.Thread(target=target_func, daemon=True)
-        t.start()
+# --- Sensor Display ---
+# Redraws per second; only fields whose value changed are touched
+DASHBOARD_REFRESH_HZ = 5
+
+# Camera preview size and redraw rate; frames arriving faster are skipped, not queued
+PREVIEW_SIZE = (160, 120)
+PREVIEW_REFRESH_HZ = 10
+
+# Columns of (section, [(telemetry key, name, format)]); keys as in Networking.Telemetry.collect()
+DASHBOARD_SECTIONS = [
+    [
+        ("Gyro", [("gyro.gyro_x", "x", "{:.2f}"), ("gyro.gyro_y", "y", "{:.2f}"), ("gyro.gyro_z", "z", "{:.2f}")]),
+        ("Accel", [("gyro.accel_x", "x", "{:.2f}"), ("gyro.accel_y", "y", "{:.2f}"), ("gyro.accel_z", "z", "{:.2f}")]),
+        ("Ultrasonic", [("ultrasonic.distance", "Distance", "{:.2f} m"), ("ultrasonic.proximity", "Proximity", "{}")]),
+        ("Servo", [("servo.angle", "Angle", "{}")]),
+    ],
+    [
+        ("Camera", [("camera.status", "Status", "{}"), ("camera.resolution", "Resolution", "{}"),
+                    ("camera.fps", "FPS", "{}"), ("camera.frame_count", "Frames", "{}")]),
+        # Only when this process is also running the command server
+        ("Latency (ms)", [("latency.client.browser_ms", "browser", "{:.1f}"), ("latency.client.web_ms", "web", "{:.1f}"),
+                          ("latency.client.relay_queue_ms", "relay", "{:.1f}"),
+                          ("latency.client.network_ms", "network", "{:.1f}"),
+                          ("latency.server_ms", "server", "{:.2f}"), ("latency.client.rtt_ms", "rtt", "{:.1f}")]),
+    ],
+]
+
+# --- Input ---
+# Commands per second at most; UI events only update the target, a thread sends changes
+INPUT_RATE_HZ = 20
+
+# --- Strip Charts ---
+CHART_SECONDS = 10      # history shown
+CHART_SAMPLE_HZ = 50    # sampled on a background thread
+CHART_REFRESH_HZ = 10   # redrawn on the Tk main thread
+
+
+def field(topic, name):
+    """Getter for one telemetry bus field; None until that sensor has published."""
+    topic = telemetry_bus.topic(topic)
+    return lambda: topic.get(name)
+
+
+# (title, [(name, getter, color)], smallest vertical span shown)
+CHART_SERIES = [
+    ("Gyro (deg/s)", [(axis, field("gyro", f"gyro_{axis}"), color)
+                      for axis, color in (("x", "#ff6060"), ("y", "#60ff60"), ("z", "#6090ff"))], 2.0),
+    ("Accel (g)", [(axis, field("gyro", f"accel_{axis}"), color)
+                   for axis, color in (("x", "#ff6060"), ("y", "#60ff60"), ("z", "#6090ff"))], 0.2),
+    ("Distance (m)", [("distance", field("ultrasonic", "distance"), "#ffd060")], 0.5),
+    ("Motor duty (%)", [("left", field("motor", "left_duty"), "#ff60ff"),
+                        ("right", field("motor", "right_duty"), "#60ffff")], 20.0),
+]
 
 class DarkGUI:
-    def __init__(self, root):
+    def __init__(self, root, refresh_hz=DASHBOARD_REFRESH_HZ, car=None):
+        """car: a Processes.RemoteCar when the controllers run in other processes; None drives them directly."""
         self.root = root
+        self.refresh_hz = refresh_hz
+        self.car = car
+        self.send = car.send if car else motor_run_command
         self.root.title("Self-Driving RC Car - Dashboard")
         self.root.configure(bg="#1e1e1e")
         self.root.geometry("1200x700")
@@ -48,20 +100,25 @@ class DarkGUI:
         self.frame_joystick = tk.Frame(self.root, bg=self.bg_color)
         self.frame_joystick.place(x=20, y=340, width=1160, height=340)
 
+        self.input = InputPipeline(self.send, rate=INPUT_RATE_HZ, name="MainWindow")
+        self.joystick_direction = "stop"
+
         self.build_motor_controls()
         self.build_sensor_display()
         self.build_camera_controls()
         self.build_joystick()
+        self.build_charts()
         self.build_servo_slider()
 
-        self.start_threads()
+        if not car:
+            self.start_threads()
         self.update_gui()
 
-        self.root.bind("<Up>", lambda e: motor_run_command("forward"))
-        self.root.bind("<Down>", lambda e: motor_run_command("backward"))
-        self.root.bind("<Left>", lambda e: motor_run_command("left"))
-        self.root.bind("<Right>", lambda e: motor_run_command("right"))
-        self.root.bind("<space>", lambda e: motor_run_command("stop"))
+        self.input.bind_keys(self.root)
+        self.input.start()
+        self.input.watch(self.root)
+        self.update_input_stats()
+        self.update_service_stats()
 
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
@@ -80,24 +137,37 @@ class DarkGUI:
         actions = ["forward", "backward", "left", "right", "stop", "high", "medium", "low"]
         for label, cmd in zip(commands, actions):
             tk.Button(self.frame_motor, text=label, font=self.font_main, bg=self.button_bg, fg=self.fg_color,
-                      command=lambda c=cmd: motor_run_command(c)).pack(pady=5)
+                      command=lambda c=cmd: self.send(c)).pack(pady=5)
 
     def build_sensor_display(self):
-        self.sensor_text = tk.Text(self.frame_sensors, bg=self.bg_color, fg=self.fg_color, font=self.font_main, height=12)
-        self.sensor_text.pack(fill="both", expand=True)
+        self.dashboard = DashboardView(self.frame_sensors, self.root, DASHBOARD_SECTIONS, refresh_hz=self.refresh_hz,
+                                       fg=self.fg_color, bg=self.bg_color)
 
     def build_camera_controls(self):
-        tk.Button(self.frame_camera, text="Start Camera", font=self.font_main, bg=self.button_bg, fg=self.fg_color,
-                  command=self.start_camera).pack(pady=10)
-        tk.Button(self.frame_camera, text="Stop Camera", font=self.font_main, bg=self.button_bg, fg=self.fg_color,
-                  command=self.stop_camera).pack(pady=10)
+        buttons = tk.Frame(self.frame_camera, bg=self.bg_color)
+        buttons.pack(pady=(0, 5))
+        tk.Button(buttons, text="Start Camera", font=self.font_main, bg=self.button_bg, fg=self.fg_color,
+                  command=self.start_camera).pack(side="left", padx=5)
+        tk.Button(buttons, text="Stop Camera", font=self.font_main, bg=self.button_bg, fg=self.fg_color,
+                  command=self.stop_camera).pack(side="left", padx=5)
+
+        if self.car:
+            source = self.car.latest_frame
+        elif camera_module:
+            source = lambda: camera_module.latest_frame
+        else:
+            source = lambda: (0, None)
+        self.camera_preview = CameraPreview(self.frame_camera, self.root, source, *PREVIEW_SIZE,
+                                            refresh_hz=PREVIEW_REFRESH_HZ)
+        self.camera_preview.pack()
+
         self.camera_status_label = tk.Label(self.frame_camera, text="Camera: Unknown", font=self.font_main,
                                             bg=self.bg_color, fg=self.fg_color)
-        self.camera_status_label.pack(pady=10)
+        self.camera_status_label.pack(pady=5)
 
     def build_joystick(self):
         self.joystick_canvas = tk.Canvas(self.frame_joystick, bg="#1e1e1e", width=600, height=300, highlightthickness=0)
-        self.joystick_canvas.pack(expand=True, fill="both")
+        self.joystick_canvas.pack(side="left", fill="y")
         canvas_w, canvas_h = 600, 300
 
         self.on_screen_joystick = OnScreenJoystick(
@@ -113,90 +183,107 @@ class DarkGUI:
             canvas_w // 2, 20, text="Joystick: STOP",
             fill="#fff", font=self.font_main
         )
+        self.input_stats_label = self.joystick_canvas.create_text(
+            10, canvas_h - 10, text="", anchor="sw", fill="#888888", font=("Helvetica", 9)
+        )
+        # One line per sensor service: state, restarts and the resources it uses
+        self.service_stats_label = self.joystick_canvas.create_text(
+            10, 40, text="", anchor="nw", fill="#888888", font=("Helvetica", 9)
+        )
+        self.service_stats_text = ""
+
+    def build_charts(self):
+        width, height = 540, 320
+        self.chart_canvas = tk.Canvas(self.frame_joystick, bg=self.bg_color, width=width, height=height,
+                                      highlightthickness=0)
+        self.chart_canvas.pack(side="right", padx=10)
+        self.charts = ChartPanel(self.chart_canvas, self.root, CHART_SERIES, width, height, seconds=CHART_SECONDS,
+                                 sample_hz=CHART_SAMPLE_HZ, refresh_hz=CHART_REFRESH_HZ)
+        self.charts.start()
 
     def build_servo_slider(self):
         self.servo_slider = tk.Scale(self.frame_camera, from_=0, to=180, orient="horizontal",
                                      label="Servo Angle", font=self.font_main,
                                      bg=self.bg_color, fg=self.fg_color, troughcolor="#444",
                                      highlightthickness=0, command=self.update_servo)
-        self.servo_slider.pack(pady=10)
+        self.servo_slider.pack(pady=5)
 
     def update_servo(self, value):
         try:
-            set_servo_angle(int(value))
+            if self.car:
+                self.car.send(f"servo:{int(float(value))}")
+            else:
+                set_servo_angle(int(value))
         except:
             pass
 
     def handle_joystick(self, dx, dy):
-        direction = "stop"
-        T = 0.3
-        up, down = dy < -T, dy > T
-        left, right = dx < -T, dx > T
-
-        if up and left: direction = "forward_left"
-        elif up and right: direction = "forward_right"
-        elif down and left: direction = "backward_left"
-        elif down and right: direction = "backward_right"
-        elif up: direction = "forward"
-        elif down: direction = "backward"
-        elif left: direction = "left"
-        elif right: direction = "right"
-
-        self.joystick_canvas.itemconfig(self.joystick_label, text=f"Joystick: {direction.upper()}")
-        motor_run_command(direction)
+        # The input thread sends the command; here only the target and the label change
+        self.input.joystick(dx, dy)
+        direction = direction_for(dx, dy)
+        if direction != self.joystick_direction:
+            self.joystick_direction = direction
+            self.joystick_canvas.itemconfig(self.joystick_label, text=f"Joystick: {direction.upper()}")
+
+    def update_input_stats(self):
+        stats = self.input.stats
+        self.joystick_canvas.itemconfig(
+            self.input_stats_label,
+            text=f"Input: {stats['events_per_s']:.0f} events/s -> {stats['sent_per_s']:.0f} cmds/s, "
+                 f"handler {stats['handler_us']:.0f} us, UI lag {stats['ui_lag_ms']:.1f} ms "
+                 f"(max {stats['ui_lag_max_ms']:.1f})")
+        self.root.after(1000, self.update_input_stats)
+
+    def update_service_stats(self):
+        if self.car:
+            return  # the services run in the control and perception processes
+        lines = []
+        for name, stats in services.stats.items():
+            lines.append(f"{name}: {stats['state']} ({stats['restarts']} restarts)")
+            lines.append(f"    cpu {stats['cpu_pct']:.1f}%, +{stats['rss_mb']:.1f} MB, {stats['threads']} threads")
+        text = "\n".join(lines)
+        if text != self.service_stats_text:
+            self.joystick_canvas.itemconfig(self.service_stats_label, text=text)
+            self.service_stats_text = text
+        self.root.after(1000, self.update_service_stats)
 
     def start_camera(self):
-        global camera_running
-        if camera_run and not camera_running:
-            camera_running = True
-            start_thread(camera_run)
+        # Opens the device in the background; does nothing if the camera is already up
+        if self.car:
+            self.car.send("camera:start")
+        elif camera_module:
+            services.start("camera")
 
     def stop_camera(self):
-        global camera_running
-        camera_running = False
+        if self.car:
+            self.car.send("camera:stop")
+        elif camera_module:
+            services.stop("camera")
 
     def start_threads(self):
-        global gyro_running, ultra_running
-        gyro_running = True if gyro_run_loop else False
-        ultra_running = True if ultra_run_loop else False
-        if gyro_run_loop: start_thread(gyro_run_loop)
-        if ultra_run_loop: start_thread(ultra_run_loop)
+        if gyro_module:
+            services.start("gyro")
+        if ultra_module:
+            services.start("ultrasonic")
 
     def update_gui(self):
-        self.sensor_text.delete("1.0", tk.END)
-
-        self.sensor_text.insert(tk.END, f"--- Gyro ---\n")
-        for k, v in gyro_dashboard.get("gyro", {}).items():
-            self.sensor_text.insert(tk.END, f"{k}: {v:.2f}\n")
+        self.dashboard.refresh()
+        self.camera_preview.refresh()
+        self.update_camera_status()
 
-        self.sensor_text.insert(tk.END, f"\n--- Accel ---\n")
-        for k, v in gyro_dashboard.get("accel", {}).items():
-            self.sensor_text.insert(tk.END, f"{k}: {v:.2f}\n")
-
-        self.sensor_text.insert(tk.END, f"\n--- Ultrasonic ---\n")
-        self.sensor_text.insert(tk.END, f"Distance: {ultra_dashboard.get('distance', 0):.2f} m\n")
-        self.sensor_text.insert(tk.END, f"Proximity: {ultra_dashboard.get('proximity', 'N/A')}\n")
-
-        self.sensor_text.insert(tk.END, f"\n--- Servo ---\n")
-        self.sensor_text.insert(tk.END, f"Angle: {servo_dashboard.get('servo_angle', 0)}\n")
-
-        self.sensor_text.insert(tk.END, f"\n--- Camera ---\n")
-        self.sensor_text.insert(tk.END, f"Status: {camera_dashboard.get('camera_status', 'N/A')}\n")
-        self.sensor_text.insert(tk.END, f"Resolution: {camera_dashboard.get('resolution', 'N/A')}\n")
-        self.sensor_text.insert(tk.END, f"FPS: {camera_dashboard.get('fps', 0)}\n")
-        self.sensor_text.insert(tk.END, f"Frames: {camera_dashboard.get('frame_count', 0)}\n")
-
-        self.camera_status_label.config(text=f"Camera: {camera_dashboard.get('camera_status', 'N/A')}")
-        self.root.after(200, self.update_gui)
+    def update_camera_status(self):
+        status = f"Camera: {self.dashboard.state.values.get('camera.status', 'N/A')}"
+        if status != self.camera_status_label.cget("text"):
+            self.camera_status_label.config(text=status)
+        self.root.after(self.dashboard.refresh_ms, self.update_camera_status)
 
     def on_close(self):
-        global camera_running, gyro_running, ultra_running
-        camera_running = gyro_running = ultra_running = False
-        try:
-            import RPi.GPIO as GPIO
-            GPIO.cleanup()
-        except ImportError:
-            pass
+        self.charts.stop()
+        self.input.stop()
+        if not self.car:
+            # With a car, the control process releases the hardware when the supervisor stops it
+            services.shutdown()
+            motor_cleanup()
         self.root.destroy()
 
 
@@ -0,0 +1,157 @@
+import threading
+import time
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed-size float history. Every sample is written twice (at i and i + size) so
+    the newest `size` samples are always one contiguous slice -- no copy or roll
+    to read them. Single writer; a reader racing it sees at most one stale sample.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.data = np.zeros(2 * size)
+        self.index = 0
+        self.count = 0
+
+    def append(self, value):
+        i = self.index
+        self.data[i] = self.data[i + self.size] = value
+        self.index = (i + 1) % self.size
+        self.count += 1
+
+    def window(self):
+        """Oldest to newest view of the samples held."""
+        n = min(self.count, self.size)
+        end = self.index + self.size
+        return self.data[end - n:end]
+
+
+def decimate(values, width):
+    """
+    Reduce a series to at most one (min, max) pair per pixel column so noise
+    stays visible. Returns (column, value) points, right-aligned to `width`.
+    """
+    n = len(values)
+    if n <= width:
+        return np.arange(width - n, width), values
+    edges = np.linspace(0, n, width + 1).astype(int)[:-1]
+    pairs = np.empty((width, 2))
+    pairs[:, 0] = np.minimum.reduceat(values, edges)
+    pairs[:, 1] = np.maximum.reduceat(values, edges)
+    return np.repeat(np.arange(width), 2), pairs.ravel()
+
+
+class StripChart:
+    """
+    One scrolling chart on a shared Canvas. Its frame, labels and one line per
+    series are created once; draw() only moves the lines' points.
+    """
+    def __init__(self, canvas, x, y, width, height, title, series, history, min_span=1.0,
+                 fg="#ffffff", grid="#444444"):
+        """`series` is a list of (name, getter, color); getter returns a number or None."""
+        self.canvas = canvas
+        self.x, self.y, self.width, self.height = x, y, width, height
+        self.series = [(name, getter, RingBuffer(history)) for name, getter, _ in series]
+        self.min_span = min_span
+
+        canvas.create_rectangle(x, y, x + width, y + height, outline=grid)
+        canvas.create_text(x + 4, y + 2, text=title, anchor="nw", fill=fg, font=("Helvetica", 8, "bold"))
+        self.scale_label = canvas.create_text(x + width - 4, y + 2, text="", anchor="ne", fill=fg,
+                                              font=("Helvetica", 8))
+        legend_x = x + 60
+        self.lines = []
+        for name, _, color in series:
+            canvas.create_text(legend_x, y + 2, text=name, anchor="nw", fill=color, font=("Helvetica", 8))
+            legend_x += 8 * len(name) + 10
+            self.lines.append(canvas.create_line(x, y, x, y, fill=color))
+        self.scale_text = ""
+
+    def sample(self):
+        for _, getter, ring in self.series:
+            value = getter()
+            if value is not None:
+                ring.append(value)
+
+    def draw(self):
+        windows = [ring.window() for _, _, ring in self.series]
+        filled = [w for w in windows if len(w)]
+        if not filled:
+            return
+        lo = min(float(w.min()) for w in filled)
+        hi = max(float(w.max()) for w in filled)
+        if hi - lo < self.min_span:
+            mid = (hi + lo) / 2
+            lo, hi = mid - self.min_span / 2, mid + self.min_span / 2
+        scale = (self.height - 14) / (hi - lo)  # leave the title row clear
+        bottom = self.y + self.height - 1
+
+        for line, values in zip(self.lines, windows):
+            if len(values) < 2:
+                continue
+            columns, points = decimate(values, self.width - 2)
+            coords = np.empty((len(points), 2))
+            coords[:, 0] = columns + (self.x + 1)
+            coords[:, 1] = bottom - (points - lo) * scale
+            self.canvas.coords(line, coords.ravel().tolist())
+
+        text = f"{lo:.2f} .. {hi:.2f}"
+        if text != self.scale_text:
+            self.canvas.itemconfig(self.scale_label, text=text)
+            self.scale_text = text
+
+
+class ChartPanel:
+    """
+    A column of strip charts on one Canvas.
+
+    A background thread samples every series at `sample_hz` into the ring
+    buffers; the Tk main thread only redraws, at `refresh_hz`, so a slow redraw
+    never loses samples and sampling never competes with joystick events for
+    the event loop. Redraw time is kept in `stats`.
+    """
+    def __init__(self, canvas, root, charts, width, height, seconds=10, sample_hz=50, refresh_hz=10, gap=6):
+        """`charts` is a list of (title, series, min_span); see StripChart."""
+        self.root = root
+        self.sample_hz = sample_hz
+        self.refresh_ms = int(1000 / refresh_hz)
+        history = int(seconds * sample_hz)
+        chart_h = (height - gap * (len(charts) - 1)) // len(charts)
+        self.charts = [
+            StripChart(canvas, 0, i * (chart_h + gap), width - 1, chart_h, title, series, history, min_span)
+            for i, (title, series, min_span) in enumerate(charts)
+        ]
+        self.running = False
+        self.stats = {"draw_ms": 0.0, "draw_max_ms": 0.0, "samples": 0}
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            threading.Thread(target=self.sample_loop, daemon=True).start()
+            self.refresh()
+
+    def stop(self):
+        self.running = False
+
+    def sample_loop(self):
+        period = 1.0 / self.sample_hz
+        next_tick = time.perf_counter()
+        while self.running:
+            for chart in self.charts:
+                chart.sample()
+            self.stats["samples"] += 1
+            next_tick += period
+            time.sleep(max(0.0, next_tick - time.perf_counter()))
+
+    def refresh(self):
+        if not self.running:
+            return
+        started = time.perf_counter()
+        for chart in self.charts:
+            chart.draw()
+        ms = (time.perf_counter() - started) * 1000
+        self.stats["draw_ms"] = round(0.9 * self.stats["draw_ms"] + 0.1 * ms, 3)
+        self.stats["draw_max_ms"] = max(self.stats["draw_max_ms"], round(ms, 3))
+        self.root.after(self.refresh_ms, self.refresh)
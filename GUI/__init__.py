@@ -4,4 +4,8 @@ GUI Package for Self-Driving RC Car
 Contains all GUI components, including:
 - MainWindow: the main dashboard GUI
 - Joystick: on-screen joystick widget
+- InputPipeline: samples joystick/key state on its own thread and sends only changed commands
+- Dashboard: sensor readout that only redraws fields whose value changed
+- CameraPreview: downscaled live camera view that skips frames it can't keep up with
+- StripChart: scrolling sensor charts over numpy ring buffers
 """
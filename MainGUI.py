@@ -2,183 +2,53 @@
 # later using opencv and this repo https://github.com/murtazahassan/Neural-Networks-Self-Driving-Car-Raspberry-Pi/tree/main 
 
 import tkinter as tk
-import threading
 import time
 
+from Controllers.Services import services
+from Controllers.TelemetryBus import bus as telemetry_bus
+from GUI.InputPipeline import InputPipeline, direction_for
+
+# Sensor values are read from the telemetry bus; these topics stay at seq 0 until a sensor publishes
+gyro_telemetry = telemetry_bus.topic("gyro")
+ultra_telemetry = telemetry_bus.topic("ultrasonic")
+camera_telemetry = telemetry_bus.topic("camera")
+motor_telemetry = telemetry_bus.topic("motor")
+
 # Import test scripts
 try:
-    from TestScripts.CameraTest import run as camera_run
-    from TestScripts.CameraTest import outputToDashboard as camera_dashboard
-
-    from Controllers.GyroAccelerometerController import outputToDashboard as gyro_dashboard, run as gyro_run_loop
-    from Controllers.UltrasonicController import outputToDashboard as ultra_dashboard, run as ultra_run_loop
-    from Controllers.MotorController import outputToDashboard as motor_dashboard
+    import Controllers.CameraController as camera_module
+    import Controllers.GyroAccelerometerController as gyro_module
+    import Controllers.UltrasonicController as ultra_module
     car_status = "Connected"
 except ImportError as e:
     print("ERROR: Some hardware modules not found. This likely means you're not on a Raspberry Pi, or smbus is missing.")
     print("Details:", e)
     # If this fails, sensor threads won't run, but we let the GUI load.
-    camera_run = None
-    camera_dashboard = {}
-    gyro_run_loop = None
-    gyro_dashboard = {}
-    ultra_run_loop = None
-    ultra_dashboard = {}
-    motor_dashboard = {}
+    camera_module = None
+    gyro_module = None
+    ultra_module = None
     car_status = "Not Connected"
 
-# Flags for sensor/camera threads
-camera_running = False
-gyro_running = False
-ultra_running = False
-
-# Default motor speed
-current_speed = 35
+# Sensor start/stop, restarts and health are owned by Controllers.Services
 
 # -------------------------------
 # Motor Control
 # -------------------------------
+try:
+    from Controllers.MotorController import process_command as motor_process_command
+except ImportError:
+    motor_process_command = None
+
 def motor_run_command(cmd: str):
     """
-    Direct approach referencing MotorControllerTest pins.
-    On Pi, uses RPi.GPIO to set motor directions. If not on Pi or RPi.GPIO missing, does nothing.
+    Hand the command to MotorController, which owns the GPIO pins and ramps
+    the wheels toward the new target from its own control loop.
+    If not on Pi or RPi.GPIO missing, does nothing.
     """
-    try:
-        import RPi.GPIO as GPIO
-    except ImportError:
+    if motor_process_command is None:
         print("RPi.GPIO not available - skipping motor command.")
         return
-
-    in1, in2, enA = 19, 26, 13
-    in3, in4, enB = 20, 21, 16
-
-    global current_speed
-    GPIO.setmode(GPIO.BCM)
-    GPIO.setup(in1, GPIO.OUT)
-    GPIO.setup(in2, GPIO.OUT)
-    GPIO.setup(enA, GPIO.OUT)
-    GPIO.output(in1, GPIO.LOW)
-    GPIO.output(in2, GPIO.LOW)
-
-    GPIO.setup(in3, GPIO.OUT)
-    GPIO.setup(in4, GPIO.OUT)
-    GPIO.setup(enB, GPIO.OUT)
-    GPIO.output(in3, GPIO.LOW)
-    GPIO.output(in4, GPIO.LOW)
-
-    p = GPIO.PWM(enA, 1000)
-    q = GPIO.PWM(enB, 1000)
-    p.start(current_speed)
-    q.start(current_speed)
-
-    cmd = cmd.lower()
-
-    if cmd == 'forward':
-        GPIO.output(in1, GPIO.HIGH)
-        GPIO.output(in2, GPIO.LOW)
-        GPIO.output(in3, GPIO.HIGH)
-        GPIO.output(in4, GPIO.LOW)
-
-    elif cmd == 'backward':
-        GPIO.output(in1, GPIO.LOW)
-        GPIO.output(in2, GPIO.HIGH)
-        GPIO.output(in3, GPIO.LOW)
-        GPIO.output(in4, GPIO.HIGH)
-
-    elif cmd == 'left':
-        # pivot left
-        GPIO.output(in1, GPIO.LOW)
-        GPIO.output(in2, GPIO.HIGH)
-        GPIO.output(in3, GPIO.HIGH)
-        GPIO.output(in4, GPIO.LOW)
-
-    elif cmd == 'right':
-        # pivot right
-        GPIO.output(in1, GPIO.HIGH)
-        GPIO.output(in2, GPIO.LOW)
-        GPIO.output(in3, GPIO.LOW)
-        GPIO.output(in4, GPIO.HIGH)
-
-    elif cmd == 'stop':
-        GPIO.output(in1, GPIO.LOW)
-        GPIO.output(in2, GPIO.LOW)
-        GPIO.output(in3, GPIO.LOW)
-        GPIO.output(in4, GPIO.LOW)
-
-    elif cmd == 'low':
-        current_speed = 35
-        p.ChangeDutyCycle(current_speed)
-        q.ChangeDutyCycle(current_speed)
-
-    elif cmd == 'medium':
-        current_speed = 50
-        p.ChangeDutyCycle(current_speed)
-        q.ChangeDutyCycle(current_speed)
-
-    elif cmd == 'high':
-        current_speed = 75
-        p.ChangeDutyCycle(current_speed)
-        q.ChangeDutyCycle(current_speed)
-
-    elif cmd == 'forward_left':
-        # pivot style diagonal
-        GPIO.output(in1, GPIO.LOW)
-        GPIO.output(in2, GPIO.HIGH)
-        GPIO.output(in3, GPIO.HIGH)
-        GPIO.output(in4, GPIO.LOW)
-
-    elif cmd == 'forward_right':
-        GPIO.output(in1, GPIO.HIGH)
-        GPIO.output(in2, GPIO.LOW)
-        GPIO.output(in3, GPIO.LOW)
-        GPIO.output(in4, GPIO.HIGH)
-
-    elif cmd == 'backward_left':
-        GPIO.output(in1, GPIO.LOW)
-        GPIO.output(in2, GPIO.HIGH)
-        GPIO.output(in3, GPIO.LOW)
-        GPIO.output(in4, GPIO.HIGH)
-
-    elif cmd == 'backward_right':
-        GPIO.output(in1, GPIO.HIGH)
-        GPIO.output(in2, GPIO.LOW)
-        GPIO.output(in3, GPIO.LOW)
-        GPIO.output(in4, GPIO.HIGH)
-
-    # Not stopping PWM intentionally - we want continuous motor operation until next command
-
-# -------------------------------
-# Sensor Threads
-# -------------------------------
-def camera_thread_func():
-    global camera_running
-    if camera_run is None:
-        print("No camera script or not on Pi.")
-        return
-    camera_run()
-    camera_running = False
-
-def gyro_thread_func():
-    global gyro_running
-    if gyro_run_loop is None:
-        print("No gyro script or not on Pi.")
-        return
-    try:
-        gyro_run_loop()
-    except KeyboardInterrupt:
-        pass
-    gyro_running = False
-
-def ultrasonic_thread_func():
-    global ultra_running
-    if ultra_run_loop is None:
-        print("No ultrasonic script or not on Pi.")
-        return
-    try:
-        ultra_run_loop()
-    except KeyboardInterrupt:
-        pass
-    ultra_running = False
+    motor_process_command(cmd)
 
 # -------------------------------
 # On-Screen Joystick
@@ -301,6 +171,10 @@ class DarkGUI:
         # place it at the bottom
         self.frame_joystick.place(x=20, y=340, width=1160, height=340)
 
+        # Joystick/keys only set a target; the pipeline's thread sends changed commands at most 20x/s
+        self.input = InputPipeline(motor_run_command, rate=20, name="MainGUI")
+        self.joystick_direction = "stop"
+
         self.build_motor_controls()
         self.build_sensor_display()
         self.build_camera_controls()
@@ -309,12 +183,9 @@ class DarkGUI:
         self.start_threads()
         self.update_gui()
 
-        # Keyboard fallback
-        self.root.bind("<Up>", lambda e: motor_run_command("forward"))
-        self.root.bind("<Down>", lambda e: motor_run_command("backward"))
-        self.root.bind("<Left>", lambda e: motor_run_command("left"))
-        self.root.bind("<Right>", lambda e: motor_run_command("right"))
-        self.root.bind("<space>", lambda e: motor_run_command("stop"))
+        # Keyboard fallback (held keys, auto-repeat collapsed by the pipeline)
+        self.input.bind_keys(self.root)
+        self.input.start()
 
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
@@ -488,127 +359,81 @@ class DarkGUI:
     def handle_joystick(self, dx, dy):
         """
         Called by on-screen joystick. dx, dy in [-1..1].
-        We'll map that to motor commands: forward, backward, left, right, diagonal combos, or stop.
+        Only records the target; the input pipeline maps it to a motor command
+        (forward, backward, left, right, diagonal combos, or stop) and sends it.
         """
-        direction = "stop"
-
-        # We define thresholds to interpret dx, dy
-        # y negative => forward, y positive => backward
-        # x negative => left, x positive => right
-        THRESHOLD = 0.3
-
-        up = (dy < -THRESHOLD)
-        down = (dy > THRESHOLD)
-        left = (dx < -THRESHOLD)
-        right = (dx > THRESHOLD)
-
-        if up and left:
-            direction = "forward_left"
-        elif up and right:
-            direction = "forward_right"
-        elif down and left:
-            direction = "backward_left"
-        elif down and right:
-            direction = "backward_right"
-        elif up:
-            direction = "forward"
-        elif down:
-            direction = "backward"
-        elif left:
-            direction = "left"
-        elif right:
-            direction = "right"
-        else:
-            direction = "stop"
+        self.input.joystick(dx, dy)
 
-        # Update label
-        self.joystick_canvas.itemconfig(self.joystick_label, text=f"Joystick: {direction.upper()}")
-
-        # Send to motor
-        motor_run_command(direction)
+        # Update label only when the direction changes
+        direction = direction_for(dx, dy)
+        if direction != self.joystick_direction:
+            self.joystick_direction = direction
+            self.joystick_canvas.itemconfig(self.joystick_label, text=f"Joystick: {direction.upper()}")
 
     def start_camera(self):
-        global camera_running
-        if camera_run is None:
+        if camera_module is None:
             print("Camera script not available.")
             return
-        camera_running = True
-        threading.Thread(target=camera_thread_func, daemon=True).start()
+        # No-op if the camera is already starting or running
+        services.start("camera")
 
     def stop_camera(self):
-        global camera_running
-        camera_running = False
+        if camera_module is not None:
+            services.stop("camera")
 
     def start_threads(self):
-        global gyro_running, ultra_running
-
-        # Start gyro
-        if gyro_run_loop is not None:
-            gyro_running = True
-            threading.Thread(target=gyro_thread_func, daemon=True).start()
-        else:
-            print("No gyro script or missing smbus. Skipping gyro thread.")
-
-        # Start ultrasonic
-        if ultra_run_loop is not None:
-            ultra_running = True
-            threading.Thread(target=ultrasonic_thread_func, daemon=True).start()
-        else:
-            print("No ultrasonic script. Skipping ultrasonic thread.")
+        # Gyro and ultrasonic reads run as supervised services on the shared scheduler
+        for name, module in (("gyro", gyro_module), ("ultrasonic", ultra_module)):
+            if module is None:
+                print(f"No {name} script or missing smbus/gpiozero. Skipping {name}.")
+                continue
+            services.start(name)
 
         # Optionally auto-start camera (for later)
-        # camera_running = True
-        # threading.Thread(target=camera_thread_func, daemon=True).start()
+        # services.start("camera")
 
     def update_gui(self):
         """
-        Periodically update sensor data on the GUI from the various outputToDashboard dicts.
+        Periodically update sensor data on the GUI from the telemetry bus.
         """
         # Gyro
-        if gyro_dashboard and "gyro" in gyro_dashboard:
-            gx = gyro_dashboard["gyro"]["x"]
-            gy = gyro_dashboard["gyro"]["y"]
-            gz = gyro_dashboard["gyro"]["z"]
-            self.label_gyro.config(text=f"Gyro: x={gx:.2f}, y={gy:.2f}, z={gz:.2f}")
+        if gyro_telemetry.seq:
+            gyro = gyro_telemetry.read()
+            self.label_gyro.config(text=f"Gyro: x={gyro.gyro_x:.2f}, y={gyro.gyro_y:.2f}, z={gyro.gyro_z:.2f}")
         else:
             self.label_gyro.config(text="Gyro: N/A")
 
         # Ultrasonic
-        if ultra_dashboard and "distance" in ultra_dashboard:
-            dist = ultra_dashboard["distance"]
-            prox = ultra_dashboard["proximity"]
-            self.label_ultra.config(text=f"Ultrasonic: {dist:.2f}m, {prox}")
+        if ultra_telemetry.seq:
+            ultra = ultra_telemetry.read()
+            self.label_ultra.config(text=f"Ultrasonic: {ultra.distance:.2f}m, {ultra.proximity}")
         else:
             self.label_ultra.config(text="Ultrasonic: N/A")
 
         # Camera
-        global camera_running
-        if camera_running:
-            if camera_dashboard.get("camera_status") == "Connected":
-                self.label_camera.config(text="Camera: Connected")
-            else:
-                self.label_camera.config(text="Camera: Running...")
+        state = services.state("camera") if camera_module else "stopped"
+        if state in ("running", "degraded") and camera_telemetry.get("status") == "Connected":
+            self.label_camera.config(text="Camera: Connected")
         else:
-            self.label_camera.config(text="Camera: Stopped")
+            self.label_camera.config(text=f"Camera: {state.capitalize()}")
 
         # Motor
-        if motor_dashboard:
-            lf_dir = motor_dashboard["L_Front"]["direction"]
-            lf_spd = motor_dashboard["L_Front"]["speed"]
-            self.label_motor.config(text=f"Motor: {lf_dir} @ {lf_spd}%")
+        if motor_telemetry.seq:
+            motor = motor_telemetry.read()
+            self.label_motor.config(text=f"Motor: {motor.left_direction} @ {abs(motor.left_duty):.0f}%")
         else:
             self.label_motor.config(text="Motor: N/A")
 
         self.root.after(200, self.update_gui)
 
     def on_close(self):
-        global camera_running, gyro_running, ultra_running
-        camera_running = gyro_running = ultra_running = False
+        services.shutdown()
+        self.input.stop()
 
         # Cleanup if on Pi
         try:
-            import RPi.GPIO as GPIO
-            GPIO.cleanup()
+            from Controllers.MotorController import cleanup as motor_cleanup
+            motor_cleanup()
         except ImportError:
             pass
 
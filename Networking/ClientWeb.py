@@ -1,33 +1,56 @@
-from flask import Flask, request, render_template_string, jsonify
-import socket
+from flask import Flask, Response, request, render_template_string, jsonify
+import gzip
+import hashlib
 import json
-import threading
+import socket
 import time
 
+from Networking.Fleet import CarFleet
+from Networking.Telemetry import TELEMETRY_PORT, TelemetryClient
+
 # Remote server (Raspberry Pi) IP and port
 REMOTE_SERVER_IP = "10.0.0.197"
 REMOTE_SERVER_PORT = 5000
+REMOTE_TELEMETRY_PORT = TELEMETRY_PORT
+
+# Fleet mode: car ID -> (IP, command port). Commands without a car ID go to DEFAULT_CAR;
+# the car ID "all" broadcasts. Telemetry is followed for DEFAULT_CAR only.
+CARS = {
+    "car1": (REMOTE_SERVER_IP, REMOTE_SERVER_PORT),
+}
+DEFAULT_CAR = "car1"
+BROADCAST = "all"
+
+# Send known commands as 2-byte binary frames instead of JSON lines
+USE_BINARY_PROTOCOL = False
+
+# Send known commands over the server's UDP control channel; TCP is the fallback
+USE_UDP = False
+
+# WSGI server used by run_flask:
+#   "gevent"   - pip install gevent; async, WebSockets and event streams run on greenlets
+#   "waitress" - pip install waitress; thread pool, no WebSocket (the page falls back to HTTP)
+#   "dev"      - Flask's built-in server, threaded, debug off
+#   "auto"     - the first of the above that is installed
+WEB_SERVER = "auto"
+WEB_THREADS = 16  # waitress worker threads
+
+# How long browsers may reuse the page before revalidating it with its ETag (seconds)
+PAGE_MAX_AGE = 300
 
 app = Flask(__name__)
 
-# Global variables: socket connection with remote server and Lock for synchronization
-remote_socket = None
-socket_lock = threading.Lock()
-
-def connect_to_remote():
-    """Attempt to connect to the remote server and store the socket in global variable."""
-    global remote_socket
-    while True:
-        try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.connect((REMOTE_SERVER_IP, REMOTE_SERVER_PORT))
-            with socket_lock:
-                remote_socket = s
-            print("[Client] Connected to remote server.")
-            break
-        except Exception as e:
-            print("[Client] Remote connection failed, retrying in 5 sec:", e)
-            time.sleep(5)
+# Optional: persistent WebSocket command channel (pip install flask-sock)
+try:
+    from flask_sock import Sock
+    sock = Sock(app)
+except ImportError:
+    sock = None
+
+# Created by create_links() once the web server is chosen: gevent has to patch threading
+# and socket before these make their locks, threads and sockets
+fleet = None      # one queued, persistent connection per car; handlers never touch a socket
+telemetry = None  # follows the car's sensor stream and fans it out to browsers at /telemetry
 
 # HTML Template: Uses onmousedown/onmouseup for continuous command sending
 HTML = """
@@ -50,11 +73,34 @@ HTML = """
     .row {
       margin: 10px 0;
     }
+    #link {
+      color: #666;
+      font-family: monospace;
+    }
+    #telemetry {
+      margin: 20px auto;
+      font-family: monospace;
+      text-align: left;
+    }
+    #telemetry td, #latency td {
+      padding: 0 10px;
+    }
+    #latency, #fleet {
+      margin: 10px auto;
+      font-family: monospace;
+    }
+    #fleet td {
+      padding: 0 10px;
+    }
   </style>
 </head>
 <body>
   <div class="container">
     <h1>RC Car Control</h1>
+
+    <div class="row">
+      Car: <select id="car"></select>
+    </div>
     
     <!-- Row 1: Forward + Forward Turning (continuous) -->
     <div class="row">
@@ -99,6 +145,17 @@ HTML = """
       <button onclick="sendCommand('medium')">Medium Speed</button>
       <button onclick="sendCommand('high')">High Speed</button>
     </div>
+
+    <div id="link">Link: HTTP</div>
+
+    <h2>Fleet</h2>
+    <table id="fleet"></table>
+
+    <h2>Latency (ms)</h2>
+    <table id="latency"></table>
+
+    <h2>Telemetry</h2>
+    <table id="telemetry"></table>
   </div>
   
   <script>
@@ -121,15 +178,126 @@ HTML = """
       sendCommand('stop');
     }
     
+    // Persistent WebSocket to the backend; HTTP POST is used whenever it isn't open
+    let ws = null;
+    let nextId = 0;
+    const pending = {};
+    // Last browser <-> backend round trip, reported with the next command
+    let lastRtt = null;
+
+    function connectSocket() {
+      const scheme = location.protocol === 'https:' ? 'wss://' : 'ws://';
+      let socket;
+      try {
+        socket = new WebSocket(scheme + location.host + '/ws');
+      } catch (e) {
+        return;
+      }
+      socket.onopen = () => {
+        ws = socket;
+        document.getElementById('link').textContent = 'Link: WebSocket';
+      };
+      socket.onmessage = (event) => {
+        const ack = JSON.parse(event.data);
+        const sent = pending[ack.id];
+        delete pending[ack.id];
+        if (sent !== undefined) {
+          lastRtt = performance.now() - sent;
+          document.getElementById('link').textContent = `Link: WebSocket, ack ${lastRtt.toFixed(1)} ms (${ack.status})`;
+        }
+      };
+      socket.onclose = () => {
+        ws = null;
+        document.getElementById('link').textContent = 'Link: HTTP';
+        setTimeout(connectSocket, 1000);
+      };
+    }
+    connectSocket();
+
+    // Live sensor values: one row per field, only changed cells are touched
+    const cells = {};
+    function showTelemetry(values) {
+      const table = document.getElementById('telemetry');
+      for (const key of Object.keys(values).sort()) {
+        if (!(key in cells)) {
+          const row = table.insertRow();
+          row.insertCell().textContent = key;
+          cells[key] = row.insertCell();
+        }
+        cells[key].textContent = values[key];
+      }
+    }
+    const telemetrySource = new EventSource('/telemetry');
+    telemetrySource.onmessage = (event) => {
+      const message = JSON.parse(event.data);
+      showTelemetry(message.full || message.d);
+    };
+
+    // Per-hop latency breakdown, browser -> ClientWeb -> relay -> network -> car
+    const HOPS = ['browser_ms', 'web_ms', 'relay_queue_ms', 'network_ms', 'server_ms', 'dispatch_ms', 'rtt_ms'];
+    const latencyCells = {};
+    function showLatency(values) {
+      const table = document.getElementById('latency');
+      for (const hop of HOPS) {
+        if (!(hop in latencyCells)) {
+          const row = table.insertRow();
+          row.insertCell().textContent = hop.replace('_ms', '');
+          latencyCells[hop] = row.insertCell();
+        }
+        latencyCells[hop].textContent = (values[hop] || 0).toFixed(1);
+      }
+    }
+    // Car selector and per-car link health, refreshed from /fleet
+    const carSelect = document.getElementById('car');
+    const fleetRows = {};
+    function selectedCar() {
+      return carSelect.value || null;
+    }
+    function showFleet(data) {
+      const table = document.getElementById('fleet');
+      if (!carSelect.options.length) {
+        for (const car of Object.keys(data.cars).concat([data.broadcast])) {
+          carSelect.add(new Option(car, car, false, car === data.default));
+        }
+      }
+      for (const [car, health] of Object.entries(data.cars)) {
+        if (!(car in fleetRows)) {
+          const row = table.insertRow();
+          fleetRows[car] = [row.insertCell(), row.insertCell(), row.insertCell(), row.insertCell()];
+          fleetRows[car][0].textContent = car;
+        }
+        const cells = fleetRows[car];
+        cells[1].textContent = health.state;
+        cells[2].textContent = health.rtt_ms.toFixed(1) + ' ms';
+        cells[3].textContent = `sent ${health.sent}, dropped ${health.dropped}`;
+      }
+    }
+    setInterval(() => {
+      fetch('/fleet').then(response => response.json()).then(showFleet).catch(() => {});
+      const car = selectedCar();
+      const query = car && car !== 'all' ? '?car=' + encodeURIComponent(car) : '';
+      fetch('/latency' + query).then(response => response.json()).then(showLatency).catch(() => {});
+    }, 1000);
+
     // Send single command to backend
     function sendCommand(command) {
+      if (ws && ws.readyState === WebSocket.OPEN) {
+        const id = nextId++;
+        pending[id] = performance.now();
+        ws.send(JSON.stringify({ id: id, command: command, car: selectedCar(), rtt: lastRtt }));
+        return;
+      }
+      const sent = performance.now();
       fetch('/command', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ command: command })
+        body: JSON.stringify({ command: command, car: selectedCar(), rtt: lastRtt })
       })
       .then(response => response.json())
-      .then(data => console.log("Command sent:", data))
+      .then(data => {
+        lastRtt = performance.now() - sent;
+        console.log("Command sent:", data);
+      })
       .catch(error => console.error("Error:", error));
     }
   </script>
@@ -137,32 +305,143 @@ HTML = """
 </html>
 """
 
+def prerender(html):
+    """Render the page once at startup: (body, gzipped body, ETag)."""
+    with app.app_context():
+        body = render_template_string(html).encode()
+    return body, gzip.compress(body, 9), hashlib.sha1(body).hexdigest()[:16]
+
+PAGE, PAGE_GZIP, PAGE_ETAG = prerender(HTML)
+
 @app.route("/")
 def index():
-    return render_template_string(HTML)
+    if request.accept_encodings["gzip"]:
+        response = Response(PAGE_GZIP, mimetype="text/html")
+        response.headers["Content-Encoding"] = "gzip"
+        response.set_etag(PAGE_ETAG + "-gz")
+    else:
+        response = Response(PAGE, mimetype="text/html")
+        response.set_etag(PAGE_ETAG)
+    response.headers["Vary"] = "Accept-Encoding"
+    response.cache_control.public = True
+    response.cache_control.max_age = PAGE_MAX_AGE
+    # 304 with no body when the browser already has this version
+    return response.make_conditional(request)
+
+def relay_command(cmd, started, rtt=None, car=None):
+    """
+    Hand one browser command to one car's relay, or to all of them.
+    Returns (response dict, HTTP status) immediately.
+    """
+    car = car or DEFAULT_CAR
+    print(f"[Client] Received command from browser for {car}:", cmd)
+    if car == BROADCAST:
+        accepted = fleet.broadcast(cmd)
+    elif car in fleet:
+        accepted = {car: fleet.submit(car, cmd)}
+    else:
+        return {"status": "error", "error": f"Unknown car {car!r}"}, 404
+
+    elapsed = (time.perf_counter() - started) * 1000
+    for car_id in accepted:
+        relay = fleet.get(car_id)
+        if isinstance(rtt, (int, float)):
+            relay.record("browser_ms", rtt)
+        relay.record("web_ms", elapsed)
+
+    connected = {car_id: fleet.get(car_id).stats["connected"] for car_id in accepted}
+    if not any(accepted.values()):
+        return {"status": "error", "error": "Command queue full", "accepted": accepted, "connected": connected}, 503
+    status = "success" if all(accepted.values()) else "partial"
+    return {"status": status, "command": cmd, "accepted": accepted, "connected": connected}, 200
 
 @app.route("/command", methods=["POST"])
 def command():
+    started = time.perf_counter()
     data = request.get_json()
     cmd = data.get("command", "").strip().lower()
-    print("[Client] Received command from browser:", cmd)
-    with socket_lock:
-        if remote_socket:
+    result, status = relay_command(cmd, started, data.get("rtt"), data.get("car"))
+    return jsonify(result), status
+
+@app.route("/latency")
+def latency():
+    relay = fleet.get(request.args.get("car", DEFAULT_CAR))
+    if relay is None:
+        return jsonify({"error": "Unknown car"}), 404
+    return jsonify(relay.latency)
+
+@app.route("/fleet")
+def fleet_health():
+    return jsonify({"cars": fleet.health(), "default": DEFAULT_CAR, "broadcast": BROADCAST})
+
+@app.route("/telemetry")
+def telemetry_stream():
+    return Response(telemetry.stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+if sock:
+    @sock.route("/ws")
+    def command_socket(ws):
+        """One connection per page: {"id", "command"} in, {"id", "status", ...} ack out."""
+        while True:
+            data = ws.receive()
+            started = time.perf_counter()
+            try:
+                message = json.loads(data)
+                cmd = str(message.get("command", "")).strip().lower()
+            except (ValueError, AttributeError):
+                ws.send(json.dumps({"id": None, "status": "error", "error": "Bad message"}))
+                continue
+            result, _ = relay_command(cmd, started, message.get("rtt"), message.get("car"))
+            result["id"] = message.get("id")
+            ws.send(json.dumps(result))
+
+def select_server(name=WEB_SERVER):
+    """
+    Resolve "auto" to an installed server. For gevent this also monkey-patches the
+    standard library, so call it before create_links().
+    """
+    if name == "auto":
+        name = "dev"
+        for candidate in ("gevent", "waitress"):
             try:
-                # Send command to remote server (in JSON format)
-                message = json.dumps({"command": cmd})
-                remote_socket.sendall(message.encode())
-                return jsonify({"status": "success", "command": cmd})
-            except Exception as e:
-                print("[Client] Error sending command to remote server:", e)
-                return jsonify({"status": "error", "error": str(e)}), 500
-        else:
-            return jsonify({"status": "error", "error": "Not connected to remote server"}), 500
-
-def run_flask():
+                __import__(candidate)
+                name = candidate
+                break
+            except ImportError:
+                pass
+    if name == "gevent":
+        # Blocking calls (relay queues, SSE waits, WebSocket reads) then yield to other requests
+        from gevent import monkey
+        monkey.patch_all()
+    return name
+
+def create_links(cars=CARS):
+    """Create the car relays and the telemetry follower (not started yet)."""
+    global fleet, telemetry
+    fleet = CarFleet(cars, binary=USE_BINARY_PROTOCOL, use_udp=USE_UDP)
+    telemetry = TelemetryClient(REMOTE_SERVER_IP, REMOTE_TELEMETRY_PORT)
+
+def run_flask(host="0.0.0.0", port=8080, server="dev"):
     # Run client web server on 0.0.0.0:8080
-    app.run(host="0.0.0.0", port=8080, debug=True, use_reloader=False)
+    print(f"[Client] Serving on {host}:{port} ({server})")
+    if server == "gevent":
+        from gevent.pywsgi import WSGIServer
+        from gevent.server import StreamServer
+        listener = StreamServer.get_listener((host, port), backlog=128, family=socket.AF_INET)
+        # Accepted sockets inherit this; pywsgi writes headers and body separately,
+        # which Nagle plus delayed ACKs would otherwise hold up by ~40 ms per response
+        listener.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        WSGIServer(listener, app, log=None).serve_forever()
+    elif server == "waitress":
+        from waitress import serve
+        serve(app, host=host, port=port, threads=WEB_THREADS)
+    else:
+        app.run(host=host, port=port, threaded=True, debug=False, use_reloader=False)
 
 if __name__ == "__main__":
-    threading.Thread(target=connect_to_remote, daemon=True).start()
-    run_flask()
+    server = select_server()
+    create_links()
+    fleet.start()
+    telemetry.start()
+    run_flask(server=server)
@@ -0,0 +1,66 @@
+import time
+
+from Networking.Relay import CarRelay
+
+# A connected car that hasn't answered a ping for this many probe intervals is "stale"
+STALE_PROBES = 3
+
+
+class CarFleet:
+    """
+    One persistent, self-reconnecting CarRelay per car, keyed by car ID.
+
+    Sending never touches a socket: submit() and broadcast() only append to each
+    car's relay queue, so a broadcast is a single pass over the pool and a slow
+    or unreachable car only backs up (and coalesces) its own queue.
+    """
+    def __init__(self, cars, name="Client", **relay_options):
+        """`cars` maps car ID -> (host, port); relay_options go to every CarRelay."""
+        self.relays = {
+            car_id: CarRelay(host, port, name=f"{name}:{car_id}", **relay_options)
+            for car_id, (host, port) in cars.items()
+        }
+
+    def __contains__(self, car_id):
+        return car_id in self.relays
+
+    def get(self, car_id):
+        return self.relays.get(car_id)
+
+    def start(self):
+        for relay in self.relays.values():
+            relay.start()
+
+    def stop(self):
+        for relay in self.relays.values():
+            relay.stop()
+
+    def submit(self, car_id, command):
+        """Queue a command for one car. Returns False if that car's queue was full."""
+        return self.relays[car_id].submit(command)
+
+    def broadcast(self, command):
+        """Queue a command for every car. Returns {car ID: accepted}."""
+        return {car_id: relay.submit(command) for car_id, relay in self.relays.items()}
+
+    def link_state(self, relay, now):
+        if not relay.stats["connected"]:
+            return "down"
+        # A fresh connection gets STALE_PROBES intervals to answer its first ping
+        if now - max(relay.last_reply, relay.connected_at) > STALE_PROBES * relay.probe_interval:
+            return "stale"
+        return "up"
+
+    def health(self):
+        """Per-car link health for the web page and logs."""
+        now = time.time()
+        return {
+            car_id: {
+                "state": self.link_state(relay, now),
+                "host": f"{relay.host}:{relay.port}",
+                "rtt_ms": relay.latency["rtt_ms"],
+                "last_reply_s": round(now - relay.last_reply, 1) if relay.last_reply else None,
+                **relay.stats,
+            }
+            for car_id, relay in self.relays.items()
+        }
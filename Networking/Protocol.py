@@ -0,0 +1,285 @@
+"""
+Wire protocol between the command clients (ClientWeb, benchmarks) and Server.
+
+A TCP stream carries a sequence of frames, in any mix:
+- Newline-delimited JSON:  {"command":"forward"}\\n
+- Plain text lines:        forward\\n
+- Compact binary frames:   0xA5 <command code>  (2 bytes, see COMMANDS)
+
+Bare concatenated JSON objects without newlines and bare command words, one
+per write (what older clients sent), are still understood. FrameDecoder parses
+incrementally and in place: any number of frames per read, frames split across
+reads, one buffer compaction per read.
+
+A JSON message may carry an "id"; the server then answers with
+    {"ack":<id>,"rx":<receive time>,"done":<command queued>,"queue":<ms>}\\n
+where "queue" (when the server knows it) is the car's smoothed command-queue
+wait plus apply time for that kind of command, in ms.
+Latency probes need no command:
+    {"ping":<n>,"t":<sender time>,"report":{<client-side hop latencies>}}\\n
+and are answered straight from the event loop with
+    {"pong":<n>,"t":<sender time>,"rx":<receive time>,"tx":<reply time>}\\n
+Server times are the car's time.time(); only their differences are used.
+
+The optional UDP control channel sends one command per datagram:
+    0xA6 <command code> <sequence number> <sender time.time()>
+"""
+
+import json
+import struct
+import time
+
+# First byte of a binary frame; never the start of a JSON object or text command
+MAGIC = 0xA5
+BINARY_FRAME = struct.Struct("!BB")  # magic, command code
+
+UDP_MAGIC = 0xA6
+UDP_FRAME = struct.Struct("!BBId")  # magic, command code, sequence number, sender timestamp
+SEQ_MOD = 1 << 32
+
+# The car's command vocabulary. Defined here so the laptop side (Relay, ClientWeb)
+# doesn't need the car's Controllers package; CommandScheduler imports it from here.
+DIRECTION_COMMANDS = ("forward", "backward", "left", "right",
+                      "forward_left", "forward_right", "backward_left", "backward_right")
+SPEED_COMMANDS = ("low", "medium", "high")
+
+# Binary command codes are the index into this list; append only
+COMMANDS = [
+    "stop", "forward", "backward", "left", "right",
+    "forward_left", "forward_right", "backward_left", "backward_right",
+    "low", "medium", "high",
+]
+COMMAND_CODES = {name: code for code, name in enumerate(COMMANDS)}
+
+# Lines longer than this are dropped rather than buffered forever
+MAX_FRAME = 4096
+
+json_decoder = json.JSONDecoder()
+
+
+def encode_json(command, **fields):
+    message = {"command": command}
+    message.update(fields)
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+def encode_reply(**fields):
+    return json.dumps(fields, separators=(",", ":")).encode() + b"\n"
+
+
+def encode_binary(command):
+    return BINARY_FRAME.pack(MAGIC, COMMAND_CODES[command])
+
+
+def encode(command, binary=False, **fields):
+    """Binary when asked for and possible (known command, no extra fields), JSON otherwise."""
+    if binary and not fields and command in COMMAND_CODES:
+        return encode_binary(command)
+    return encode_json(command, **fields)
+
+
+def encode_datagram(command, seq, sent=None):
+    if sent is None:
+        sent = time.time()
+    return UDP_FRAME.pack(UDP_MAGIC, COMMAND_CODES[command], seq % SEQ_MOD, sent)
+
+
+def decode_datagram(data):
+    """Returns (command, seq, sent) or None if the datagram isn't a valid command."""
+    if len(data) != UDP_FRAME.size:
+        return None
+    magic, code, seq, sent = UDP_FRAME.unpack(data)
+    if magic != UDP_MAGIC or code >= len(COMMANDS):
+        return None
+    return COMMANDS[code], seq, sent
+
+
+def seq_newer(seq, last):
+    """True if seq comes after last, allowing for the 32-bit counter wrapping."""
+    return 0 < (seq - last) % SEQ_MOD < SEQ_MOD // 2
+
+
+# The frames our own clients send most, mapped straight to their message: JSON lines,
+# and bare command words as the original text clients sent them
+KNOWN_LINES = {line: {"command": name} for name in COMMANDS for line in (encode_json(name)[:-1], name.encode())}
+# Bucketed by length so a line can be matched in place, without copying it out of the buffer
+KNOWN_BY_LENGTH = {length: [(line, message) for line, message in KNOWN_LINES.items() if len(line) == length]
+                   for length in {len(line) for line in KNOWN_LINES}}
+# Longer commands that start with each bare word ("forward" -> "forward_left", "forward_right")
+LONGER_WORDS = {name.encode(): [other.encode() for other in COMMANDS if other != name and other.startswith(name)]
+                for name in COMMANDS}
+
+# Seconds of silence after which an unterminated text command counts as complete (see FrameDecoder.flush)
+IDLE_FLUSH = 0.05
+
+
+def match_known(buffer, start, stop):
+    """(line, message) if buffer[start:stop] is one of KNOWN_LINES, compared in place; else None."""
+    for line, message in KNOWN_BY_LENGTH.get(stop - start, ()):
+        if buffer.startswith(line, start):
+            return line, message
+    return None
+
+
+def continues_word(word, data):
+    """True if `data` may be the rest of a longer command that starts with the bare `word`."""
+    for longer in LONGER_WORDS.get(word, ()):
+        rest = longer[len(word):]
+        n = min(len(rest), len(data))
+        if data[:n] == rest[:n]:
+            return True
+    return False
+
+
+def split_objects(text):
+    """Every JSON value in `text` written back to back (legacy clients), or None if it isn't only that."""
+    values = []
+    pos, end = 0, len(text)
+    try:
+        while pos < end:
+            value, pos = json_decoder.raw_decode(text, pos)
+            values.append(value if isinstance(value, dict) else {"command": str(value)})
+            while pos < end and text[pos] in " \t\r":
+                pos += 1
+    except json.JSONDecodeError:
+        return None
+    return values
+
+
+def parse_line(line, messages):
+    """Append the message(s) in one line to `messages`."""
+    known = KNOWN_LINES.get(line)
+    if known is not None:
+        messages.append(dict(known))
+        return
+    try:
+        message = json.loads(line)
+        if isinstance(message, dict):
+            messages.append(message)
+            return
+    except json.JSONDecodeError:
+        # e.g. {"command":"forward"}{"command":"left"} from an older client, then a newline
+        values = split_objects(line.decode()) if line[:1] == b"{" else None
+        if values:
+            messages.extend(values)
+            return
+    except UnicodeDecodeError:
+        pass
+    messages.append({"command": line.decode(errors="replace").strip()})
+
+
+class FrameDecoder:
+    """
+    Incremental decoder for one connection's byte stream.
+
+    Text without a newline is the original clients' framing: one bare command per
+    write. A known command word left at the end of a read is therefore returned
+    right away -- unless it may be the start of a longer one ("forward" of
+    "forward_left"), which the next read decides. Any other unterminated text
+    waits for its newline, or for flush() once the sender has been quiet for
+    IDLE_FLUSH seconds.
+    """
+    def __init__(self):
+        self.buffer = bytearray()
+        self.held = None  # bare command word buffered until the next read shows whether it goes on
+        self.dropped = 0
+
+    def pending(self):
+        """True if unterminated text is waiting that flush() would return."""
+        return bool(self.buffer) and self.buffer[0] not in (MAGIC, 0x7B)
+
+    def flush(self):
+        """Take any unterminated text command as complete (call when the sender goes quiet)."""
+        messages = []
+        if self.pending():
+            line = bytes(self.buffer).strip()
+            if line:
+                parse_line(line, messages)
+            self.buffer.clear()
+        self.held = None
+        return messages
+
+    def feed(self, data):
+        """Append newly received bytes and return every complete message in them."""
+        buffer = self.buffer
+        messages = []
+        if self.held is not None:
+            if not continues_word(self.held, data):
+                messages.append(dict(KNOWN_LINES[self.held]))
+                buffer.clear()
+            self.held = None
+        buffer += data
+        pos = 0
+        end = len(buffer)
+        text = None      # buffer[text_pos:] decoded once per read, for legacy unframed JSON
+        text_pos = char_pos = 0
+
+        with memoryview(buffer) as view:
+            while pos < end:
+                first = buffer[pos]
+
+                if first == MAGIC:
+                    if end - pos < BINARY_FRAME.size:
+                        break
+                    _, code = BINARY_FRAME.unpack_from(buffer, pos)
+                    pos += BINARY_FRAME.size
+                    if code < len(COMMANDS):
+                        messages.append({"command": COMMANDS[code]})
+                    else:
+                        self.dropped += 1
+                    continue
+
+                if first in b" \t\r\n":
+                    pos += 1
+                    continue
+
+                newline = buffer.find(b"\n", pos)
+                if newline < 0 and first == 0x7B:  # '{' with no newline yet: legacy unframed JSON
+                    if text is None or text_pos != pos:
+                        text = str(view[pos:], "utf-8", "surrogateescape")
+                        text_pos, char_pos = pos, 0
+                    try:
+                        message, used = json_decoder.raw_decode(text, char_pos)
+                    except json.JSONDecodeError:
+                        break
+                    messages.append(message if isinstance(message, dict) else {"command": str(message)})
+                    pos += len(text[char_pos:used].encode("utf-8", "surrogateescape"))
+                    char_pos = used
+                    while char_pos < len(text) and text[char_pos] in " \t\r":
+                        char_pos += 1
+                        pos += 1
+                    text_pos = pos
+                    continue
+                if newline < 0:
+                    break
+
+                stop = newline
+                if buffer[stop - 1] == 0x0D:  # \r\n
+                    stop -= 1
+                known = match_known(buffer, pos, stop)
+                if known is not None:
+                    messages.append(dict(known[1]))
+                else:
+                    parse_line(bytes(view[pos:stop]).strip(), messages)
+                pos = newline + 1
+
+            if pos < end and buffer[pos] not in (MAGIC, 0x7B):
+                # Text with no newline after it: a bare command word ends here
+                stop = end
+                while buffer[stop - 1] in b" \t\r":
+                    stop -= 1
+                known = match_known(buffer, pos, stop)
+                if known is not None:
+                    if LONGER_WORDS.get(known[0]):
+                        self.held = known[0]
+                    else:
+                        messages.append(dict(known[1]))
+                    pos = end
+
+        del buffer[:pos]
+        if self.held is not None:
+            buffer[:] = self.held
+        elif len(buffer) > MAX_FRAME:
+            self.dropped += 1
+            buffer.clear()
+        return messages
@@ -0,0 +1,286 @@
+import random
+import socket
+import threading
+import time
+from collections import deque
+
+from Networking.Protocol import (COMMAND_CODES, SPEED_COMMANDS, FrameDecoder, encode, encode_datagram,
+                                 encode_reply)
+
+
+class CarRelay:
+    """
+    Forwards commands to one car without ever blocking the caller.
+
+    submit() only appends to a small bounded queue; a single writer thread owns
+    the socket, sends in order, and reconnects with exponential backoff when the
+    link drops. Only the newest movement command matters, so a new one replaces
+    any movement command still waiting (e.g. everything queued while offline).
+
+    Commands (when sent as JSON) carry an id and pings go out every
+    probe_interval; the server's stamped replies, read on a second thread,
+    keep `latency` updated hop by hop.
+    """
+    def __init__(self, host, port, queue_size=32, binary=False, use_udp=False,
+                 backoff_min=0.1, backoff_max=5.0, probe_interval=1.0, name="Client"):
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self.binary = binary
+        self.use_udp = use_udp
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.probe_interval = probe_interval
+        self.name = name
+
+        self.queue = deque()
+        self.cond = threading.Condition()
+        self.sock = None
+        self.udp_socket = None
+        self.udp_seq = 0
+        self.delay = backoff_min
+        self.running = False
+        self.thread = None
+        self.send_lock = threading.Lock()  # writer and pinger share the socket
+        self.next_id = 0
+        self.in_flight = {}  # id -> time.time() it was written
+        self.last_probe = 0.0
+        self.last_reply = 0.0  # time.time() of the car's last ack or pong
+        self.connected_at = 0.0  # time.time() the current connection was made
+
+        self.stats = {
+            "connected": False,
+            "queued": 0,
+            "sent": 0,
+            "coalesced": 0,
+            "dropped": 0,
+            "errors": 0,
+            "connects": 0,
+        }
+
+        # Smoothed per-hop latency in ms, as seen from this side of the link
+        self.latency = {
+            "browser_ms": 0.0,      # browser <-> ClientWeb round trip, reported by the page
+            "web_ms": 0.0,          # ClientWeb request handling up to submit()
+            "relay_queue_ms": 0.0,  # submit() -> written to the socket
+            "network_ms": 0.0,      # round trip to the car minus time spent in the server
+            "server_ms": 0.0,       # server receive -> command queued on the car
+            "dispatch_ms": 0.0,     # car's command queue wait + apply (per-class average from its acks)
+            "rtt_ms": 0.0,          # full round trip to the car
+        }
+
+    def record(self, hop, ms):
+        self.latency[hop] = round(0.8 * self.latency[hop] + 0.2 * ms, 3) if self.latency[hop] else round(ms, 3)
+
+    # ---- Producer side (any thread, never blocks on the network) ----
+    def submit(self, command):
+        """Queue a command for the car. Returns False if it had to be dropped."""
+        with self.cond:
+            if command not in SPEED_COMMANDS:
+                for i, (pending, _) in enumerate(self.queue):
+                    if pending not in SPEED_COMMANDS:
+                        del self.queue[i]
+                        self.stats["coalesced"] += 1
+                        break
+            if len(self.queue) >= self.queue_size:
+                self.stats["dropped"] += 1
+                return False
+            self.queue.append((command, time.perf_counter()))
+            self.stats["queued"] = len(self.queue)
+            self.cond.notify()
+        return True
+
+    # ---- Writer thread ----
+    def start(self):
+        with self.cond:
+            if self.running:
+                return
+            self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+
+    def take(self, timeout):
+        with self.cond:
+            if not self.queue and self.running:
+                self.cond.wait(timeout)
+            if not self.queue:
+                return None
+            entry = self.queue.popleft()
+            self.stats["queued"] = len(self.queue)
+            return entry
+
+    def requeue(self, entry):
+        """Put back a command that failed to send, unless something newer replaced it."""
+        with self.cond:
+            if entry[0] not in SPEED_COMMANDS and any(c not in SPEED_COMMANDS for c, _ in self.queue):
+                self.stats["coalesced"] += 1
+                return
+            self.queue.appendleft(entry)
+            self.stats["queued"] = len(self.queue)
+
+    def connect(self):
+        try:
+            s = socket.create_connection((self.host, self.port), timeout=2.0)
+            s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError as e:
+            print(f"[{self.name}] Remote connection failed, retrying in {self.delay:.1f} sec:", e)
+            return False
+        self.sock = s
+        self.delay = self.backoff_min
+        self.in_flight.clear()
+        self.connected_at = time.time()
+        self.stats["connected"] = True
+        self.stats["connects"] += 1
+        threading.Thread(target=self.read_replies, args=(s,), daemon=True).start()
+        print(f"[{self.name}] Connected to remote server {self.host}:{self.port}.")
+        return True
+
+    def disconnect(self, sock=None):
+        """Close the current connection; with `sock`, only if that is still the current one."""
+        with self.send_lock:
+            if sock is not None and sock is not self.sock:
+                return
+            if self.sock:
+                try:
+                    self.sock.close()
+                except OSError:
+                    pass
+            self.sock = None
+            self.stats["connected"] = False
+
+    def reconnect(self):
+        if self.connect():
+            return True
+        # Wait out the backoff; new submissions keep coalescing meanwhile. submit() notifies
+        # the condition, so wait against a deadline -- only stop() may cut the backoff short.
+        deadline = time.perf_counter() + self.delay * random.uniform(0.8, 1.2)
+        with self.cond:
+            while self.running:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self.cond.wait(remaining)
+        self.delay = min(self.delay * 2, self.backoff_max)
+        return False
+
+    def send_udp(self, command):
+        if not self.use_udp or command not in COMMAND_CODES:
+            return False
+        if self.udp_socket is None:
+            self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            self.udp_seq += 1
+            self.udp_socket.sendto(encode_datagram(command, self.udp_seq), (self.host, self.port))
+            return True
+        except OSError as e:
+            print(f"[{self.name}] UDP send failed, falling back to TCP:", e)
+            return False
+
+    # ---- Latency probing ----
+    def read_replies(self, s):
+        """
+        Reads the server's acks and pongs for one connection until it closes.
+        The socket keeps its connect timeout so a stalled car can't block sendall()
+        forever; here a timeout only means the car was quiet for a while.
+        """
+        decoder = FrameDecoder()
+        try:
+            while True:
+                try:
+                    data = s.recv(4096)
+                except socket.timeout:
+                    continue
+                if not data:
+                    break
+                now = time.time()
+                self.last_reply = now
+                for reply in decoder.feed(data):
+                    self.handle_reply(reply, now)
+        except OSError:
+            pass
+        # EOF or a real error: drop the link and wake the writer so it reconnects
+        if self.running and s is self.sock:
+            print(f"[{self.name}] Lost connection to remote server")
+        self.disconnect(s)
+        with self.cond:
+            self.cond.notify()
+
+    def handle_reply(self, reply, now):
+        if "ack" in reply:
+            sent = self.in_flight.pop(reply["ack"], None)
+            server = reply.get("done", 0) - reply.get("rx", 0)
+            if isinstance(reply.get("queue"), (int, float)):
+                self.record("dispatch_ms", reply["queue"])
+        elif "pong" in reply:
+            sent = reply.get("t")
+            server = reply.get("tx", 0) - reply.get("rx", 0)
+        else:
+            return
+        if sent is None:
+            return
+        rtt = now - sent
+        self.record("rtt_ms", rtt * 1000)
+        self.record("server_ms", server * 1000)
+        self.record("network_ms", max(0.0, rtt - server) * 1000)
+
+    def probe(self):
+        """Send a ping carrying this side's hop latencies, at most every probe_interval."""
+        now = time.time()
+        if self.sock is None or now - self.last_probe < self.probe_interval:
+            return
+        self.last_probe = now
+        self.write(encode_reply(ping=self.next_id, t=now, report=dict(self.latency)))
+        self.next_id += 1
+
+    def write(self, data):
+        with self.send_lock:
+            if self.sock is None:
+                raise ConnectionError("not connected")  # the reader dropped the link
+            self.sock.sendall(data)
+
+    def send_tcp(self, command):
+        if self.binary and command in COMMAND_CODES:
+            self.write(encode(command, binary=True))
+            return
+        msg_id = self.next_id
+        self.next_id += 1
+        if len(self.in_flight) > 256:
+            self.in_flight.clear()  # replies stopped coming; don't grow forever
+        self.in_flight[msg_id] = time.time()
+        self.write(encode(command, id=msg_id))
+
+    def run(self):
+        while self.running:
+            entry = self.take(timeout=self.probe_interval)
+            try:
+                self.probe()
+            except OSError:
+                self.disconnect()
+            if entry is None:
+                if self.sock is None:
+                    # Keep the link up between commands so the first one isn't delayed
+                    self.reconnect()
+                continue
+            command, submitted = entry
+            if self.send_udp(command):
+                self.stats["sent"] += 1
+                self.record("relay_queue_ms", (time.perf_counter() - submitted) * 1000)
+                continue
+            if self.sock is None and not self.reconnect():
+                self.requeue(entry)
+                continue
+            try:
+                self.send_tcp(command)
+                self.stats["sent"] += 1
+                self.record("relay_queue_ms", (time.perf_counter() - submitted) * 1000)
+            except OSError as e:
+                print(f"[{self.name}] Error sending command to remote server:", e)
+                self.stats["errors"] += 1
+                self.requeue(entry)
+                self.disconnect()
+        self.disconnect()
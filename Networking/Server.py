@@ -1,50 +1,261 @@
-import socket
+import asyncio
 import threading
-import json
-from Controllers.MotorController import process_command
+import time
+from concurrent.futures import ThreadPoolExecutor
+from Networking.Protocol import (IDLE_FLUSH, SEQ_MOD, SPEED_COMMANDS, FrameDecoder, decode_datagram, encode_reply,
+                                 seq_newer)
+from Networking.Telemetry import TELEMETRY_PORT, TelemetryPublisher
+from Networking.Watchdog import CommandWatchdog
 
+# Stop the car if a client that is driving it goes quiet for this long (seconds).
+# ClientWeb resends held commands every 100 ms.
+COMMAND_TIMEOUT = 0.5
 
-def client_handler(client_socket, address):
-    print(f"[Server] Connection from {address}")
+# Commands that don't keep the car moving, so they don't need a dead-man timer
+IDLE_COMMANDS = SPEED_COMMANDS
+
+# Print every connection and received command (turn off for load testing)
+VERBOSE = True
+
+# Optional UDP control channel on the same port number as TCP
+UDP_ENABLED = True
+# Drop a datagram delayed this much more than the quickest one seen from its sender (seconds)
+UDP_MAX_DELAY = 0.2
+# A sender quiet this long starts over: new sequence and delay baseline (seconds). Also how
+# long every datagram may look stale before that is taken as a clock step instead.
+UDP_RESYNC = 1.0
+# Reordering leaves single datagrams a few numbers late. One further back than this, or this
+# many late in a row, means the sender restarted its sequence (e.g. a new client, same port).
+UDP_REORDER_WINDOW = 64
+UDP_RESTART_RUN = 3
+
+# Per-hop command latency: measured here, plus what ClientWeb reports in its pings
+latency_stats = {
+    "server_ms": 0.0,      # receive -> command handed to MotorController's scheduler, smoothed
+    "server_max_ms": 0.0,
+    "dispatch_ms": 0.0,    # then waiting in the scheduler + applying it, for the last command's class
+    "client": {},          # browser/web/relay/network hops as seen by ClientWeb
+}
+
+udp_stats = {
+    "received": 0,
+    "accepted": 0,
+    "out_of_order": 0,
+    "stale": 0,
+    "invalid": 0,
+    "one_way_ms": 0.0,      # receive time - sender timestamp, smoothed (needs synced clocks)
+    "one_way_min_ms": None,  # best seen; the rest of one_way_ms is queuing and Wi-Fi delay
+    "delay_ms": 0.0,        # one_way_ms above the best seen, smoothed
+}
+
+# process_command runs off the event loop; a single worker keeps commands in arrival order
+command_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="command")
+dispatch = None  # Bound to MotorController.process_command by start_server()
+dispatch_latency = None  # Bound to its CommandScheduler.dispatch_ms; None with a custom handler
+
+
+def run_command(command):
+    try:
+        dispatch(command)
+    except Exception as e:
+        print(f"[Server] Error processing command: {e}")
+    return time.time()
+
+
+def record_server_latency(received, done):
+    ms = (done - received) * 1000
+    latency_stats["server_ms"] = round(0.9 * latency_stats["server_ms"] + 0.1 * ms, 3)
+    latency_stats["server_max_ms"] = max(latency_stats["server_max_ms"], round(ms, 3))
+
+
+def answer_ping(writer, message, received):
+    report = message.get("report")
+    if isinstance(report, dict):
+        latency_stats["client"] = report
+    writer.write(encode_reply(pong=message["ping"], t=message.get("t"), rx=received, tx=time.time()))
+
+
+def on_command_timeout(address):
+    print(f"[Server] No command from {address} in {COMMAND_TIMEOUT}s, stopping motors")
+    command_executor.submit(run_command, "stop")
+
+
+watchdog = CommandWatchdog(COMMAND_TIMEOUT, on_command_timeout)
+
+# Streams dashboard values to subscribers (ClientWeb) on the telemetry port
+telemetry = TelemetryPublisher()
+
+
+def arm_watchdog(address, command):
+    if command == "stop":
+        watchdog.cancel(address)
+    elif command not in IDLE_COMMANDS:
+        watchdog.feed(address)
+
+
+async def client_handler(reader, writer):
+    address = writer.get_extra_info("peername")
+    if VERBOSE:
+        print(f"[Server] Connection from {address}")
+    loop = asyncio.get_running_loop()
+    decoder = FrameDecoder()
     try:
         while True:
-            data = client_socket.recv(1024)
-            if not data:
-                break  # Close the connection if no data is received
-              
-            # Try parsing as JSON (expecting command in JSON format)
-            try:
-                message = json.loads(data.decode())
-                command = message.get("command", "")
-            except json.JSONDecodeError:
-                command = data.decode().strip()
+            if decoder.pending():
+                try:
+                    data = await asyncio.wait_for(reader.read(4096), IDLE_FLUSH)
+                except asyncio.TimeoutError:
+                    data = None
+            else:
+                data = await reader.read(4096)
+            received = time.time()
 
-            print(f"[Server] Received command: {command}")
-            try:
-                process_command(command)
-            except Exception as e:
-                print(f"[Server] Error processing command: {e}")
+            # One read may carry many framed messages, or only part of one. Once the
+            # client goes quiet (or closes), text left without a newline is a command.
+            for message in decoder.feed(data) if data else decoder.flush():
+                if "ping" in message:
+                    answer_ping(writer, message, received)
+                    continue
+                command = str(message.get("command", "")).strip().lower()
+                if not command:
+                    continue
+                if VERBOSE:
+                    print(f"[Server] Received command: {command}")
+                done = await loop.run_in_executor(command_executor, run_command, command)
+                arm_watchdog(address, command)
+                record_server_latency(received, done)
+                if "id" in message:
+                    reply = {"ack": message["id"], "rx": received, "done": done}
+                    queue_ms = dispatch_latency(command) if dispatch_latency else None
+                    if queue_ms is not None:
+                        # The ack goes out once the command is queued; this is the hop after it
+                        reply["queue"] = latency_stats["dispatch_ms"] = queue_ms
+                    writer.write(encode_reply(**reply))
+            if data == b"":
+                break  # Close the connection if no data is received
     except Exception as e:
         print(f"[Server] Connection error: {e}")
     finally:
-        print(f"[Server] Connection closed: {address}")
-        client_socket.close()
+        if VERBOSE:
+            print(f"[Server] Connection closed: {address}")
+        writer.close()
+        if watchdog.cancel(address):
+            # Dropped mid-drive: no point waiting out the timeout
+            command_executor.submit(run_command, "stop")
+
+
+class UdpControlProtocol(asyncio.DatagramProtocol):
+    """
+    Low-latency command channel: only the newest command matters, so there is no
+    retransmission and anything older than what was already applied is dropped.
+    """
+    def __init__(self):
+        self.last_seq = {}     # sender address -> newest sequence number applied
+        self.min_offset = {}   # sender address -> smallest (receive - send) time seen
+        self.last_seen = {}    # sender address -> time.time() of its last datagram
+        self.stale_since = {}  # sender address -> time.time() its datagrams started looking stale
+        self.late_run = {}     # sender address -> datagrams in a row behind last_seq
+
+    def forget(self, address):
+        """Start over with a sender: it restarted, or its clock may have moved meanwhile."""
+        for state in (self.last_seq, self.min_offset, self.stale_since, self.late_run):
+            state.pop(address, None)
+
+    def datagram_received(self, data, address):
+        received = time.time()
+        udp_stats["received"] += 1
+        decoded = decode_datagram(data)
+        if decoded is None:
+            udp_stats["invalid"] += 1
+            return
+        command, seq, sent = decoded
+
+        if received - self.last_seen.get(address, received) > UDP_RESYNC:
+            self.forget(address)
+        self.last_seen[address] = received
+
+        last = self.last_seq.get(address)
+        if last is not None and not seq_newer(seq, last):
+            late_run = self.late_run[address] = self.late_run.get(address, 0) + 1
+            if (last - seq) % SEQ_MOD <= UDP_REORDER_WINDOW and late_run < UDP_RESTART_RUN:
+                udp_stats["out_of_order"] += 1
+                return
+            self.forget(address)
+        self.late_run.pop(address, None)
+
+        offset = received - sent
+        best = min(offset, self.min_offset.get(address, offset))
+        self.min_offset[address] = best
+        self.last_seq[address] = seq
+        if offset - best <= UDP_MAX_DELAY:
+            self.stale_since.pop(address, None)
+        elif received - self.stale_since.setdefault(address, received) > UDP_RESYNC:
+            # Every datagram stale for this long: the sender's clock stepped back, not the network
+            best = self.min_offset[address] = offset
+            self.stale_since.pop(address, None)
+        elif command != "stop":
+            udp_stats["stale"] += 1
+            return
 
+        udp_stats["accepted"] += 1
+        weight = 1.0 if udp_stats["accepted"] == 1 else 0.1
+        udp_stats["one_way_ms"] = round((1 - weight) * udp_stats["one_way_ms"] + weight * offset * 1000, 3)
+        udp_stats["one_way_min_ms"] = round(best * 1000, 3)
+        udp_stats["delay_ms"] = round((1 - weight) * udp_stats["delay_ms"] + weight * (offset - best) * 1000, 3)
 
-def start_server(host="0.0.0.0", port=5000):
-    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server_socket.bind((host, port))
-    server_socket.listen(5)
+        if VERBOSE:
+            print(f"[Server] Received UDP command: {command} (seq {seq})")
+        command_executor.submit(run_command, command)
+        arm_watchdog(address, command)
+
+
+# Set once the listeners are bound (e.g. for main.py's startup report)
+ready = threading.Event()
+
+
+async def serve(host, port, telemetry_port):
+    loop = asyncio.get_running_loop()
+    server = await asyncio.start_server(client_handler, host, port, backlog=128)
     print(f"[Server] Listening on {host}:{port}")
+    if UDP_ENABLED:
+        await loop.create_datagram_endpoint(UdpControlProtocol, local_addr=(host, port))
+        print(f"[Server] UDP control channel on {host}:{port}")
+    telemetry_server = telemetry_task = None
+    if telemetry_port:
+        telemetry_server = await asyncio.start_server(telemetry.handle_subscriber, host, telemetry_port)
+        telemetry_task = loop.create_task(telemetry.run())
+        print(f"[Server] Telemetry on {host}:{telemetry_port} at {telemetry.rate} Hz")
+    watchdog.start()
+    ready.set()
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if telemetry_task:
+            telemetry_task.cancel()
+            try:
+                await telemetry_task
+            except asyncio.CancelledError:
+                pass
+            telemetry_server.close()
+
+
+def start_server(host="0.0.0.0", port=5000, handler=None, telemetry_port=TELEMETRY_PORT):
+    """
+    Serve every connection from one asyncio event loop.
+    `handler` replaces MotorController.process_command (e.g. for benchmarks off the Pi).
+    `telemetry_port=None` turns the telemetry stream off.
+    """
+    global dispatch, dispatch_latency
+    if handler is None:
+        from Controllers.MotorController import process_command as handler, scheduler
+        dispatch_latency = scheduler.dispatch_ms
+    dispatch = handler
 
     try:
-        while True:
-            client_sock, addr = server_socket.accept()
-            threading.Thread(target=client_handler, args=(client_sock, addr), daemon=True).start()
+        asyncio.run(serve(host, port, telemetry_port))
     except KeyboardInterrupt:
         print("[Server] Shutting down")
-    finally:
-        server_socket.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,221 @@
+"""
+Telemetry stream from the car to the web client.
+
+Car side (TelemetryPublisher, runs in Server's event loop): samples the
+telemetry bus and the controllers' stats dicts at TELEMETRY_RATE, works out which fields changed
+since the last sample, and sends only those as one JSON line:
+    {"seq": 12, "d": {"gyro.gyro_z": -0.42, "ultrasonic.distance": 0.73}}
+A new subscriber first gets the whole state: {"seq": 12, "full": {...}}.
+The line is encoded once per tick and the same bytes go to every subscriber;
+a subscriber that can't keep up is skipped and resynced with a full frame.
+
+Web side (TelemetryClient, runs in ClientWeb): keeps the merged state and
+hands it to any number of browsers as Server-Sent Events.
+"""
+
+import asyncio
+import json
+import socket
+import sys
+import threading
+import time
+from collections import deque
+
+from Controllers.TelemetryBus import bus
+
+TELEMETRY_PORT = 5001
+TELEMETRY_RATE = 10  # Hz
+
+# Sensor values come from the telemetry bus (one prefix per topic). These are the
+# loops' own stats dicts: (prefix, module, dict) -- only modules the process has loaded are read
+SOURCES = [
+    ("motor_loop", "Controllers.MotorController", "loop_stats"),
+    ("heading", "Controllers.MotorController", "heading_stats"),
+    ("safety", "Controllers.MotorController", "safety_stats"),
+    ("commands", "Controllers.MotorController", "command_stats"),
+    ("udp", "Networking.Server", "udp_stats"),
+    ("latency", "Networking.Server", "latency_stats"),
+    ("tasks", "Controllers.Scheduler", "task_stats"),
+    ("services", "Controllers.Services", "service_stats"),
+]
+
+
+def flatten(prefix, value, out):
+    if isinstance(value, dict):
+        for key, item in list(value.items()):
+            flatten(f"{prefix}.{key}", item, out)
+    elif isinstance(value, float):
+        # Sub-millimetre / sub-0.001 changes aren't worth a delta
+        out[prefix] = round(value, 3)
+    else:
+        out[prefix] = value
+
+
+def collect():
+    """Flat snapshot of every published sensor record and loaded controller's stats."""
+    snapshot = {}
+    for name, record in bus.snapshot().items():
+        flatten(name, record.as_dict(), snapshot)
+    for prefix, module_name, attr in SOURCES:
+        module = sys.modules.get(module_name)
+        source = getattr(module, attr, None) if module else None
+        if isinstance(source, dict):
+            flatten(prefix, source, snapshot)
+    return snapshot
+
+
+def encode_line(message):
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+class TelemetryPublisher:
+    def __init__(self, rate=TELEMETRY_RATE, max_backlog=64 * 1024):
+        self.rate = rate
+        self.max_backlog = max_backlog  # bytes buffered for one subscriber before it is skipped
+        self.state = {}
+        self.seq = 0
+        self.subscribers = set()
+        self.resync = set()
+
+        self.stats = {
+            "subscribers": 0,
+            "seq": 0,
+            "fields": 0,
+            "changed": 0,
+            "bytes": 0,        # size of the last delta sent to each subscriber
+            "skipped": 0,      # deltas not sent to a subscriber that was behind
+            "publish_ms": 0.0,
+        }
+
+    def keyframe(self):
+        return encode_line({"seq": self.seq, "full": self.state})
+
+    async def handle_subscriber(self, reader, writer):
+        self.subscribers.add(writer)
+        self.stats["subscribers"] = len(self.subscribers)
+        writer.write(self.keyframe())
+        try:
+            # Nothing is expected from subscribers; just notice when they leave
+            while await reader.read(1024):
+                pass
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.subscribers.discard(writer)
+            self.resync.discard(writer)
+            self.stats["subscribers"] = len(self.subscribers)
+            writer.close()
+
+    def publish(self):
+        started = time.perf_counter()
+        snapshot = collect()
+        delta = {k: v for k, v in snapshot.items() if self.state.get(k) != v or k not in self.state}
+        if not delta:
+            return
+        self.state.update(delta)
+        self.seq += 1
+        line = encode_line({"seq": self.seq, "d": delta})
+        full = None
+
+        for writer in list(self.subscribers):
+            if writer.is_closing():
+                continue
+            if writer.transport.get_write_buffer_size() > self.max_backlog:
+                self.resync.add(writer)
+                self.stats["skipped"] += 1
+                continue
+            if writer in self.resync:
+                if full is None:
+                    full = self.keyframe()
+                writer.write(full)
+                self.resync.discard(writer)
+            else:
+                writer.write(line)
+
+        self.stats["seq"] = self.seq
+        self.stats["fields"] = len(self.state)
+        self.stats["changed"] = len(delta)
+        self.stats["bytes"] = len(line)
+        self.stats["publish_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            next_tick += 1.0 / self.rate
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            try:
+                self.publish()
+            except Exception as e:
+                print(f"[Telemetry] Publish error: {e}")
+
+
+class TelemetryClient:
+    """Follows a car's telemetry stream from a background thread and fans it out to browsers."""
+    def __init__(self, host, port=TELEMETRY_PORT, history=64, name="Telemetry"):
+        self.host = host
+        self.port = port
+        self.name = name
+        self.state = {}
+        self.version = 0
+        self.events = deque(maxlen=history)  # (version, SSE data line) for recent deltas
+        self.cond = threading.Condition()
+        self.connected = False
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def run(self):
+        delay = 0.5
+        while True:
+            try:
+                with socket.create_connection((self.host, self.port), timeout=5.0) as s:
+                    s.settimeout(None)
+                    self.connected = True
+                    delay = 0.5
+                    print(f"[{self.name}] Subscribed to {self.host}:{self.port}")
+                    for line in s.makefile("rb"):
+                        self.apply(json.loads(line))
+            except (OSError, ValueError) as e:
+                print(f"[{self.name}] Stream unavailable, retrying in {delay:.1f} sec:", e)
+            self.connected = False
+            time.sleep(delay)
+            delay = min(delay * 2, 5.0)
+
+    def apply(self, message):
+        with self.cond:
+            self.version += 1
+            if "full" in message:
+                self.state = dict(message["full"])
+                # Browsers can't patch across a full frame; make them resync
+                self.events.clear()
+            else:
+                delta = message.get("d", {})
+                self.state.update(delta)
+                self.events.append((self.version, json.dumps({"d": delta})))
+            self.cond.notify_all()
+
+    def full_event(self):
+        return self.version, json.dumps({"full": self.state})
+
+    def stream(self, keepalive=15.0):
+        """Generator of SSE chunks for one browser: full state first, then deltas."""
+        with self.cond:
+            version, data = self.full_event()
+        yield f"data: {data}\n\n"
+        while True:
+            with self.cond:
+                if not self.cond.wait_for(lambda: self.version > version, keepalive):
+                    chunk = ": keepalive\n\n"
+                elif self.events and self.events[0][0] <= version + 1:
+                    missed = [d for v, d in self.events if v > version]
+                    version = self.version
+                    chunk = "".join(f"data: {d}\n\n" for d in missed)
+                else:
+                    # Fell too far behind (or the car resent everything): start over
+                    version, data = self.full_event()
+                    chunk = f"data: {data}\n\n"
+            yield chunk
@@ -0,0 +1,91 @@
+import heapq
+import threading
+import time
+
+
+class CommandWatchdog:
+    """
+    Dead-man timer for remote command streams.
+
+    Every client that is driving the car is armed with feed(key); if it isn't
+    fed again within `timeout` seconds, on_expire(key) is called once. All
+    clients share one heap of deadlines and one thread, which sleeps exactly
+    until the earliest deadline, so an expiry fires well inside one motor
+    control period of its deadline.
+    """
+    def __init__(self, timeout, on_expire):
+        self.timeout = timeout
+        self.on_expire = on_expire
+        self.deadlines = {}  # key -> current deadline
+        self.heap = []       # (deadline, seq, key); stale entries are skipped when popped
+        self.seq = 0
+        self.cond = threading.Condition()
+        self.running = False
+        self.thread = None
+
+        self.stats = {
+            "armed": 0,
+            "expired": 0,
+            "late_ms": 0.0,
+            "late_max_ms": 0.0,
+        }
+
+    def start(self):
+        with self.cond:
+            if self.running:
+                return
+            self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+
+    def feed(self, key):
+        """(Re)arm the timer for a client that just sent a movement command."""
+        deadline = time.perf_counter() + self.timeout
+        with self.cond:
+            earliest = self.heap[0][0] if self.heap else None
+            self.deadlines[key] = deadline
+            self.seq += 1
+            heapq.heappush(self.heap, (deadline, self.seq, key))
+            self.stats["armed"] = len(self.deadlines)
+            if earliest is None or deadline < earliest:
+                self.cond.notify()
+
+    def cancel(self, key):
+        """Disarm a client, e.g. after it sent 'stop'. Returns whether it was armed."""
+        with self.cond:
+            armed = self.deadlines.pop(key, None) is not None
+            self.stats["armed"] = len(self.deadlines)
+        return armed
+
+    def run(self):
+        while True:
+            with self.cond:
+                expired = None
+                while self.running and expired is None:
+                    now = time.perf_counter()
+                    while self.heap and self.heap[0][0] <= now:
+                        deadline, _, key = heapq.heappop(self.heap)
+                        if self.deadlines.get(key) == deadline:
+                            del self.deadlines[key]
+                            expired = (key, deadline)
+                            break
+                    if expired is None:
+                        self.cond.wait(self.heap[0][0] - now if self.heap else None)
+                if not self.running:
+                    return
+                self.stats["armed"] = len(self.deadlines)
+
+            key, deadline = expired
+            late = (time.perf_counter() - deadline) * 1000
+            self.stats["expired"] += 1
+            self.stats["late_ms"] = round(late, 3)
+            self.stats["late_max_ms"] = max(self.stats["late_max_ms"], round(late, 3))
+            try:
+                self.on_expire(key)
+            except Exception as e:
+                print(f"[Watchdog] Error handling expiry for {key}: {e}")
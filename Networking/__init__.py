@@ -2,6 +2,11 @@
 Networking Package for Self-Driving RC Car
 
 Handles:
-- Server.py: TCP socket server for receiving remote commands
+- Server.py: asyncio TCP server (plus optional UDP channel) for receiving remote commands
+- Protocol.py: framed wire protocol (JSON lines, text lines, binary frames)
+- Relay.py: non-blocking, self-reconnecting command relay to one car
+- Fleet.py: pool of relays keyed by car ID, for one web client driving many cars
+- Telemetry.py: delta-encoded sensor stream from the car, relayed to browsers
+- Watchdog.py: dead-man timer that stops the car when a command stream goes quiet
 - ClientWeb.py: Flask web client with directional controls
 """
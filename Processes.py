@@ -0,0 +1,325 @@
+"""
+Process-isolated mode: control, perception, networking and the UI each run in
+their own process, so the camera's image work and the Tk event loop no longer
+compete with the motor control loop for one GIL.
+
+    control     MotorController's control loop, gyro and ultrasonic services
+                (the safety stop stays in-process with the sensor it watches)
+    perception  the camera service; also writes a downscaled preview frame
+    network     Networking/Server.py; commands are forwarded, not executed
+    ui          GUI/MainWindow.py, driving a RemoteCar instead of the controllers
+
+State is shared through Controllers.SharedState (fixed layout, seqlock slots,
+lock-free reads). Commands travel as (command, sent at) over a one-way
+multiprocessing Pipe per executing process. That process is the pipe's only
+reader, so there is no shared read lock: a consumer killed in the middle of a
+read (SIGKILL, the OOM killer) can't leave its restarted replacement waiting on
+a lock forever, as it could with a SimpleQueue. Each command is a single write
+well under PIPE_BUF, which the kernel keeps whole even with several writers.
+Writes never block: while a consumer is down and its pipe fills up, further
+commands are dropped. A command that waited longer than COMMAND_MAX_AGE is
+dropped too, because a restarted control process must not replay stale motion.
+"stop" is never dropped for its age.
+
+ProcessSupervisor restarts a process that dies, after a backoff that doubles
+up to MAX_BACKOFF. Closing the UI window shuts everything down.
+
+    python main.py --processes
+    python main.py --processes --headless
+"""
+
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from Controllers.Pacing import Rate
+from Controllers.SharedState import SharedState
+from Controllers.TelemetryBus import RECORD_TYPES
+
+ROLES = ["control", "perception", "network", "ui"]
+HEADLESS_ROLES = ["control", "perception", "network"]
+CONSUMERS = ["control", "perception"]  # roles that execute commands, each reading its own pipe
+
+# Topics each role publishes into the shared region; every other role mirrors them
+EXPORTS = {
+    "control": ["gyro", "ultrasonic", "motor", "servo"],
+    "perception": ["camera"],
+}
+
+COMMAND_MAX_AGE = 0.5   # seconds; older motion/config commands are dropped
+INITIAL_BACKOFF = 1.0
+MAX_BACKOFF = 30.0
+BACKOFF_RESET = 30.0    # seconds a process must stay up before its backoff starts over
+
+# Filled in by whichever process consumes commands
+queue_stats = {"received": 0, "dropped_stale": 0, "dropped_full": 0, "latency_ms": 0.0, "latency_max_ms": 0.0}
+
+
+def route(command):
+    """Which process executes a command: camera commands go to perception, the rest to control."""
+    return "perception" if command.startswith("camera:") else "control"
+
+
+class RemoteCar:
+    """The car as seen from the UI and network processes: commands out over pipes, state in from SharedState."""
+    def __init__(self, senders, state):
+        self.senders = senders
+        self.state = state
+        self.frame = (0, None)
+
+    def send(self, command):
+        try:
+            self.senders[route(command)].send((command, time.time()))
+        except BlockingIOError:
+            # The consumer is down (or stuck) and its pipe is full; don't stall the UI or server
+            queue_stats["dropped_full"] += 1
+
+    def latest_frame(self):
+        """(seq, BGR numpy frame) like CameraController.latest_frame, from the shared preview slot."""
+        result = self.state.read_frame(self.frame[0])
+        if result is not None:
+            import numpy as np
+            width, height = self.state.preview_size
+            seq, pixels = result
+            self.frame = (seq, np.frombuffer(pixels, dtype=np.uint8).reshape(height, width, 3))
+        return self.frame
+
+
+def serve_commands(receiver, handle):
+    """Run handle(command) for every command on the pipe until the None sentinel arrives."""
+    while True:
+        try:
+            item = receiver.recv()
+        except EOFError:
+            return  # every writer is gone
+        if item is None:
+            return
+        command, sent = item
+        age = time.time() - sent
+        queue_stats["received"] += 1
+        weight = 1.0 if queue_stats["received"] == 1 else 0.1
+        queue_stats["latency_ms"] = round((1 - weight) * queue_stats["latency_ms"] + weight * age * 1000, 3)
+        queue_stats["latency_max_ms"] = max(queue_stats["latency_max_ms"], round(age * 1000, 3))
+        if age > COMMAND_MAX_AGE and command != "stop":
+            queue_stats["dropped_stale"] += 1
+            continue
+        try:
+            handle(command)
+        except Exception as e:
+            print(f"[Processes] {command!r} failed: {e!r}")
+
+
+def open_state(state_name, role):
+    state = SharedState(state_name)
+    exported = EXPORTS.get(role, [])
+    state.export(exported)
+    state.mirror([topic for topic in RECORD_TYPES if topic not in exported])
+    return state
+
+
+# ---- Roles (each the target of its own process) ----
+def run_control(state_name, senders, receiver):
+    open_state(state_name, "control")
+    from Controllers.MotorController import process_command, start_control_loop, cleanup
+    from Controllers.Services import services
+    start_control_loop()
+    try:
+        import Controllers.GyroAccelerometerController  # registers the "gyro" service
+        import Controllers.UltrasonicController         # registers the "ultrasonic" service
+        services.start("gyro")
+        services.start("ultrasonic")
+    except ImportError as e:
+        print("[Processes] control: sensors unavailable:", e)
+
+    # set_angle blocks ~0.3 s: run it off the command path, and only for the latest angle asked for
+    servo = ThreadPoolExecutor(max_workers=1)
+    servo_lock = threading.Lock()
+    servo_target = {"angle": None, "busy": False}
+
+    def move_servo():
+        from Controllers.ServoController import set_angle
+        while True:
+            with servo_lock:
+                angle, servo_target["angle"] = servo_target["angle"], None
+                if angle is None:
+                    servo_target["busy"] = False
+                    return
+            try:
+                set_angle(angle)
+            except Exception as e:
+                print(f"[Processes] servo:{angle} failed: {e!r}")
+
+    def handle(command):
+        if command.startswith("servo:"):
+            with servo_lock:
+                servo_target["angle"] = int(float(command.split(":", 1)[1]))
+                if servo_target["busy"]:
+                    return
+                servo_target["busy"] = True
+            servo.submit(move_servo)
+        else:
+            process_command(command)
+
+    try:
+        serve_commands(receiver, handle)
+    finally:
+        services.shutdown()
+        cleanup()
+
+
+def run_perception(state_name, senders, receiver):
+    state = open_state(state_name, "perception")
+    import Controllers.CameraController as camera
+    from Controllers.Services import services
+    from Controllers.TelemetryBus import bus
+
+    width, height = state.preview_size
+    preview = {"seq": 0, "small": None}
+
+    def write_preview(record):
+        # Runs on the capture thread right after each frame is published
+        import cv2
+        import numpy as np
+        seq, frame = camera.latest_frame
+        if frame is None or seq == preview["seq"]:
+            return
+        if preview["small"] is None:
+            preview["small"] = np.empty((height, width, 3), dtype=np.uint8)
+        cv2.resize(frame, (width, height), dst=preview["small"], interpolation=cv2.INTER_AREA)
+        state.write_frame(preview["small"])
+        preview["seq"] = seq
+
+    bus.topic("camera").subscribe(write_preview)
+
+    def handle(command):
+        if command == "camera:start":
+            services.start("camera")
+        elif command == "camera:stop":
+            services.stop("camera")
+
+    try:
+        serve_commands(receiver, handle)
+    finally:
+        services.shutdown()
+
+
+def run_network(state_name, senders, receiver):
+    state = open_state(state_name, "network")
+    from Networking.Server import start_server
+    start_server(handler=RemoteCar(senders, state).send)
+
+
+def run_ui(state_name, senders, receiver):
+    state = open_state(state_name, "ui")
+    import tkinter as tk
+    from GUI.MainWindow import DarkGUI
+    root = tk.Tk()
+    app = DarkGUI(root, car=RemoteCar(senders, state))
+    root.mainloop()
+
+
+TARGETS = {"control": run_control, "perception": run_perception, "network": run_network, "ui": run_ui}
+
+
+def role_main(role, state_name, senders, receiver):
+    """receiver: the read end of this role's command pipe; None for roles that only send."""
+    # Ctrl+C reaches the whole process group; only the supervisor acts on it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    TARGETS[role](state_name, senders, receiver)
+
+
+class ProcessSupervisor:
+    """Starts each role in its own process and restarts any that die, with backoff."""
+    def __init__(self, roles, check_hz=2):
+        self.roles = roles
+        self.check_hz = check_hz
+        # spawn: children start clean instead of inheriting this process's threads
+        self.context = multiprocessing.get_context("spawn")
+        self.state = SharedState(create=True)
+        # The read end is handed to each (re)started consumer; the write ends to everyone
+        self.receivers, self.senders = {}, {}
+        for role in CONSUMERS:
+            self.receivers[role], self.senders[role] = self.context.Pipe(duplex=False)
+            # Shared by every process holding this write end (same open file description)
+            os.set_blocking(self.senders[role].fileno(), False)
+        self.processes = {}
+        self.started = {}
+        self.backoff = dict.fromkeys(roles, INITIAL_BACKOFF)
+        self.retry_at = {}
+        self.restarts = dict.fromkeys(roles, 0)
+        self.stopping = threading.Event()
+
+    def launch(self, role):
+        process = self.context.Process(target=role_main, args=(role, self.state.name, self.senders, self.receivers.get(role)),
+                                       name=role, daemon=False)
+        process.start()
+        self.processes[role] = process
+        self.started[role] = time.perf_counter()
+        print(f"[Processes] {role} started (pid {process.pid})")
+
+    def start(self):
+        for role in self.roles:
+            self.launch(role)
+
+    def watch(self):
+        """Block (main process) restarting dead roles until stop() or the UI closes."""
+        rate = Rate(self.check_hz)
+        while not self.stopping.is_set():
+            now = time.perf_counter()
+            for role in self.roles:
+                process = self.processes.get(role)
+                if role in self.retry_at:
+                    if now >= self.retry_at[role]:
+                        del self.retry_at[role]
+                        self.restarts[role] += 1
+                        self.launch(role)
+                    continue
+                if process.is_alive():
+                    if now - self.started[role] > BACKOFF_RESET:
+                        self.backoff[role] = INITIAL_BACKOFF
+                    continue
+                if role == "ui" and process.exitcode == 0:
+                    print("[Processes] UI closed")
+                    self.stopping.set()
+                    break
+                print(f"[Processes] {role} exited with code {process.exitcode}; "
+                      f"restarting in {self.backoff[role]:.1f} s")
+                self.retry_at[role] = now + self.backoff[role]
+                self.backoff[role] = min(self.backoff[role] * 2, MAX_BACKOFF)
+            rate.sleep()
+
+    def stop(self, *_):
+        self.stopping.set()
+
+    def shutdown(self):
+        for role, sender in self.senders.items():
+            if self.processes.get(role) and self.processes[role].is_alive():
+                try:
+                    sender.send(None)  # lets control/perception release their hardware
+                except BlockingIOError:
+                    pass  # pipe full; terminated below if it doesn't exit
+        for role, process in self.processes.items():
+            if role not in self.receivers:
+                process.terminate()  # network and UI hold nothing that needs releasing
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=1.0)
+        self.state.close()
+
+
+def run_processes(headless=False):
+    supervisor = ProcessSupervisor(HEADLESS_ROLES if headless else ROLES)
+    signal.signal(signal.SIGTERM, supervisor.stop)
+    supervisor.start()
+    try:
+        supervisor.watch()
+    except KeyboardInterrupt:
+        pass
+    print("[Processes] Shutting down")
+    # Every wait in shutdown() is bounded; a second Ctrl+C would only leave children behind
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    supervisor.shutdown()
@@ -10,26 +10,23 @@ Before running:
    - Simply plug into any USB port
 """
 
-import cv2
 import time
-import pygame
-import numpy as np
 import os
 
-# ---- Dashboard Output ----
-outputToDashboard = {
-    "camera_status": "Disconnected",
-    "frame_count": 0,
-    "resolution": "N/A",
-    "fps": 0
-}
+from Controllers.Pacing import Rate
+from Controllers.TelemetryBus import bus as telemetry_bus
+
+# ---- Dashboard Output (CameraRecord on the telemetry bus) ----
+telemetry = telemetry_bus.topic("camera")
 
 def run():
     """
     Main function to initialize camera and capture frames
     """
-    pygame.init()
-    clock = pygame.time.Clock()
+    # Imported here so loading this module (e.g. from MainGUI) doesn't pull in OpenCV
+    import cv2
+
+    rate = Rate(10)
     start_time = time.time()
     
     # Create directory for saved frames if needed
@@ -54,15 +51,13 @@ def run():
         height = int(camera.get(cv2.CAP_PROP_FRAME_HEIGHT))
         fps = int(camera.get(cv2.CAP_PROP_FPS))
         
-        outputToDashboard["camera_status"] = "Connected"
-        outputToDashboard["resolution"] = f"{width}x{height}"
-        outputToDashboard["fps"] = fps
+        telemetry.publish(status="Connected", resolution=f"{width}x{height}", fps=fps)
         
         print(f"Camera initialized successfully")
         print(f"Resolution: {width}x{height}")
         print(f"FPS: {fps}")
     else:
-        outputToDashboard["camera_status"] = "Failed to connect"
+        telemetry.publish(status="Failed to connect")
         print("ERROR: Failed to initialize camera")
         print("Troubleshooting tips:")
         print("  - Check physical connections")
@@ -87,12 +82,11 @@ def run():
                 current_fps = frame_count / elapsed_time if elapsed_time > 0 else 0
                 
                 # Update dashboard data
-                outputToDashboard["frame_count"] = frame_count
-                outputToDashboard["fps"] = round(current_fps, 1)
+                telemetry.publish(frame_count=frame_count, fps=round(current_fps, 1))
                 
                 # Print status (every 10 frames to reduce console output)
                 if frame_count % 10 == 0:
-                    print(f"Status: {outputToDashboard['camera_status']} | "
+                    print(f"Status: {telemetry.get('status')} | "
                           f"Frame: {frame_count} | "
                           f"FPS: {round(current_fps, 1)}")
                 
@@ -111,7 +105,7 @@ def run():
                     print(f"Saved {filename}")
                 
                 # Example: Calculate average brightness
-                brightness = np.mean(frame)
+                brightness = frame.mean()
                 if frame_count % 30 == 0:
                     print(f"Average brightness: {brightness:.1f}")
                     
@@ -120,17 +114,12 @@ def run():
             else:
                 print("WARNING: Failed to capture frame")
             
-            # Handle pygame events for clean exit
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-            
             # Exit if ESC key pressed (when display is enabled)
             if display_enabled and cv2.waitKey(1) & 0xFF == 27:
                 running = False
             
             # Limit framerate to not overwhelm the Pi
-            clock.tick(10)
+            rate.sleep()
     
     except KeyboardInterrupt:
         print("\nTest stopped by user")
@@ -140,7 +129,6 @@ def run():
         camera.release()
         if display_enabled:
             cv2.destroyAllWindows()
-        pygame.quit()
         
         print("\nCamera test complete")
         print(f"Total frames captured: {frame_count}")
@@ -0,0 +1,120 @@
+"""
+Fleet Broadcast Benchmark for the Self-Driving Car
+
+Starts N simulated cars on localhost (asyncio servers that speak the framed
+protocol and ack like Networking/Server.py), points a CarFleet at them and
+broadcasts commands at the rate ClientWeb sends them. One car stops reading
+its socket after the first command and one address has nothing listening, to
+show that neither holds up the rest of the fleet.
+
+Reports the cost of one broadcast() call (the fan-out pass a web request pays)
+and the broadcast-to-delivery latency per healthy car.
+
+    python -m TestScripts.FleetBenchmark
+    python -m TestScripts.FleetBenchmark --cars 20 --rate 10 --duration 5
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+
+from Networking.Fleet import CarFleet
+from Networking.Protocol import FrameDecoder, encode_reply
+
+HOST = "127.0.0.1"
+BASE_PORT = 5100
+
+# car ID -> list of (command, perf_counter() when the car received it)
+received = {}
+
+
+async def simulated_car(car_id, reader, writer, stall):
+    decoder = FrameDecoder()
+    while True:
+        data = await reader.read(4096)
+        if not data:
+            break
+        now = time.perf_counter()
+        for message in decoder.feed(data):
+            if "ping" in message:
+                writer.write(encode_reply(pong=message["ping"], t=message.get("t"), rx=time.time(), tx=time.time()))
+            elif "command" in message:
+                received[car_id].append((message["command"], now))
+                if "id" in message:
+                    writer.write(encode_reply(ack=message["id"], rx=time.time(), done=time.time()))
+        if stall and received[car_id]:
+            await asyncio.sleep(3600)  # a car that has gone unresponsive but kept the connection open
+
+
+def start_cars(car_ids, stalled):
+    ready = threading.Event()
+
+    async def serve():
+        for i, car_id in enumerate(car_ids):
+            received[car_id] = []
+            handler = (lambda car_id, stall: lambda r, w: simulated_car(car_id, r, w, stall))(car_id, car_id in stalled)
+            await asyncio.start_server(handler, HOST, BASE_PORT + i)
+        ready.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=asyncio.run, args=(serve(),), daemon=True).start()
+    ready.wait()
+
+
+def percentile(values, pct):
+    index = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Broadcast cost and delivery latency for CarFleet")
+    parser.add_argument("--cars", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=10.0, help="broadcasts per second")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds")
+    args = parser.parse_args()
+
+    car_ids = [f"car{i + 1}" for i in range(args.cars)]
+    stalled = {car_ids[0]}
+    live = car_ids[:-1]  # the last car's address has no server behind it
+    start_cars(live, stalled)
+
+    fleet = CarFleet({car_id: (HOST, BASE_PORT + i) for i, car_id in enumerate(car_ids)}, probe_interval=0.5)
+    fleet.start()
+    time.sleep(1.0)  # connect
+
+    commands = ["forward", "left", "right", "backward"]
+    broadcast_at = {}
+    fanout_us = []
+    period = 1.0 / args.rate
+    next_send = time.perf_counter()
+    for seq in range(int(args.duration * args.rate)):
+        time.sleep(max(0.0, next_send - time.perf_counter()))
+        # A distinct name per broadcast so deliveries can be matched; the relay treats it as motion
+        command = f"{commands[seq % len(commands)]}:{seq}"
+        started = time.perf_counter()
+        fleet.broadcast(command)
+        fanout_us.append((time.perf_counter() - started) * 1e6)
+        broadcast_at[command] = started
+        next_send += period
+    time.sleep(1.0)
+
+    fanout_us.sort()
+    print(f"{args.cars} cars, {len(fanout_us)} broadcasts "
+          f"(1 stalled car, 1 unreachable). Latency in ms.")
+    print(f"broadcast() call: p50 {percentile(fanout_us, 50):.1f} us, "
+          f"p99 {percentile(fanout_us, 99):.1f} us, max {fanout_us[-1]:.1f} us")
+    healthy = [c for c in live if c not in stalled]
+    delays = sorted((at - broadcast_at[cmd]) * 1000 for c in healthy for cmd, at in received[c] if cmd in broadcast_at)
+    expected = len(healthy) * len(broadcast_at)
+    print(f"delivery to {len(healthy)} healthy cars: {len(delays)}/{expected} received, "
+          f"p50 {percentile(delays, 50):.3f}, p99 {percentile(delays, 99):.3f}, max {delays[-1]:.3f}")
+    print("car     | state | sent | coalesced | dropped")
+    for car_id, health in fleet.health().items():
+        print(f"{car_id:<7} | {health['state']:<5} | {health['sent']:>4} | {health['coalesced']:>9} | {health['dropped']:>7}")
+    fleet.stop()
+
+
+# Only run if executed directly
+if __name__ == "__main__":
+    run()
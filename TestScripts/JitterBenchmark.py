@@ -0,0 +1,271 @@
+"""
+Control-Loop Jitter Benchmark for the Self-Driving Car
+
+Runs a 100 Hz control loop, timed the same way as MotorController's, while a
+camera pipeline runs flat out next to it. It then compares the two deployments:
+- single:    everything as threads in one process (main.py)
+- processes: control and perception in separate processes (Processes.py), with
+             telemetry in Controllers.SharedState and commands on a Pipe
+
+For each mode it reports the loop's jitter (|tick period - 10 ms|) at p50, p99
+and max, the overruns, the command latency (sent -> picked up by the control
+side) at p50/p99 and how many frames/s the camera load managed.
+
+The load is synthetic by default: a 640x480 frame per iteration, its mean, a
+pure-Python pass over a subsample (the part that holds the GIL, like a
+detector written in Python) and a 160x120 preview. Use --camera to read the
+real camera with OpenCV instead. Off the Pi, and on fewer cores than the Pi's
+four, the numbers only show the trend.
+
+    python -m TestScripts.JitterBenchmark
+    python -m TestScripts.JitterBenchmark --seconds 20 --work 4 --camera
+"""
+
+import argparse
+import multiprocessing
+import queue
+import threading
+import time
+
+CONTROL_RATE = 100     # Hz, as MotorController.control_rate
+COMMAND_RATE = 50      # commands/s sent while the loop runs
+FRAME_SIZE = (640, 480)
+PREVIEW_SIZE = (160, 120)
+
+
+# ---- Control side ----
+def control_loop(seconds, rate, results, publish):
+    """MotorController.control_loop's timing, with a stand-in control step."""
+    from Controllers.TelemetryBus import bus
+    ultrasonic = bus.topic("ultrasonic")
+    period = 1.0 / rate
+    jitters = []
+    overruns = 0
+    duty = 0.0
+
+    last = time.perf_counter()
+    next_tick = last + period
+    deadline = last + seconds
+    while last < deadline:
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+        now = time.perf_counter()
+        dt = now - last
+        last = now
+        # Control step: read a sensor, ramp the duty, publish the motor record
+        distance = ultrasonic.get("distance") or 1.0
+        duty += max(-2.0, min(2.0, (50.0 if distance > 0.3 else 0.0) - duty))
+        publish(left_duty=duty, right_duty=duty, left_direction="forward", right_direction="forward")
+        jitters.append(abs(dt - period))
+
+        next_tick += period
+        if next_tick < time.perf_counter():
+            overruns += 1
+            next_tick = time.perf_counter() + period
+    results["jitters"] = jitters
+    results["overruns"] = overruns
+
+
+def receive_commands(receive, results):
+    latencies = []
+    while True:
+        item = receive()
+        if item is None:
+            break
+        command, sent = item
+        latencies.append(time.time() - sent)
+    results["latencies"] = latencies
+
+
+def run_control(seconds, rate, receive):
+    from Controllers.TelemetryBus import bus
+    motor = bus.topic("motor")
+    results = {}
+    consumer = threading.Thread(target=receive_commands, args=(receive, results), daemon=True)
+    consumer.start()
+    control_loop(seconds, rate, results, motor.publish)
+    consumer.join(timeout=5.0)
+    return results
+
+
+# ---- Camera load ----
+def open_source(camera):
+    """A function returning one BGR frame per call."""
+    import numpy as np
+    if camera:
+        import cv2
+        capture = cv2.VideoCapture(0)
+        capture.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_SIZE[0])
+        capture.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_SIZE[1])
+        if not capture.isOpened():
+            raise RuntimeError("could not open the camera")
+
+        def read():
+            ok, frame = capture.read()
+            return frame if ok else None
+        return read
+
+    width, height = FRAME_SIZE
+    base = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    frame = np.empty_like(base)
+    counter = [0]
+
+    def read():
+        counter[0] = (counter[0] + 1) % 256
+        np.add(base, counter[0], out=frame, casting="unsafe")
+        return frame
+    return read
+
+
+def camera_load(seconds, camera, work, on_preview=None):
+    """Process frames as fast as they come for `seconds`; returns frames/s."""
+    from Controllers.TelemetryBus import bus
+    topic = bus.topic("camera")
+    read = open_source(camera)
+    width, height = FRAME_SIZE
+    step = max(1, 16 // work)
+    frames = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        frame = read()
+        if frame is None:
+            continue
+        brightness = frame.mean()
+        # Pure-Python pass over a subsample: holds the GIL the whole time
+        hot = sum(1 for value in frame[::step, ::step, 1].ravel().tolist() if value > brightness)
+        preview = frame[::height // PREVIEW_SIZE[1], ::width // PREVIEW_SIZE[0]]
+        if on_preview:
+            on_preview(preview)
+        frames += 1
+        topic.publish(status="Active" if hot else "Dark", frame_count=frames,
+                      resolution=f"{width}x{height}", fps=round(frames / (time.perf_counter() - started), 1))
+    return round(frames / (time.perf_counter() - started), 1)
+
+
+# ---- Modes ----
+def send_commands(seconds, put):
+    period = 1.0 / COMMAND_RATE
+    deadline = time.perf_counter() + seconds
+    names = ["forward", "left", "right", "stop"]
+    i = 0
+    while time.perf_counter() < deadline:
+        put((names[i % len(names)], time.time()))
+        i += 1
+        time.sleep(period)
+    put(None)
+
+
+def single_process(args):
+    commands = queue.SimpleQueue()
+    load = {}
+
+    def run_load():
+        load["fps"] = camera_load(args.seconds + 1.0, args.camera, args.work, on_preview=lambda preview: preview.copy())
+
+    loader = threading.Thread(target=run_load, daemon=True)
+    loader.start()
+    time.sleep(0.5)  # let the load get going first
+    control = {}
+    controller = threading.Thread(target=lambda: control.update(run_control(args.seconds, args.rate, commands.get)),
+                                  daemon=True)
+    controller.start()
+    send_commands(args.seconds, commands.put)
+    controller.join()
+    loader.join()
+    return dict(control, fps=load.get("fps"))
+
+
+def control_child(state_name, commands, results, go, seconds, rate):
+    from Controllers.SharedState import SharedState
+    state = SharedState(state_name)
+    state.export(["motor"])
+    state.mirror(["camera", "ultrasonic"])
+    results.put(("ready", None))
+    go.wait()
+    results.put(("control", run_control(seconds, rate, commands.recv)))
+    state.close()
+
+
+def load_child(state_name, results, go, seconds, camera, work):
+    from Controllers.SharedState import SharedState
+    state = SharedState(state_name)
+    state.export(["camera"])
+    state.mirror(["motor"])
+    results.put(("ready", None))
+    go.wait()
+    try:
+        fps = camera_load(seconds + 1.0, camera, work,
+                          on_preview=lambda preview: state.write_frame(preview.copy()))
+    except Exception as e:
+        print("[JitterBenchmark] camera load failed:", e)
+        fps = None
+    results.put(("load", fps))
+    state.close()
+
+
+def processes(args):
+    from Controllers.SharedState import SharedState
+    context = multiprocessing.get_context("spawn")
+    state = SharedState(create=True)
+    receiver, sender = context.Pipe(duplex=False)
+    results = context.SimpleQueue()
+    go = context.Event()
+    children = [
+        context.Process(target=control_child, args=(state.name, receiver, results, go, args.seconds, args.rate)),
+        context.Process(target=load_child, args=(state.name, results, go, args.seconds, args.camera, args.work)),
+    ]
+    try:
+        for child in children:
+            child.start()
+        for _ in children:
+            results.get()  # "ready"
+        go.set()
+        time.sleep(0.5)
+        send_commands(args.seconds - 0.5, sender.send)
+        collected = dict(results.get() for _ in children)
+        for child in children:
+            child.join(timeout=5.0)
+    finally:
+        for child in children:
+            if child.is_alive():
+                child.terminate()
+        state.close()
+    return dict(collected["control"], fps=collected["load"])
+
+
+# ---- Report ----
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else float("nan")
+
+
+def report(mode, result):
+    jitters = [j * 1000 for j in result["jitters"]]
+    latencies = [l * 1000 for l in result.get("latencies", [])]
+    fps = f"{result['fps']:.1f}" if result.get("fps") is not None else "-"
+    print(f"{mode:<10} | {percentile(jitters, 50):7.3f} {percentile(jitters, 99):7.3f} {max(jitters):7.2f} | "
+          f"{result['overruns']:8} | {percentile(latencies, 50):7.3f} {percentile(latencies, 99):7.3f} | {fps:>7}")
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Control-loop jitter under camera load: threads vs processes")
+    parser.add_argument("--modes", nargs="+", default=["single", "processes"], choices=["single", "processes"])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--rate", type=int, default=CONTROL_RATE, help="control loop rate (Hz)")
+    parser.add_argument("--work", type=int, default=2, help="pure-Python work per frame (1 = light, 8 = heavy)")
+    parser.add_argument("--camera", action="store_true", help="process the real camera instead of synthetic frames")
+    args = parser.parse_args()
+
+    print(f"{args.rate} Hz control loop for {args.seconds:.0f} s under camera load, "
+          f"{multiprocessing.cpu_count()} CPU(s)")
+    print(f"{'mode':<10} | jitter ms p50 / p99 / max | overruns | cmd ms p50 / p99 | frames/s")
+    for mode in args.modes:
+        report(mode, single_process(args) if mode == "single" else processes(args))
+
+
+# Only run if executed directly
+if __name__ == "__main__":
+    run()
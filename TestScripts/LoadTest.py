@@ -0,0 +1,218 @@
+"""
+Network Load Test for the Self-Driving Car
+
+Starts Networking/Server.py in its own process with a simulated motor backend
+(the real CommandScheduler in front of a handler that burns a fixed amount of
+CPU instead of touching GPIO), then drives it from N synthetic clients on
+localhost. Reports throughput, p50/p99/p999 command latency and the CPU used
+by the server-side processes, so results can be compared across releases.
+
+Targets:
+- server: clients speak the framed TCP protocol to Server.py; latency is
+          send -> {"ack": id} once process_command has taken the command
+- web:    clients POST /command to ClientWeb.py (keep-alive if offered), which relays to
+          Server.py; latency is the HTTP round trip. ClientWeb runs under the WSGI
+          server it would pick itself (--web-server, default "auto")
+
+    python -m TestScripts.LoadTest --clients 1 10 100 --rate 10 --duration 10
+    python -m TestScripts.LoadTest --target web --clients 10 --rate 20 --web-server waitress
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import resource
+import time
+
+HOST = "127.0.0.1"
+SERVER_PORT = 5060
+WEB_PORT = 8060
+
+COMMANDS = ["forward", "left", "forward", "right", "backward", "stop"]
+
+
+# ---- Server-side processes ----
+def simulated_backend(cost_us):
+    """A stand-in for MotorController.process_command with the same queueing in front."""
+    from Controllers.CommandScheduler import CommandScheduler
+
+    def apply_command(cmd):
+        end = time.perf_counter() + cost_us / 1e6
+        while time.perf_counter() < end:
+            pass
+
+    return CommandScheduler(apply_command, name="SimMotor").submit
+
+
+def run_server(port, cost_us):
+    from Networking import Server
+    Server.VERBOSE = False
+    Server.start_server(HOST, port, handler=simulated_backend(cost_us), telemetry_port=None)
+
+
+def run_web(web_port, server_port, web_server):
+    import logging
+    from Networking import ClientWeb
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    logging.getLogger("waitress.queue").setLevel(logging.ERROR)  # warns on every queued request
+    ClientWeb.print = lambda *args, **kwargs: None  # per-command logging would dominate the profile
+    web_server = ClientWeb.select_server(web_server)
+    ClientWeb.create_links({ClientWeb.DEFAULT_CAR: (HOST, server_port)})
+    ClientWeb.fleet.start()
+    ClientWeb.run_flask(HOST, web_port, server=web_server)
+
+
+# ---- Synthetic clients ----
+class Results:
+    def __init__(self):
+        self.latencies = []
+        self.sent = 0
+        self.errors = 0
+
+
+async def paced(rate, duration, offset):
+    """Yields on an open-loop schedule, so a slow server can't slow the clients down."""
+    period = 1.0 / rate
+    next_send = time.perf_counter() + offset
+    end = next_send + duration
+    while next_send < end:
+        await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+        yield
+        next_send += period
+
+
+async def server_client(client_id, rate, duration, offset, results):
+    reader, writer = await asyncio.open_connection(HOST, SERVER_PORT)
+    sent_at = {}
+
+    async def read_acks():
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            msg_id = json.loads(line).get("ack")
+            if msg_id in sent_at:
+                results.latencies.append(time.perf_counter() - sent_at.pop(msg_id))
+
+    reader_task = asyncio.create_task(read_acks())
+    seq = 0
+    async for _ in paced(rate, duration, offset):
+        msg_id = client_id * 1000000 + seq
+        message = json.dumps({"command": COMMANDS[seq % len(COMMANDS)], "id": msg_id}) + "\n"
+        sent_at[msg_id] = time.perf_counter()
+        writer.write(message.encode())
+        results.sent += 1
+        seq += 1
+    await asyncio.sleep(1.0)  # let outstanding acks arrive
+    results.errors += len(sent_at)
+    reader_task.cancel()
+    writer.close()
+
+
+async def web_client(client_id, rate, duration, offset, results):
+    reader = writer = None
+    seq = 0
+    async for _ in paced(rate, duration, offset):
+        body = json.dumps({"command": COMMANDS[seq % len(COMMANDS)]}).encode()
+        request = (f"POST /command HTTP/1.1\r\nHost: {HOST}\r\nContent-Type: application/json\r\n"
+                   f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+        started = time.perf_counter()
+        results.sent += 1
+        seq += 1
+        try:
+            # Servers that don't keep connections alive pay for a new one every request, as browsers do
+            if writer is None:
+                reader, writer = await asyncio.open_connection(HOST, WEB_PORT)
+            writer.write(request)
+            status = await reader.readline()
+            keep_alive = status.startswith(b"HTTP/1.1")
+            length = 0
+            while True:
+                header = await reader.readline()
+                if header in (b"\r\n", b""):
+                    break
+                name, _, value = header.partition(b":")
+                if name.lower() == b"content-length":
+                    length = int(value)
+                elif name.lower() == b"connection":
+                    keep_alive = value.strip().lower() == b"keep-alive"
+            await reader.readexactly(length)
+            results.latencies.append(time.perf_counter() - started)
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            results.errors += 1
+            keep_alive = False
+        if not keep_alive:
+            writer.close()
+            writer = None
+    if writer:
+        writer.close()
+
+
+def percentile(values, pct):
+    index = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+def run_round(target, num_clients, rate, duration, cost_us, web_server="auto"):
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=run_server, args=(SERVER_PORT, cost_us), daemon=True)]
+    if target == "web":
+        procs.append(ctx.Process(target=run_web, args=(WEB_PORT, SERVER_PORT, web_server), daemon=True))
+    cpu_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    for proc in procs:
+        proc.start()
+    time.sleep(2.0)  # imports + bind
+
+    client = server_client if target == "server" else web_client
+    results = Results()
+
+    async def drive():
+        # Spread the clients across one period like independent operators would be
+        await asyncio.gather(*(client(i, rate, duration, i / rate / num_clients, results)
+                               for i in range(num_clients)))
+
+    started = time.perf_counter()
+    asyncio.run(drive())
+    wall = time.perf_counter() - started
+
+    for proc in procs:
+        proc.terminate()
+        proc.join()
+    cpu_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # Includes the ~2 s of startup imports, which is small next to a long round
+    cpu = (cpu_after.ru_utime - cpu_before.ru_utime) + (cpu_after.ru_stime - cpu_before.ru_stime)
+
+    latencies = sorted(seconds * 1000 for seconds in results.latencies)
+    if not latencies:
+        print(f"{num_clients:>7} | no responses ({results.errors} errors)")
+        return
+    print(f"{num_clients:>7} | {results.sent:>7} | {results.errors:>5} | {len(latencies) / wall:>8.1f} | "
+          f"{percentile(latencies, 50):>7.3f} | {percentile(latencies, 99):>7.3f} | "
+          f"{percentile(latencies, 99.9):>7.3f} | {latencies[-1]:>8.3f} | {cpu / (wall + 2.0) * 100:>5.1f}%")
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Localhost load test for Server.py / ClientWeb.py")
+    parser.add_argument("--target", choices=["server", "web"], default="server")
+    parser.add_argument("--web-server", default="auto", choices=["auto", "gevent", "waitress", "dev"],
+                        help="WSGI server for --target web (see ClientWeb.select_server)")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--rate", type=float, default=10.0, help="commands per second per client")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per round")
+    parser.add_argument("--backend-cost", type=float, default=50.0,
+                        help="simulated process_command cost in microseconds")
+    args = parser.parse_args()
+
+    target = f"web ({args.web_server})" if args.target == "web" else args.target
+    print(f"Target: {target}, {args.rate}/s per client, {args.duration}s per round, "
+          f"backend {args.backend_cost:.0f} us/command. Latency in ms.")
+    print("clients |    sent | errs | cmds/s   |     p50 |     p99 |    p999 |      max |   cpu")
+    for num_clients in args.clients:
+        run_round(args.target, num_clients, args.rate, args.duration, args.backend_cost, args.web_server)
+
+
+# Only run if executed directly
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,71 @@
+"""
+Wire Protocol Benchmark for the Self-Driving Car
+
+Compares the per-message parse cost of the old Server.client_handler path
+(json.loads on every recv() chunk, one message per chunk) with
+Networking/Protocol.FrameDecoder reading newline-delimited JSON and binary
+frames, with 1, 10 and 100 messages arriving in a single read.
+
+Also shows the old path failing on two coalesced messages.
+
+    python -m TestScripts.ProtocolBenchmark
+"""
+
+import json
+import time
+
+from Networking.Protocol import FrameDecoder, encode_json, encode_binary
+
+COMMANDS = ["forward", "left", "forward", "right", "backward", "stop"]
+TOTAL_MESSAGES = 60000
+
+
+def legacy_parse(data):
+    """The parsing Server.client_handler did before framing."""
+    try:
+        message = json.loads(data.decode())
+        return message.get("command", "")
+    except json.JSONDecodeError:
+        return data.decode().strip()
+
+
+def time_legacy():
+    chunks = [json.dumps({"command": c}).encode() for c in COMMANDS]
+    start = time.perf_counter()
+    for i in range(TOTAL_MESSAGES):
+        legacy_parse(chunks[i % len(chunks)])
+    return (time.perf_counter() - start) / TOTAL_MESSAGES
+
+
+def time_decoder(encoder, per_read):
+    frames = [encoder(c) for c in COMMANDS]
+    batch = b"".join(frames[i % len(frames)] for i in range(per_read))
+    decoder = FrameDecoder()
+    reads = TOTAL_MESSAGES // per_read
+    parsed = 0
+    start = time.perf_counter()
+    for _ in range(reads):
+        parsed += len(decoder.feed(batch))
+    elapsed = time.perf_counter() - start
+    assert parsed == reads * per_read
+    return elapsed / parsed
+
+
+def run():
+    coalesced = b'{"command": "forward"}{"command": "forward"}'
+    print(f"Old path on coalesced input:  {legacy_parse(coalesced)!r}")
+    print(f"FrameDecoder on same input:   {FrameDecoder().feed(coalesced)}")
+    print()
+
+    legacy = time_legacy()
+    print(f"{'path':<28} {'msgs/read':>9} {'us/msg':>8} {'vs old':>7}")
+    print(f"{'old json.loads per chunk':<28} {1:>9} {legacy * 1e6:>8.2f} {1.0:>6.2f}x")
+    for name, encoder in (("framed JSON lines", encode_json), ("binary frames", encode_binary)):
+        for per_read in (1, 10, 100):
+            cost = time_decoder(encoder, per_read)
+            print(f"{name:<28} {per_read:>9} {cost * 1e6:>8.2f} {legacy / cost:>6.2f}x")
+
+
+# Only run if executed directly
+if __name__ == "__main__":
+    run()
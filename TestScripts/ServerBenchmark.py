@@ -0,0 +1,111 @@
+"""
+Command Server Benchmark for the Self-Driving Car
+
+Starts Networking/Server.py on localhost with a stand-in for
+MotorController.process_command, connects N clients that each send commands
+at the rate ClientWeb uses (10/s), and reports the latency from send to
+process_command being called at 1, 10 and 100 concurrent clients.
+
+Runs anywhere (no GPIO needed):
+    python -m TestScripts.ServerBenchmark
+    python -m TestScripts.ServerBenchmark --clients 1 10 100 --rate 10 --duration 5
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+
+from Networking import Server
+from Networking.Protocol import encode_json
+
+HOST = "127.0.0.1"
+PORT = 5050
+
+# (client, seq) -> perf_counter() when sent / when process_command saw it
+sent_at = {}
+processed_at = {}
+
+
+def simulated_process_command(cmd):
+    """Records when each benchmark command reaches the motor layer."""
+    if cmd.startswith("bench:"):
+        _, client, seq = cmd.split(":")
+        processed_at[(int(client), int(seq))] = time.perf_counter()
+
+
+async def client(client_id, rate, duration):
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    period = 1.0 / rate
+    next_send = time.perf_counter()
+    end = next_send + duration
+    seq = 0
+    while next_send < end:
+        message = encode_json(f"bench:{client_id}:{seq}")
+        sent_at[(client_id, seq)] = time.perf_counter()
+        writer.write(message)
+        await writer.drain()
+        seq += 1
+        next_send += period
+        await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+    # Let the last command land before hanging up
+    await asyncio.sleep(0.2)
+    writer.close()
+
+
+def percentile(values, pct):
+    index = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+def run_round(num_clients, rate, duration):
+    sent_at.clear()
+    processed_at.clear()
+
+    async def drive():
+        # Stagger the clients across one period like independent browsers would be
+        tasks = []
+        for i in range(num_clients):
+            tasks.append(asyncio.create_task(client(i, rate, duration)))
+            await asyncio.sleep(1.0 / rate / num_clients)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(drive())
+
+    latencies = sorted((processed_at[key] - sent) * 1000
+                       for key, sent in sent_at.items() if key in processed_at)
+    lost = len(sent_at) - len(latencies)
+    if not latencies:
+        print(f"{num_clients:>7} | no commands processed")
+        return
+    print(f"{num_clients:>7} | {len(latencies):>6} | {lost:>4} | "
+          f"{percentile(latencies, 50):>7.3f} | {percentile(latencies, 90):>7.3f} | "
+          f"{percentile(latencies, 99):>7.3f} | {latencies[-1]:>7.3f}")
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Command latency benchmark for Networking/Server.py")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--rate", type=float, default=10.0, help="commands per second per client")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per round")
+    args = parser.parse_args()
+
+    Server.VERBOSE = False
+    threading.Thread(target=Server.start_server,
+                     kwargs={"host": HOST, "port": PORT, "handler": simulated_process_command,
+                             "telemetry_port": None},
+                     daemon=True).start()
+    time.sleep(0.5)
+
+    print(f"Rate: {args.rate}/s per client, {args.duration}s per round. Latency in ms (send -> process_command)")
+    print("clients |   cmds | lost |     p50 |     p90 |     p99 |     max")
+    for num_clients in args.clients:
+        run_round(num_clients, args.rate, args.duration)
+
+    # Give the server a moment to finish closing the last round's connections
+    time.sleep(0.5)
+
+
+# Only run if executed directly
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,110 @@
+"""
+Stalled-Car Regression Test for CarRelay / CarFleet
+
+A fake car on localhost answers pings like Networking/Server.py, except that
+it can go quiet for a while first. Checks that:
+- stall:  after the car stalls for longer than the relay's socket timeout
+          (2 s) and then recovers, replies are read again and the fleet shows
+          the car "up" (it used to stay "stale" forever)
+- hangup: when the car closes the connection, the relay notices and reconnects
+
+Exits non-zero if a check fails.
+
+    python -m TestScripts.StallTest
+"""
+
+import socket
+import sys
+import threading
+import time
+
+from Networking.Fleet import CarFleet
+from Networking.Protocol import FrameDecoder, encode_reply
+
+PROBE_INTERVAL = 0.5
+STALL_SECONDS = 3.5
+
+
+def fake_car(listener, stall, hang_up_after=None):
+    """Serve one connection at a time: read and ignore everything for `stall` s, then answer pings."""
+    while True:
+        try:
+            conn, _ = listener.accept()
+        except OSError:
+            return
+        started = time.time()
+        decoder = FrameDecoder()
+        with conn:
+            conn.settimeout(0.1)
+            while True:
+                if hang_up_after is not None and time.time() - started > hang_up_after:
+                    hang_up_after = None  # only the first connection
+                    break
+                try:
+                    data = conn.recv(4096)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    break
+                if not data:
+                    break
+                received = time.time()
+                if received - started < stall:
+                    continue
+                for message in decoder.feed(data):
+                    if "ping" in message:
+                        conn.sendall(encode_reply(pong=message["ping"], t=message.get("t"), rx=received,
+                                                  tx=time.time()))
+
+
+def run_case(name, stall, hang_up_after, wait, check):
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    threading.Thread(target=fake_car, args=(listener, stall, hang_up_after), daemon=True).start()
+
+    fleet = CarFleet({"car": listener.getsockname()}, name="StallTest", probe_interval=PROBE_INTERVAL)
+    fleet.start()
+    time.sleep(wait)
+    relay = fleet.get("car")
+    health = fleet.health()["car"]
+    fleet.stop()
+    listener.close()
+
+    problems = check(relay, health)
+    print(f"{name:<8} | {'ok' if not problems else 'FAIL: ' + '; '.join(problems)} | state {health['state']}, "
+          f"rtt {health['rtt_ms']} ms, connects {health['connects']}")
+    return not problems
+
+
+def check_stall(relay, health):
+    problems = []
+    if health["state"] != "up":
+        problems.append(f"state is {health['state']!r}")
+    if time.time() - relay.last_reply > 2 * PROBE_INTERVAL:
+        problems.append("no recent reply")
+    if not relay.latency["rtt_ms"]:
+        problems.append("rtt never measured")
+    return problems
+
+
+def check_hangup(relay, health):
+    problems = []
+    if health["connects"] < 2:
+        problems.append("did not reconnect")
+    if health["state"] != "up":
+        problems.append(f"state is {health['state']!r}")
+    return problems
+
+
+def run():
+    results = [
+        run_case("stall", STALL_SECONDS, None, STALL_SECONDS + 2.0, check_stall),
+        run_case("hangup", 0.0, 1.0, 3.0, check_hangup),
+    ]
+    sys.exit(0 if all(results) else 1)
+
+
+# Only run if executed directly
+if __name__ == "__main__":
+    run()
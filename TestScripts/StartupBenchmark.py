@@ -0,0 +1,163 @@
+"""
+Startup Benchmark for the Self-Driving Car
+
+Launches fresh Python processes and measures, from the moment each process is
+spawned:
+- gui:     time to the first drawn frame of GUI/MainWindow.py's dashboard
+- maingui: the same for MainGUI.py
+- sensor:  time to the first gyro and ultrasonic samples on the telemetry bus
+           (main.py's sensor tasks)
+
+Each run also reports resident memory and which heavy modules ended up loaded
+(cv2, numpy, pygame, tkinter). For reference it times a bare import of each
+heavy module, which is what the lazy imports keep off the startup path.
+Off the Pi (no hardware or no display) the affected targets report why they
+could not start.
+
+    python -m TestScripts.StartupBenchmark
+    python -m TestScripts.StartupBenchmark --targets sensor --runs 10
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ["cv2", "numpy", "pygame", "tkinter"]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def since_launch():
+    """ms since the parent spawned this process (wall clock shared across processes)."""
+    return round((time.time() - float(os.environ["STARTUP_LAUNCHED"])) * 1000, 1)
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except (OSError, ValueError):
+        return None
+
+
+def report(**result):
+    result["rss_mb"] = rss_mb()
+    result["loaded"] = [name for name in HEAVY_MODULES if name in sys.modules]
+    print("RESULT " + json.dumps(result), flush=True)
+
+
+def child_gui(module):
+    import tkinter as tk
+    if module == "maingui":
+        from MainGUI import DarkGUI
+    else:
+        from GUI.MainWindow import DarkGUI
+    imported = since_launch()
+    root = tk.Tk()
+    app = DarkGUI(root)
+    root.update()  # map the window and draw it once
+    report(imported_ms=imported, first_frame_ms=since_launch())
+    app.on_close()
+
+
+def child_sensor(timeout):
+    import threading
+    import main
+    from Controllers.TelemetryBus import bus
+    imported = since_launch()
+    if not main.hardware_available:
+        report(imported_ms=imported, error="sensor modules unavailable (not on the Pi?)")
+        return
+
+    first = {}
+    done = threading.Event()
+
+    def watch(name):
+        def on_sample(record):
+            if name not in first:
+                first[name] = since_launch()
+                if len(first) == 2:
+                    done.set()
+        bus.topic(name).subscribe(on_sample)
+
+    watch("gyro")
+    watch("ultrasonic")
+    main.start_sensors()
+    done.wait(timeout)
+    report(imported_ms=imported, first_gyro_ms=first.get("gyro"), first_ultrasonic_ms=first.get("ultrasonic"))
+
+
+def child_import(module):
+    started = time.perf_counter()
+    try:
+        __import__(module)
+    except ImportError as e:
+        report(error=str(e))
+        return
+    report(import_ms=round((time.perf_counter() - started) * 1000, 1))
+
+
+def launch(target, timeout):
+    env = dict(os.environ, STARTUP_LAUNCHED=repr(time.time()))
+    try:
+        proc = subprocess.run([sys.executable, "-m", "TestScripts.StartupBenchmark", "--child", target,
+                               "--timeout", str(timeout)],
+                              cwd=ROOT, env=env, capture_output=True, text=True, timeout=timeout + 30)
+    except subprocess.TimeoutExpired:
+        return {"error": "timed out"}
+    for line in proc.stdout.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT "):])
+    lines = (proc.stderr or proc.stdout).strip().splitlines()
+    return {"error": lines[-1] if lines else f"exit code {proc.returncode}"}
+
+
+def summarize(target, results):
+    errors = [r["error"] for r in results if "error" in r]
+    good = [r for r in results if "error" not in r]
+    if not good:
+        print(f"{target:<14} | unavailable: {errors[0]}")
+        return
+    metrics = [k for k in good[0] if k.endswith("_ms")]
+    parts = []
+    for metric in metrics:
+        values = sorted(r[metric] for r in good if r.get(metric) is not None)
+        if values:
+            parts.append(f"{metric[:-3]} {values[len(values) // 2]:.0f}/{values[-1]:.0f} ms")
+        else:
+            parts.append(f"{metric[:-3]} none")
+    parts.append(f"RSS {good[-1]['rss_mb']} MB")
+    parts.append(f"loaded: {', '.join(good[-1]['loaded']) or '-'}")
+    print(f"{target:<14} | " + " | ".join(parts))
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Time to first GUI frame and first sensor sample")
+    parser.add_argument("--targets", nargs="+", default=["gui", "maingui", "sensor"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for first samples")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        if args.child in ("gui", "maingui"):
+            child_gui(args.child)
+        elif args.child == "sensor":
+            child_sensor(args.timeout)
+        elif args.child.startswith("import:"):
+            child_import(args.child[len("import:"):])
+        return
+
+    print(f"{args.runs} fresh processes per target; times are median/max ms since spawn.")
+    for target in args.targets:
+        summarize(target, [launch(target, args.timeout) for _ in range(args.runs)])
+    print("Bare import cost of the lazily loaded modules:")
+    for module in HEAVY_MODULES:
+        summarize(f"import {module}", [launch(f"import:{module}", args.timeout) for _ in range(args.runs)])
+
+
+# Only run if executed directly
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,158 @@
+"""
+Web Front-End Benchmark for the Self-Driving Car
+
+Runs Networking/ClientWeb.py in its own process under each WSGI server and
+hammers it from C concurrent keep-alive clients on localhost (closed loop:
+each client sends its next request as soon as the last one is answered).
+Reports requests per second and p50/p99 latency for:
+- GET /          the control page (gzip accepted, as browsers do)
+- POST /command  a movement command
+
+"legacy" is the old setup for comparison: Flask's dev server with debug=True
+and the page rendered from the template on every request. The fleet's relays
+are not started, so commands only queue (and coalesce) -- this measures the
+web tier, not the car.
+
+    python -m TestScripts.WebBenchmark
+    python -m TestScripts.WebBenchmark --servers legacy dev gevent --clients 50 --duration 5
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+
+from TestScripts.LoadTest import percentile
+
+HOST = "127.0.0.1"
+WEB_PORT = 8070
+
+
+def run_web(port, server):
+    import logging
+    from flask import render_template_string
+    from Networking import ClientWeb
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    logging.getLogger("waitress.queue").setLevel(logging.ERROR)  # warns on every queued request
+    ClientWeb.print = lambda *args, **kwargs: None
+    if server == "legacy":
+        ClientWeb.create_links()
+        ClientWeb.app.view_functions["index"] = lambda: render_template_string(ClientWeb.HTML)
+        ClientWeb.app.run(host=HOST, port=port, debug=True, use_reloader=False)
+        return
+    server = ClientWeb.select_server(server)
+    ClientWeb.create_links()
+    ClientWeb.run_flask(HOST, port, server=server)
+
+
+def build_request(method, path, body=b""):
+    headers = f"{method} {path} HTTP/1.1\r\nHost: {HOST}\r\nAccept-Encoding: gzip\r\n"
+    if body:
+        headers += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+    return (headers + "\r\n").encode() + body
+
+
+async def read_response(reader):
+    """Returns True if the connection may be reused."""
+    status = await reader.readline()
+    if not status:
+        raise ConnectionError("closed")
+    keep_alive = status.startswith(b"HTTP/1.1")
+    length = 0
+    chunked = False
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b""):
+            break
+        name, _, value = header.partition(b":")
+        name = name.lower()
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"transfer-encoding":
+            chunked = b"chunked" in value.lower()
+        elif name == b"connection":
+            keep_alive = value.strip().lower() == b"keep-alive"
+    if chunked:
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.readexactly(length)
+    return keep_alive
+
+
+async def client(request, deadline, latencies, errors):
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(HOST, WEB_PORT)
+            writer.write(request)
+            keep_alive = await read_response(reader)
+            latencies.append(time.perf_counter() - started)
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            errors.append(1)
+            keep_alive = False
+        if not keep_alive and writer:
+            writer.close()
+            writer = None
+    if writer:
+        writer.close()
+
+
+def measure(request, num_clients, duration):
+    latencies, errors = [], []
+
+    async def drive():
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(client(request, deadline, latencies, errors) for _ in range(num_clients)))
+
+    started = time.perf_counter()
+    asyncio.run(drive())
+    wall = time.perf_counter() - started
+    return sorted(seconds * 1000 for seconds in latencies), len(errors), wall
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Requests/s and latency of ClientWeb under each WSGI server")
+    parser.add_argument("--servers", nargs="+", default=["legacy", "dev", "waitress", "gevent"])
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per endpoint")
+    args = parser.parse_args()
+
+    endpoints = [
+        ("GET /", build_request("GET", "/")),
+        ("POST /command", build_request("POST", "/command", json.dumps({"command": "forward"}).encode())),
+    ]
+    print(f"{args.clients} concurrent clients, {args.duration}s per endpoint. Latency in ms.")
+    print("server   | endpoint      |    req/s | errs |     p50 |     p99 |     max")
+    ctx = multiprocessing.get_context("spawn")
+    for server in args.servers:
+        if server in ("gevent", "waitress"):
+            try:
+                __import__(server)
+            except ImportError:
+                print(f"{server:<8} | not installed")
+                continue
+        proc = ctx.Process(target=run_web, args=(WEB_PORT, server), daemon=True)
+        proc.start()
+        time.sleep(2.0)  # imports + bind
+        for name, request in endpoints:
+            latencies, errors, wall = measure(request, args.clients, args.duration)
+            if not latencies:
+                print(f"{server:<8} | {name:<13} | no responses ({errors} errors)")
+                continue
+            print(f"{server:<8} | {name:<13} | {len(latencies) / wall:>8.0f} | {errors:>4} | "
+                  f"{percentile(latencies, 50):>7.2f} | {percentile(latencies, 99):>7.2f} | {latencies[-1]:>7.2f}")
+        proc.terminate()
+        proc.join()
+
+
+# Only run if executed directly
+if __name__ == "__main__":
+    run()
@@ -2,5 +2,13 @@
 TestScripts Package for Self-Driving RC Car
 
 Includes experimental or unverified modules like:
-- CameraTest: OpenCV and pygame camera testing
+- CameraTest: OpenCV camera testing
+- ServerBenchmark: command latency of Networking/Server.py under concurrent clients
+- FleetBenchmark: broadcast fan-out cost and delivery latency across a CarFleet
+- LoadTest: localhost load test (throughput, p50/p99/p999, server CPU) for Server.py and ClientWeb.py
+- ProtocolBenchmark: per-message parse cost of the framed protocol vs. the old JSON path
+- WebBenchmark: requests/s and latency of ClientWeb under each WSGI server vs. the old debug setup
+- StartupBenchmark: time to first GUI frame and first sensor sample, RSS and heavy modules loaded
+- JitterBenchmark: control-loop jitter under camera load, single process vs. separate processes
+- StallTest: CarRelay/CarFleet recover after the car stalls or hangs up (exits non-zero on failure)
 """
@@ -1,48 +1,208 @@
+import time
+
+STARTED = time.perf_counter()
+
+import argparse
+import os
+import signal
+import sys
 import threading
-import tkinter as tk
 
-# GUI
-from GUI.MainWindow import DarkGUI
+from Controllers.Services import services
 
-# Sensor Threads
+# Sensors (importing one registers its service with Controllers.Services)
 try:
-    from Controllers.GyroAccelerometerController import run as gyro_run_loop
-    from Controllers.UltrasonicController import run as ultra_run_loop
-    from Controllers.CameraController import run as camera_run  # Untested
+    import Controllers.GyroAccelerometerController as gyro
+    import Controllers.UltrasonicController as ultrasonic
+    import Controllers.CameraController as camera  # Untested
     hardware_available = True
 except ImportError as e:
     print("[main.py] WARNING: Some hardware modules not found.")
     print("[main.py] Details:", e)
-    gyro_run_loop = None
-    ultra_run_loop = None
-    camera_run = None
+    gyro = ultrasonic = camera = None
     hardware_available = False
 
+# In GUI mode, also serve remote commands (ClientWeb) from this process, so the dashboard shows
+# their latency. This listens on every interface, so it is off unless asked for; --serve overrides.
+# Headless mode always serves: the network is its only input.
+RUN_COMMAND_SERVER = False
+
+# Run without the Tk dashboard (driven over the network only); --headless / --gui override
+HEADLESS = False
+
+# Run control, perception, networking and UI as separate processes (see Processes.py); --processes overrides
+PROCESSES = False
+
+# Seconds before the supervisor restarts a headless service that exited or crashed
+RESTART_DELAY = 2.0
+
+
+def memory_usage():
+    """(current, peak) resident set size in MB, or None where /proc or resource is missing."""
+    try:
+        import resource
+        with open("/proc/self/statm") as f:
+            rss_pages = int(f.read().split()[1])
+        current = rss_pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+        return round(current, 1), round(peak, 1)
+    except (ImportError, OSError, ValueError):
+        return None
+
 
-def start_sensor_threads():
-    """Start sensor monitoring threads if hardware is available."""
-    if gyro_run_loop:
-        threading.Thread(target=gyro_run_loop, daemon=True).start()
-        print("[main.py] Gyro thread started")
+def report_startup(mode):
+    """Print time since main.py started and resident memory, once the mode is up."""
+    elapsed = (time.perf_counter() - STARTED) * 1000
+    memory = memory_usage()
+    rss = f"RSS {memory[0]} MB (peak {memory[1]} MB)" if memory else "RSS unavailable"
+    print(f"[main.py] {mode} ready in {elapsed:.0f} ms, {rss}, tkinter loaded: {'tkinter' in sys.modules}")
 
-    if ultra_run_loop:
-        threading.Thread(target=ultra_run_loop, daemon=True).start()
-        print("[main.py] Ultrasonic thread started")
 
-    if camera_run:
+def start_sensors():
+    """Start the sensor services if hardware is available; Controllers.Services restarts them on failure."""
+    if gyro:
+        services.start("gyro")
+    if ultrasonic:
+        services.start("ultrasonic")
+
+    if camera:
         # Optional: uncomment to auto-start camera
-        # threading.Thread(target=camera_run, daemon=True).start()
+        # services.start("camera")
         print("[main.py] Camera module imported, but auto-start disabled")
 
 
-def main():
-    """Launch the GUI and start sensor threads."""
-    start_sensor_threads()
+def start_command_server():
+    """Run Networking/Server.py's event loop in a background thread."""
+    try:
+        from Networking.Server import start_server
+    except ImportError as e:
+        print("[main.py] WARNING: Command server unavailable:", e)
+        return
+    threading.Thread(target=start_server, daemon=True).start()
+    print("[main.py] Command server thread started")
+
+
+class Supervisor:
+    """
+    Keeps headless services running: each runs in its own daemon thread and is
+    restarted `restart_delay` seconds after it returns or raises, until stop().
+    """
+    def __init__(self, restart_delay=RESTART_DELAY):
+        self.restart_delay = restart_delay
+        self.services = {}  # name -> target
+        self.threads = {}
+        self.restarts = {}
+        self.stopping = threading.Event()
+
+    def add(self, name, target):
+        self.services[name] = target
+        self.restarts[name] = 0
+
+    def launch(self, name):
+        thread = threading.Thread(target=self.guard, args=(name,), name=name, daemon=True)
+        self.threads[name] = thread
+        thread.start()
+
+    def guard(self, name):
+        try:
+            self.services[name]()
+            if not self.stopping.is_set():
+                print(f"[Supervisor] {name} exited")
+        except Exception as e:
+            print(f"[Supervisor] {name} crashed: {e!r}")
+
+    def start(self):
+        for name in self.services:
+            self.launch(name)
+            print(f"[Supervisor] {name} started")
+
+    def watch(self):
+        """Block (main thread) restarting dead services until stop()."""
+        while not self.stopping.wait(self.restart_delay):
+            for name, thread in self.threads.items():
+                if not thread.is_alive():
+                    self.restarts[name] += 1
+                    print(f"[Supervisor] Restarting {name} (restart {self.restarts[name]})")
+                    self.launch(name)
+
+    def stop(self, *_):
+        self.stopping.set()
+
+
+def run_headless():
+    """Motor control loop and command server under a Supervisor, sensors under Controllers.Services; no tkinter."""
+    supervisor = Supervisor()
+    start_sensors()
+
+    try:
+        from Controllers.MotorController import serve_control_loop, cleanup as motor_cleanup
+        supervisor.add("motor", serve_control_loop)
+    except ImportError as e:
+        print("[main.py] WARNING: Motor control unavailable:", e)
+        motor_cleanup = None
+
+    server_ready = None
+    try:
+        from Networking.Server import start_server, ready as server_ready
+        supervisor.add("server", start_server)
+    except ImportError as e:
+        print("[main.py] WARNING: Command server unavailable:", e)
+
+    signal.signal(signal.SIGTERM, supervisor.stop)
+    supervisor.start()
+    # Report once the server is listening (or has failed and been left to the supervisor)
+    deadline = time.perf_counter() + 5.0
+    while (server_ready is not None and not server_ready.wait(0.05)
+           and supervisor.threads["server"].is_alive() and time.perf_counter() < deadline):
+        pass
+    report_startup("Headless")
+
+    try:
+        supervisor.watch()
+    except KeyboardInterrupt:
+        supervisor.stop()
+    print("[main.py] Shutting down")
+    services.shutdown()
+    if motor_cleanup:
+        motor_cleanup()
+
+
+def run_gui(serve=RUN_COMMAND_SERVER):
+    """Launch the Tk dashboard and start sensor threads (and the command server if `serve`)."""
+    import tkinter as tk
+    from GUI.MainWindow import DarkGUI
+
+    start_sensors()
+    if serve:
+        start_command_server()
 
     root = tk.Tk()
     app = DarkGUI(root)
+    # Runs once the window has been drawn for the first time
+    root.after_idle(report_startup, "GUI")
     root.mainloop()
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Self-driving RC car")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--headless", dest="headless", action="store_true", default=HEADLESS,
+                      help="run sensors, motor control and the command server without the Tk dashboard")
+    mode.add_argument("--gui", dest="headless", action="store_false", help="show the Tk dashboard")
+    parser.add_argument("--processes", action="store_true", default=PROCESSES,
+                        help="run control, perception, networking and the UI in separate processes")
+    parser.add_argument("--serve", action="store_true", default=RUN_COMMAND_SERVER,
+                        help="with the dashboard, also accept remote commands on port 5000 (all interfaces)")
+    args = parser.parse_args()
+
+    if args.processes:
+        from Processes import run_processes
+        run_processes(headless=args.headless)
+    elif args.headless:
+        run_headless()
+    else:
+        run_gui(serve=args.serve)
+
+
 if __name__ == "__main__":
     main()